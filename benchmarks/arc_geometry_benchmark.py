@@ -0,0 +1,184 @@
+"""
+Abgleich und Zeitmessung der gebündelten Bogen-Neuberechnung
+(logic.arc_geometry.arc_parameters und HeightAnalysisLogic.recalculate_arc_geometries).
+
+Vergleicht beide mit den bisherigen zeilenweisen Verfahren:
+- GeometryManager._recalculate_arc_points (ezdxf Vec3/OCS je Bogen; nur mit ezdxf)
+- HeightAnalysisLogic.recalculate_arc_geometry (.loc-Zugriffe je Bogen)
+Die Bögen stammen aus synthetischen Netzen (benchmarks/synthetic_network.py) mit
+fehlenden Höhen, steilen Gefällen (OCS außerhalb der z-Achse), kollinearen und
+unvollständigen Bögen. Alle Werte müssen auf 1e-9 übereinstimmen.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/arc_geometry_benchmark.py --sizes 10000 100000
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.arc_geometry import arc_parameters  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+try:
+    from ezdxf.math import OCS, Vec3
+    EZDXF_AVAILABLE = True
+except ImportError:  # ezdxf nur für den Abgleich mit dem OCS-Verfahren
+    EZDXF_AVAILABLE = False
+
+TOLERANCE = 1e-9
+
+
+def reference_arc_points(row):
+    """Bisheriges Verfahren je Bogen (GeometryManager, Stand vor der Bündelung)."""
+    center_x, center_y = float(row['CenterX']), float(row['CenterY'])
+    start_x, start_y, end_x, end_y = float(row['StartX']), float(row['StartY']), float(row['EndX']), float(row['EndY'])
+    start_z, end_z = row['StartZ'], row['EndZ']
+    actual_start_z = float(start_z) if pd.notna(start_z) else 0.0
+    actual_end_z = float(end_z) if pd.notna(end_z) else 0.0
+    if pd.notna(start_z) and pd.notna(end_z):
+        center_z = (actual_start_z + actual_end_z) / 2.0
+    elif pd.notna(start_z):
+        center_z = actual_start_z
+    elif pd.notna(end_z):
+        center_z = actual_end_z
+    else:
+        center_z = float(row['CenterZ']) if pd.notna(row['CenterZ']) else 0.0
+    radius = math.sqrt((start_x - center_x)**2 + (start_y - center_y)**2)
+    center = Vec3(center_x, center_y, center_z)
+    to_start = Vec3(start_x, start_y, actual_start_z) - center
+    to_end = Vec3(end_x, end_y, actual_end_z) - center
+    normal = to_start.cross(to_end)
+    if normal.magnitude < 1e-9:
+        return [center_z] + [np.nan] * 6
+    normal = normal.normalize()
+    ocs = OCS(normal)
+    ocs_start, ocs_end = ocs.from_wcs(to_start), ocs.from_wcs(to_end)
+    start_angle = math.degrees(math.atan2(ocs_start.y, ocs_start.x))
+    end_angle = math.degrees(math.atan2(ocs_end.y, ocs_end.x))
+    return [center_z, radius, normal.x, normal.y, normal.z,
+            start_angle + 360 if start_angle < 0 else start_angle, end_angle + 360 if end_angle < 0 else end_angle]
+
+
+def reference_logic(df_processed, arc_idx):
+    """Bisheriges Verfahren je Bogen (HeightAnalysisLogic, Stand vor der Bündelung)."""
+    row = df_processed.loc[arc_idx]
+    if row['EntityType'] != 'ARC':
+        return
+    values = [row['StartX'], row['StartY'], row['EndX'], row['EndY'], row['CenterX'], row['CenterY']]
+    if any(pd.isna(value) for value in values):
+        return
+    start_x, start_y, end_x, end_y, center_x, center_y = values
+    start_z, end_z = row['StartZ'], row['EndZ']
+    radius_start = np.sqrt((start_x - center_x)**2 + (start_y - center_y)**2)
+    radius_end = np.sqrt((end_x - center_x)**2 + (end_y - center_y)**2)
+    if pd.notna(start_z) or pd.notna(end_z):
+        if pd.notna(start_z) and pd.notna(end_z):
+            center_z = (start_z + end_z) / 2
+        else:
+            center_z = start_z if pd.notna(start_z) else end_z
+        df_processed.loc[arc_idx, 'CenterZ'] = center_z
+        df_processed.loc[arc_idx, 'CenterZ_Status'] = 'Berechnet'
+    df_processed.loc[arc_idx, 'Radius'] = (radius_start + radius_end) / 2
+
+
+def fixture(size, seed):
+    """Bögen und Linien eines synthetischen Netzes mit Sonderfällen."""
+    geo_df, _ = generate_network(size, circle_share=0.0, seed=seed)
+    rng = np.random.default_rng(seed)
+    arcs = (geo_df['EntityType'] == 'ARC').to_numpy()
+    # Steile Bögen: Normale weit außerhalb der z-Achse
+    steep = arcs & (rng.random(len(geo_df)) < 0.2)
+    geo_df.loc[steep, 'EndZ'] = geo_df.loc[steep, 'StartZ'] + rng.uniform(-50, 50, steep.sum())
+    for column in ('StartZ', 'EndZ'):
+        geo_df.loc[rng.random(len(geo_df)) < 0.15, column] = np.nan
+    geo_df.loc[rng.random(len(geo_df)) < 0.1, 'CenterZ'] = np.nan
+    # Kollinear: Start und Ende spiegelbildlich zum Mittelpunkt, gleiche Höhe
+    collinear = np.flatnonzero(arcs)[:5]
+    geo_df.loc[geo_df.index[collinear], 'EndX'] = 2 * geo_df['CenterX'].iloc[collinear] - geo_df['StartX'].iloc[collinear]
+    geo_df.loc[geo_df.index[collinear], 'EndY'] = 2 * geo_df['CenterY'].iloc[collinear] - geo_df['StartY'].iloc[collinear]
+    geo_df.loc[geo_df.index[collinear], 'EndZ'] = geo_df['StartZ'].iloc[collinear]
+    # Unvollständige Bögen werden in der Logik übersprungen
+    geo_df.loc[geo_df.index[np.flatnonzero(arcs)[5:8]], 'CenterX'] = np.nan
+    geo_df['CenterZ_Status'] = ''
+    return geo_df
+
+
+def compare_arc_parameters(arcs):
+    """Abweichende Werte zwischen arc_parameters und dem ezdxf-Verfahren; Rückgabe: (Anzahl, Zeit neu, Zeit alt)."""
+    start = time.perf_counter()
+    result = arc_parameters(arcs[['StartX', 'StartY']].to_numpy(), arcs[['EndX', 'EndY']].to_numpy(),
+                            arcs[['CenterX', 'CenterY']].to_numpy(), arcs['StartZ'].to_numpy(),
+                            arcs['EndZ'].to_numpy(), arcs['CenterZ'].to_numpy())
+    new_seconds = time.perf_counter() - start
+    values = np.column_stack([result['center_z'], result['radius'], result['normal'],
+                              result['start_angle'], result['end_angle']])
+    values[result['collinear'], 1:] = np.nan
+
+    start = time.perf_counter()
+    reference = np.array([reference_arc_points(row) for _, row in arcs.iterrows()], dtype=float)
+    old_seconds = time.perf_counter() - start
+
+    # Winkel nahe 0/360 gelten als gleich
+    differences = np.abs(values - reference)
+    differences[:, 5:] = np.minimum(differences[:, 5:], np.abs(differences[:, 5:] - 360.0))
+    mismatched = ~((differences <= TOLERANCE) | (np.isnan(values) & np.isnan(reference)))
+    return int(mismatched.sum()), new_seconds, old_seconds
+
+
+def compare_logic(logic, geo_df):
+    """Abweichende Werte zwischen recalculate_arc_geometries und dem zeilenweisen Verfahren."""
+    arc_index = geo_df.index[(geo_df['EntityType'] == 'ARC').to_numpy()]
+    batch, reference = geo_df.copy(), geo_df.copy()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        logic.recalculate_arc_geometries(batch, geo_df.index)
+        new_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for arc_idx in arc_index:
+            reference_logic(reference, arc_idx)
+        old_seconds = time.perf_counter() - start
+
+    columns = ['CenterZ', 'Radius']
+    mismatched = ~(np.isclose(batch[columns].to_numpy(dtype=float), reference[columns].to_numpy(dtype=float),
+                              rtol=0, atol=TOLERANCE, equal_nan=True))
+    mismatched = int(mismatched.sum()) + int((batch['CenterZ_Status'] != reference['CenterZ_Status']).sum())
+    return mismatched, new_seconds, old_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    if not EZDXF_AVAILABLE:
+        print("ezdxf nicht installiert: Abgleich mit dem OCS-Verfahren wird übersprungen")
+
+    logic = HeightAnalysisLogic()
+    mismatches = 0
+    print(f"{'Verfahren':<12}{'Elemente':>10}{'Bögen':>8}{'Gebündelt [s]':>15}{'Je Bogen [s]':>14}  Abgleich")
+    for size in options.sizes:
+        geo_df = fixture(size, options.seed)
+        arcs = geo_df[geo_df['EntityType'] == 'ARC']
+        checks = [('Logik', compare_logic(logic, geo_df))]
+        if EZDXF_AVAILABLE:
+            checks.insert(0, ('ezdxf/OCS', compare_arc_parameters(arcs)))
+        for name, (differences, new_seconds, old_seconds) in checks:
+            mismatches += differences > 0
+            check = 'identisch' if differences == 0 else f'ABWEICHUNG ({differences} Werte)'
+            print(f"{name:<12}{size:>10}{len(arcs):>8}{new_seconds:15.3f}{old_seconds:14.3f}  {check}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Skalierungsmessung der Geometrie-Text-Zuordnung (AnalysisHandler.find_associations).
+
+Erzeugt für jede Größe ein synthetisches Leitungsnetz (benchmarks/synthetic_network.py),
+misst die Zuordnung ohne Ergebnis-Cache und schreibt die Skalierungskurve als JSON
+(Laufzeit je Größe, Trefferzahl, Durchsatz und Skalierungsexponent zwischen
+benachbarten Größen). Ein Exponent nahe 1 bedeutet lineares Wachstum.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/association_benchmark.py --sizes 10000 100000 1000000 --output association_scaling.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import scipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.analysis_handler import AnalysisHandler, ASSIGNMENT_MODES  # noqa: E402
+
+
+def git_revision():
+    """Aktueller Commit des Projekts (für die Zuordnung der Messungen zu einem Stand)."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_association(geo_df, text_df, options, mode):
+    """Mindestlaufzeit über options.repeat Läufe, jeweils mit leerem Cache."""
+    handler = AnalysisHandler()
+    timings = []
+    result = None
+    for _ in range(options.repeat):
+        handler.clear_cache()
+        start = time.perf_counter()
+        result = handler.find_associations(geo_df, text_df, options.search_radius, options.line_offset,
+                                           assignment_mode=mode)
+        timings.append(time.perf_counter() - start)
+    return timings, len(handler.match_df), len(result)
+
+
+def scaling_exponents(points):
+    """Exponent k aus t ~ n^k zwischen benachbarten Messpunkten."""
+    exponents = []
+    for previous, current in zip(points, points[1:]):
+        exponents.append({
+            'from': previous['entities'],
+            'to': current['entities'],
+            'exponent': round(float(np.log(current['seconds'] / previous['seconds']) /
+                                    np.log(current['entities'] / previous['entities'])), 3)
+        })
+    return exponents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--modes', nargs='+', choices=ASSIGNMENT_MODES, default=['all'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--density', type=float, default=2000.0,
+                        help='Geometrien je 1000 x 1000 Zeichnungseinheiten')
+    parser.add_argument('--segment-length', type=float, nargs=2, default=[5.0, 40.0], metavar=('MIN', 'MAX'))
+    parser.add_argument('--label-noise', type=float, default=0.2)
+    parser.add_argument('--label-share', type=float, default=0.3)
+    parser.add_argument('--search-radius', type=float, default=1.0)
+    parser.add_argument('--line-offset', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Pfad der JSON-Datei (ohne Angabe nur Ausgabe auf der Konsole)')
+    options = parser.parse_args()
+
+    report = {
+        'benchmark': 'find_associations',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scipy': scipy.__version__,
+        },
+        'parameters': {
+            'density': options.density,
+            'segment_length': options.segment_length,
+            'label_noise': options.label_noise,
+            'label_share': options.label_share,
+            'search_radius': options.search_radius,
+            'line_offset': options.line_offset,
+            'repeat': options.repeat,
+            'seed': options.seed,
+        },
+        'curves': {}
+    }
+
+    print(f"{'Modus':<9}{'Geometrien':>12}{'Texte':>10}{'Zeit [s]':>11}{'Treffer':>10}{'Geo/s':>12}")
+    for mode in options.modes:
+        points = []
+        for size in options.sizes:
+            geo_df, text_df = generate_network(size, density=options.density,
+                                               segment_length=tuple(options.segment_length),
+                                               label_noise=options.label_noise, label_share=options.label_share,
+                                               seed=options.seed)
+            timings, match_count, geometry_count = time_association(geo_df, text_df, options, mode)
+            seconds = min(timings)
+            points.append({
+                'entities': size,
+                'texts': len(text_df),
+                'seconds': round(seconds, 4),
+                'timings': [round(value, 4) for value in timings],
+                'matches': match_count,
+                'matched_geometries': geometry_count,
+                'entities_per_second': round(size / seconds, 1),
+            })
+            print(f"{mode:<9}{size:>12}{len(text_df):>10}{seconds:>11.3f}{match_count:>10}{size / seconds:>12.0f}")
+        report['curves'][mode] = {'points': points, 'scaling': scaling_exponents(points)}
+        for step in report['curves'][mode]['scaling']:
+            print(f"  Skalierung {step['from']} -> {step['to']}: n^{step['exponent']}")
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Ergebnis gespeichert: {options.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Referenz für benchmarks/propagation_benchmark.py: die ursprüngliche Höhenpropagation
+(HeightAnalysisLogic.propagate_heights_along_network vor der Umstellung auf Topologie-Knoten)
+mit bis zu 20 Durchläufen über alle Verbindungen und Endpunkt-Vergleich über point_distance.
+
+Zweite und dritte Phase sind unverändert aus dem Ausgangsstand übernommen (einschließlich der
+print-Ausgaben). Nur die erste Phase (Text-Höhen auf die Endpunkte verteilen) ruft die aktuelle
+_assign_text_heights auf, da die Texte inzwischen aus der Treffertabelle kommen; verglichen
+wird damit allein die Netzwerk-Propagation.
+"""
+import pandas as pd
+
+from logic.height_analysis_logic import HeightAnalysisLogic
+
+
+class BaselinePropagation(HeightAnalysisLogic):
+    """HeightAnalysisLogic mit der ursprünglichen, iterativen Propagation."""
+
+    def point_distance(self, point1, point2):
+        """Berechnet euklidische Distanz zwischen zwei Punkten."""
+        import math
+        return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+
+    def propagate_heights_along_network(self, lines, connections):
+        """
+        Propagiert Höhen entlang des Liniennetzwerks.
+        """
+        if not lines:
+            return lines
+        
+        max_iterations = 20  # Erhöht für komplexere Netzwerke
+        tolerance = 0.01
+        
+        print(f"    Starte Höhenpropagation ({len(lines)} Linien)...")
+        
+        # Erste Phase: Text-Höhen zuweisen (seit der Treffertabelle aus text_elements statt aus
+        # Associated_Text geparst; in beiden Verfahren dieselbe Methode)
+        self._assign_text_heights(lines)
+        
+        # Zweite Phase: Iterative Netzwerk-Propagation
+        for iteration in range(max_iterations):
+            changes_made = False
+            changes_this_iteration = 0
+            
+            for i, line in enumerate(lines):
+                # Propagiere Höhen zu verbundenen Linien
+                for connected_idx in connections.get(i, []):
+                    if connected_idx >= len(lines):
+                        continue
+                        
+                    connected_line = lines[connected_idx]
+                    
+                    # Finde gemeinsame Punkte und übertrage Höhen
+                    # Start-Start Verbindung
+                    if self.point_distance(line['start'], connected_line['start']) <= tolerance:
+                        if pd.notna(line['start_z']) and pd.isna(connected_line['start_z']):
+                            connected_line['start_z'] = line['start_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 Start→Start: ID {connected_line['id']} erhält StartZ = {line['start_z']} von ID {line['id']}")
+                        elif pd.notna(connected_line['start_z']) and pd.isna(line['start_z']):
+                            line['start_z'] = connected_line['start_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 Start←Start: ID {line['id']} erhält StartZ = {connected_line['start_z']} von ID {connected_line['id']}")
+                    
+                    # Start-End Verbindung
+                    elif self.point_distance(line['start'], connected_line['end']) <= tolerance:
+                        if pd.notna(line['start_z']) and pd.isna(connected_line['end_z']):
+                            connected_line['end_z'] = line['start_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 Start→End: ID {connected_line['id']} erhält EndZ = {line['start_z']} von ID {line['id']}")
+                        elif pd.notna(connected_line['end_z']) and pd.isna(line['start_z']):
+                            line['start_z'] = connected_line['end_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 Start←End: ID {line['id']} erhält StartZ = {connected_line['end_z']} von ID {connected_line['id']}")
+                    
+                    # End-Start Verbindung
+                    elif self.point_distance(line['end'], connected_line['start']) <= tolerance:
+                        if pd.notna(line['end_z']) and pd.isna(connected_line['start_z']):
+                            connected_line['start_z'] = line['end_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 End→Start: ID {connected_line['id']} erhält StartZ = {line['end_z']} von ID {line['id']}")
+                        elif pd.notna(connected_line['start_z']) and pd.isna(line['end_z']):
+                            line['end_z'] = connected_line['start_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 End←Start: ID {line['id']} erhält EndZ = {connected_line['start_z']} von ID {connected_line['id']}")
+                    
+                    # End-End Verbindung
+                    elif self.point_distance(line['end'], connected_line['end']) <= tolerance:
+                        if pd.notna(line['end_z']) and pd.isna(connected_line['end_z']):
+                            connected_line['end_z'] = line['end_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 End→End: ID {connected_line['id']} erhält EndZ = {line['end_z']} von ID {line['id']}")
+                        elif pd.notna(connected_line['end_z']) and pd.isna(line['end_z']):
+                            line['end_z'] = connected_line['end_z']
+                            changes_made = True
+                            changes_this_iteration += 1
+                            print(f"        📍 End←End: ID {line['id']} erhält EndZ = {connected_line['end_z']} von ID {connected_line['id']}")
+            
+            print(f"      Iteration {iteration + 1}: {changes_this_iteration} Änderungen")
+            
+            if not changes_made:
+                print(f"   Konvergiert nach {iteration + 1} Iterationen")
+                break
+        
+        # Dritte Phase: Lineare Interpolation für noch offene Endpunkte
+        for iteration in range(3):  # Maximal 3 Iterationen für Interpolation
+            changes_made = False
+            
+            for line in lines:
+                if pd.notna(line['start_z']) and pd.isna(line['end_z']):
+                    # Suche nach einer verbundenen Linie, die eine Höhe für den Endpunkt liefern kann
+                    for connected_idx in connections.get(line['row_idx'], []):
+                        if connected_idx >= len(lines):
+                            continue
+                        connected_line = lines[connected_idx]
+                        
+                        # Prüfe, ob eine Interpolation möglich ist
+                        if (pd.notna(connected_line['start_z']) and pd.notna(connected_line['end_z'])):
+                            # Bestimme, welcher Punkt der verbundenen Linie der Endpunkt unserer Linie ist
+                            end_point = line['end']
+                            if self.point_distance(end_point, connected_line['start']) <= tolerance:
+                                line['end_z'] = connected_line['start_z']
+                                changes_made = True
+                                print(f"        🔗 Interpolation: ID {line['id']} EndZ = {connected_line['start_z']} (von verbundener Linie)")
+                                break
+                            elif self.point_distance(end_point, connected_line['end']) <= tolerance:
+                                line['end_z'] = connected_line['end_z']
+                                changes_made = True
+                                print(f"        🔗 Interpolation: ID {line['id']} EndZ = {connected_line['end_z']} (von verbundener Linie)")
+                                break
+                
+                elif pd.isna(line['start_z']) and pd.notna(line['end_z']):
+                    # Suche nach einer verbundenen Linie, die eine Höhe für den Startpunkt liefern kann
+                    for connected_idx in connections.get(line['row_idx'], []):
+                        if connected_idx >= len(lines):
+                            continue
+                        connected_line = lines[connected_idx]
+                        
+                        # Prüfe, ob eine Interpolation möglich ist
+                        if (pd.notna(connected_line['start_z']) and pd.notna(connected_line['end_z'])):
+                            # Bestimme, welcher Punkt der verbundenen Linie der Startpunkt unserer Linie ist
+                            start_point = line['start']
+                            if self.point_distance(start_point, connected_line['start']) <= tolerance:
+                                line['start_z'] = connected_line['start_z']
+                                changes_made = True
+                                print(f"        🔗 Interpolation: ID {line['id']} StartZ = {connected_line['start_z']} (von verbundener Linie)")
+                                break
+                            elif self.point_distance(start_point, connected_line['end']) <= tolerance:
+                                line['start_z'] = connected_line['end_z']
+                                changes_made = True
+                                print(f"        🔗 Interpolation: ID {line['id']} StartZ = {connected_line['end_z']} (von verbundener Linie)")
+                                break
+            
+            if not changes_made:
+                break
+        
+        # Zähle finale Ergebnisse
+        assigned_heights = sum(1 for line in lines if pd.notna(line['start_z']) or pd.notna(line['end_z']))
+        print(f"    📊 {assigned_heights} von {len(lines)} Linien haben Höhen erhalten")
+        
+        return lines
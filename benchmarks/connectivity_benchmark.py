@@ -0,0 +1,76 @@
+"""
+Zeitmessung und Abgleich der Endpunkt-Verbindungssuche
+(HeightAnalysisLogic.find_connected_lines_and_arcs).
+
+Vergleicht den räumlichen Index (cKDTree.query_pairs) mit dem bisherigen paarweisen
+Vergleich aller Linien (O(n²)) auf synthetischen Netzen (benchmarks/synthetic_network.py).
+Der paarweise Vergleich läuft nur bis --reference-limit Elemente; bis dahin müssen
+beide Verfahren dasselbe connections-Dict liefern.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/connectivity_benchmark.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.distance_kernels import endpoint_pairing  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+
+def pairwise_connections(starts, ends, tolerance):
+    """Bisheriges Verfahren: je Linie ein Endpunkt-Vergleich mit allen folgenden Linien."""
+    connections = {i: [] for i in range(len(starts))}
+    for i in range(len(starts) - 1):
+        pairing = endpoint_pairing(
+            np.broadcast_to(starts[i], starts[i + 1:].shape), np.broadcast_to(ends[i], ends[i + 1:].shape),
+            starts[i + 1:], ends[i + 1:], tolerance
+        )
+        for j in np.flatnonzero(pairing) + i + 1:
+            connections[i].append(int(j))
+            connections[int(j)].append(i)
+    return connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--tolerance', type=float, default=0.01)
+    parser.add_argument('--reference-limit', type=int, default=20_000,
+                        help='Größte Elementzahl, für die der paarweise Vergleich noch läuft')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    logic = HeightAnalysisLogic()
+    mismatches = 0
+    print(f"{'Elemente':>10}{'Verbindungen':>14}{'KD-Baum [s]':>13}{'Paarweise [s]':>15}  Abgleich")
+    for size in options.sizes:
+        geo_df, _ = generate_network(size, circle_share=0.0, seed=options.seed)
+
+        start = time.perf_counter()
+        lines, connections = logic.find_connected_lines_and_arcs(geo_df, options.tolerance)
+        tree_seconds = time.perf_counter() - start
+        connection_count = sum(len(neighbours) for neighbours in connections.values()) // 2
+
+        reference_time, check = f"{'-':>15}", 'n/a'
+        if size <= options.reference_limit:
+            starts = np.array([line['start'] for line in lines])
+            ends = np.array([line['end'] for line in lines])
+            start = time.perf_counter()
+            reference = pairwise_connections(starts, ends, options.tolerance)
+            reference_time = f"{time.perf_counter() - start:15.3f}"
+            identical = reference == connections
+            mismatches += not identical
+            check = 'identisch' if identical else 'ABWEICHUNG'
+        print(f"{size:>10}{connection_count:>14}{tree_seconds:13.3f}{reference_time}  {check}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
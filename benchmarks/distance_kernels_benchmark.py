@@ -0,0 +1,107 @@
+"""
+Abgleich und Zeitmessung der Abstands-Kernel (logic/distance_kernels.py).
+
+Prüft auf denselben Eingaben (inkl. Randfällen), dass NumPy- und Numba-Pfad
+identische Ergebnisse liefern, und misst beide Pfade für mehrere Größen.
+Ohne Numba wird nur der NumPy-Pfad gemessen.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/distance_kernels_benchmark.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic import distance_kernels  # noqa: E402
+
+
+def make_inputs(size, seed=0):
+    """Zufällige Eingaben mit eingestreuten Randfällen."""
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-100, 100, (size, 2))
+    starts = rng.uniform(-100, 100, (size, 2))
+    ends = starts + rng.normal(0, 20, (size, 2))
+    centers = rng.uniform(-100, 100, (size, 2))
+    radii = rng.uniform(0.1, 50, size)
+    start_angles = rng.uniform(0, 360, size)
+    end_angles = rng.uniform(-360, 720, size)
+
+    # Randfälle: degenerierte Segmente, Vollkreise, Punkt im Mittelpunkt, Winkel auf der Sektorgrenze
+    edge = np.arange(0, size, 7)
+    ends[edge[::3]] = starts[edge[::3]]
+    end_angles[edge[1::3]] = start_angles[edge[1::3]]
+    points[edge[2::3]] = centers[edge[2::3]]
+    boundary = edge[::5]
+    rad = np.radians(start_angles[boundary])
+    points[boundary] = centers[boundary] + radii[boundary, None] * np.column_stack([np.cos(rad), np.sin(rad)])
+
+    # Endpunkt-Paare: teils exakt zusammenfallend, teils genau auf der Toleranz
+    second_starts = np.where(rng.random((size, 1)) < 0.3, ends, rng.uniform(-100, 100, (size, 2)))
+    second_ends = np.where(rng.random((size, 1)) < 0.3, starts, second_starts + rng.normal(0, 20, (size, 2)))
+    second_ends[edge[::4]] = ends[edge[::4]] + np.array([0.01, 0.0])
+
+    return {
+        'segment': (points, starts, ends),
+        'arc': (points, centers, radii, start_angles, end_angles),
+        'pairing': (starts, ends, second_starts, second_ends, 0.01),
+    }
+
+
+KERNELS = {
+    'segment': distance_kernels.point_to_segment_dist_2d,
+    'arc': distance_kernels.point_to_arc_dist_2d,
+    'pairing': distance_kernels.endpoint_pairing,
+}
+
+
+def run_kernel(name, args, numba_enabled, repeat):
+    distance_kernels.use_numba = numba_enabled
+    result = KERNELS[name](*args)  # Aufwärmen (Numba kompiliert beim ersten Aufruf)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = KERNELS[name](*args)
+        timings.append(time.perf_counter() - start)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args()
+
+    paths = [False, True] if distance_kernels.NUMBA_AVAILABLE else [False]
+    if not distance_kernels.NUMBA_AVAILABLE:
+        print("Numba nicht installiert - nur NumPy-Pfad wird gemessen.")
+
+    mismatches = 0
+    print(f"{'Kernel':<10}{'Größe':>10}{'NumPy [ms]':>14}{'Numba [ms]':>14}  Abgleich")
+    for size in options.sizes:
+        inputs = make_inputs(size)
+        for name in KERNELS:
+            results, timings = [], []
+            for numba_enabled in paths:
+                result, seconds = run_kernel(name, inputs[name], numba_enabled, options.repeat)
+                results.append(result)
+                timings.append(seconds * 1000)
+
+            check = 'n/a'
+            if len(results) == 2:
+                identical = np.array_equal(results[0], results[1])
+                mismatches += not identical
+                check = 'identisch' if identical else f'ABWEICHUNG ({np.sum(results[0] != results[1])} Werte)'
+            numba_time = f"{timings[1]:14.2f}" if len(timings) == 2 else f"{'-':>14}"
+            print(f"{name:<10}{size:>10}{timings[0]:14.2f}{numba_time}  {check}")
+
+    distance_kernels.use_numba = distance_kernels.NUMBA_AVAILABLE
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
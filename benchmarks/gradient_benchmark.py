@@ -0,0 +1,79 @@
+"""
+Zeitmessung und Plausibilitätsprüfung der Gefälle-Interpolation
+(HeightAnalysisLogic.interpolate_gradient).
+
+Prüft auf einer geraden Kette mit ungleichen Segmentlängen, dass die Höhen zwischen
+zwei bekannten Knoten linear über die Länge verlaufen, und misst die Interpolation
+auf synthetischen Netzen (benchmarks/synthetic_network.py), in denen nur ein kleiner
+Anteil der Endpunkte eine Höhe hat.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/gradient_benchmark.py --sizes 10000 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+
+def linear_chain_error(logic, segment_count=50, seed=0):
+    """Größte Abweichung von der linearen Höhe auf einer Kette zwischen zwei bekannten Enden."""
+    rng = np.random.default_rng(seed)
+    x = np.concatenate([[0.0], np.cumsum(rng.uniform(1, 20, segment_count))])
+    df = pd.DataFrame({
+        'ID': [f'K{i}' for i in range(segment_count)], 'EntityType': 'LINE', 'Layer': 'KANAL',
+        'StartX': x[:-1], 'StartY': 0.0, 'StartZ': np.nan, 'EndX': x[1:], 'EndY': 0.0, 'EndZ': np.nan,
+        'StartZ_Status': '', 'EndZ_Status': ''
+    })
+    df.loc[0, 'StartZ'] = 100.0
+    df.loc[segment_count - 1, 'EndZ'] = 95.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = logic.interpolate_gradient(df)
+    expected = 100.0 - 5.0 * x / x[-1]
+    return max(np.abs(result['StartZ'].to_numpy() - expected[:-1]).max(),
+               np.abs(result['EndZ'].to_numpy() - expected[1:]).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--known-share', type=float, default=0.05,
+                        help='Anteil der Endpunkte mit bekannter Höhe')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    logic = HeightAnalysisLogic()
+    error = linear_chain_error(logic)
+    print(f"Lineare Kette: größte Abweichung {error:.2e}")
+
+    print(f"{'Elemente':>10}{'Knoten':>10}{'gesetzt':>10}{'Zeit [s]':>10}")
+    for size in options.sizes:
+        geo_df, _ = generate_network(size, circle_share=0.0, seed=options.seed)
+        rng = np.random.default_rng(options.seed)
+        for column in ('StartZ', 'EndZ'):
+            geo_df[column] = np.where(rng.random(len(geo_df)) < options.known_share, geo_df[column], np.nan)
+            geo_df[f'{column}_Status'] = ''
+        geo_df['CenterZ_Status'] = ''
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            topology = logic.get_topology(geo_df)
+            start = time.perf_counter()
+            result = logic.interpolate_gradient(geo_df, topology)
+            seconds = time.perf_counter() - start
+        filled = int((result['StartZ_Status'] == 'Gradient').sum() + (result['EndZ_Status'] == 'Gradient').sum())
+        print(f"{size:>10}{len(topology.nodes):>10}{filled:>10}{seconds:10.3f}")
+    return 1 if error > 1e-9 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Zeitmessung und Abgleich des wiederverwendbaren KNN-Höhenmodells
+(HeightAnalysisLogic.train_and_predict / predict_heights / save_model / load_model).
+
+Misst je Größe das erste Training mit Vorhersage, die erneute Vorhersage mit
+unveränderten Trainingsdaten (ohne neues Training) und die Vorhersage nach
+save_model/load_model. Trainiert wird auf den Endpunkten eines synthetischen Netzes
+(benchmarks/synthetic_network.py) mit bekannter Höhe; die blockweise (ggf. parallele)
+Vorhersage muss mit einem einzelnen KNeighborsRegressor.predict übereinstimmen.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/knn_model_benchmark.py --sizes 10000 100000 --unknown-factor 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KNeighborsRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.height_analysis_logic import KNN_NEIGHBORS, HeightAnalysisLogic  # noqa: E402
+
+FEATURES = ['X', 'Y']
+
+
+def fixture(size, unknown_factor, seed):
+    """Bekannte Endpunkthöhen als Trainingsdaten und zufällige Punkte im selben Gebiet als Vorhersage."""
+    geo_df, _ = generate_network(size, circle_share=0.0, seed=seed)
+    known = pd.DataFrame({
+        'X': np.concatenate([geo_df['StartX'], geo_df['EndX']]),
+        'Y': np.concatenate([geo_df['StartY'], geo_df['EndY']]),
+        'Direct_Height': np.concatenate([geo_df['StartZ'], geo_df['EndZ']]),
+    }).dropna()
+    rng = np.random.default_rng(seed)
+    count = len(known) * unknown_factor
+    unknown = pd.DataFrame({'X': rng.uniform(known['X'].min(), known['X'].max(), count),
+                            'Y': rng.uniform(known['Y'].min(), known['Y'].max(), count)})
+    return known, unknown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--unknown-factor', type=int, default=5,
+                        help='Vorherzusagende Punkte je Trainingspunkt')
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    mismatches = 0
+    print(f"{'Training':>10}{'Vorhersage':>12}{'Fit [s]':>9}{'Predict [s]':>13}{'Erneut [s]':>12}"
+          f"{'Geladen [s]':>13}  Abgleich")
+    for size in options.sizes:
+        known, unknown = fixture(size, options.unknown_factor, options.seed)
+        logic = HeightAnalysisLogic()
+        logic.features = FEATURES
+
+        logic.train_and_predict(known, unknown.copy(), options.max_workers)
+        fit_seconds = logic.model_timings['KNN-Training']['seconds']
+        predict_seconds = logic.model_timings['KNN-Vorhersage']['seconds']
+
+        start = time.perf_counter()
+        repeated = logic.train_and_predict(known, unknown.copy(), options.max_workers)['Predicted_Height'].to_numpy()
+        repeat_seconds = time.perf_counter() - start
+        reused = 'wiederverwendet' in logic.model_timings['KNN-Training']
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'knn_model.npz')
+            logic.save_model(path)
+            loaded = HeightAnalysisLogic()
+            loaded.features = FEATURES
+            loaded.load_model(path)
+            start = time.perf_counter()
+            reloaded = loaded.train_and_predict(known, unknown.copy(), options.max_workers)['Predicted_Height'].to_numpy()
+            loaded_seconds = time.perf_counter() - start
+        reused &= 'wiederverwendet' in loaded.model_timings['KNN-Training']
+
+        reference = KNeighborsRegressor(n_neighbors=KNN_NEIGHBORS).fit(known[FEATURES], known['Direct_Height'])
+        reference = reference.predict(unknown[FEATURES])
+        identical = np.array_equal(repeated, reference) and np.array_equal(reloaded, reference)
+        mismatches += not (identical and reused)
+        check = 'identisch' if identical else 'ABWEICHUNG'
+        if not reused:
+            check += ', Modell neu trainiert'
+        print(f"{len(known):>10}{len(unknown):>12}{fit_seconds:9.3f}{predict_seconds:13.3f}{repeat_seconds:12.3f}"
+              f"{loaded_seconds:13.3f}  {check}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Zeitmessung und Abgleich der prozessparallelen Propagation je Layer
+(HeightAnalysisLogic.propagate_layers, execution_mode='process').
+
+Teilt ein synthetisches Netz (benchmarks/synthetic_network.py) in --layers
+räumlich zusammenhängende Layer (Streifen entlang X), erzeugt die Layer-Arrays einmal
+und misst die Propagation nacheinander sowie mit 1..--workers Prozessen. Alle Läufe
+müssen dieselben Start-/Endhöhen liefern.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/layer_parallel_benchmark.py --size 500000 --layers 16 --workers 1 2 4 8 16
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+
+def layer_fixture(logic, size, layer_count, seed):
+    """Layer-Arrays eines synthetischen Netzes mit ca. 10 % bekannten Z-Werten und Texthöhen."""
+    geo_df, _ = generate_network(size, circle_share=0.0, seed=seed)
+    rng = np.random.default_rng(seed)
+    geo_df['StartZ'] = np.where(rng.random(len(geo_df)) < 0.1, geo_df['StartZ'], np.nan)
+    geo_df['EndZ'] = np.where(rng.random(len(geo_df)) < 0.1, geo_df['EndZ'], np.nan)
+    geo_df['Direct_Height'] = np.where(rng.random(len(geo_df)) < 0.05, rng.uniform(100, 120, len(geo_df)), np.nan)
+    geo_df['TextX'] = geo_df['StartX'] + rng.normal(0, 1, len(geo_df))
+    geo_df['TextY'] = geo_df['StartY'] + rng.normal(0, 1, len(geo_df))
+    strips = np.linspace(geo_df['StartX'].min(), geo_df['StartX'].max(), layer_count + 1)[1:-1]
+    geo_df['Layer'] = np.char.add('L', np.searchsorted(strips, geo_df['StartX']).astype(str))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        topology = logic.get_topology(geo_df)
+        return [logic.layer_arrays(geo_df[geo_df['Layer'] == layer], topology=topology)
+                for layer in geo_df['Layer'].unique()]
+
+
+def run(logic, layer_arrays, execution_mode, workers=None):
+    """Propagation aller Layer; Rückgabe: (Höhen als ein Array, Sekunden)."""
+    start = time.perf_counter()
+    results = list(logic.propagate_layers(layer_arrays, execution_mode, workers))
+    seconds = time.perf_counter() - start
+    return np.concatenate([np.column_stack([start_z, end_z]) for _, start_z, end_z in results]), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=200_000)
+    parser.add_argument('--layers', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    logic = HeightAnalysisLogic()
+    layer_arrays = layer_fixture(logic, options.size, options.layers, options.seed)
+    print(f"{len(layer_arrays)} Layer, {sum(len(arrays['id']) for arrays in layer_arrays)} Linien/Bögen, "
+          f"{os.cpu_count()} CPU-Kerne")
+
+    reference, serial_seconds = run(logic, layer_arrays, 'serial')
+    print(f"{'Modus':<16}{'Zeit [s]':>10}{'Speedup':>10}  Abgleich")
+    print(f"{'serial':<16}{serial_seconds:10.3f}{1.0:10.2f}  -")
+    mismatches = 0
+    for workers in options.workers:
+        heights, seconds = run(logic, layer_arrays, 'process', workers)
+        identical = np.array_equal(heights, reference, equal_nan=True)
+        mismatches += not identical
+        print(f"{f'process x{workers}':<16}{seconds:10.3f}{serial_seconds / seconds:10.2f}  "
+              f"{'identisch' if identical else 'ABWEICHUNG'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
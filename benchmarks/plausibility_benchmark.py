@@ -0,0 +1,118 @@
+"""
+Zeitmessung und Trefferprüfung der Plausibilitätsprüfung (HeightAnalysisLogic.check_plausibility).
+
+Synthetische Netze (benchmarks/synthetic_network.py) erhalten entlang jeder Haltungskette
+stetige, fallende Höhen; Schächte die Höhe ihres Knotens. Danach werden Fehler eingestreut:
+vertauschte Start-/Endhöhen (Gegengefälle), zu steile Haltungen, Höhensprünge an einem
+Endpunkt und Ausreißer (ganze Haltung bzw. Schacht um mehrere hundert Meter versetzt).
+Jeder eingestreute Fehler muss mit seinem Befund markiert sein; außerhalb der Nachbarschaft
+der Fehler (Kanten ohne gemeinsamen Knoten mit einer gestörten Haltung) darf nichts
+markiert werden.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/plausibility_benchmark.py --sizes 10000 100000 --error-share 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+CHAIN_LENGTH = 25
+ERRORS = {'Reversed': 'Gegengefälle', 'Steep': 'Gefälle', 'Jump': 'Höhensprung', 'Outlier': 'Ausreißer'}
+
+
+def fixture(size, error_share, seed):
+    """Netz mit stetigen Höhen und eingestreuten Fehlern; Rückgabe: (geo_df, {Prüfung: Zeilen})."""
+    geo_df, _ = generate_network(size, chain_length=CHAIN_LENGTH, seed=seed)
+    rng = np.random.default_rng(seed)
+    edges = np.flatnonzero(geo_df['EntityType'].isin(['LINE', 'ARC']).to_numpy())
+    circles = np.flatnonzero((geo_df['EntityType'] == 'CIRCLE').to_numpy())
+
+    # Stetige Höhen je Kette: Startknoten 100-120 m, danach 0,2-2 % Gefälle je Haltung
+    chain = edges // CHAIN_LENGTH
+    chord = np.hypot(geo_df['EndX'].to_numpy()[edges] - geo_df['StartX'].to_numpy()[edges],
+                     geo_df['EndY'].to_numpy()[edges] - geo_df['StartY'].to_numpy()[edges])
+    fall = chord * rng.uniform(0.002, 0.02, len(edges))
+    top = rng.uniform(100, 120, chain.max() + 1)
+    cumulative = np.cumsum(fall)
+    chain_offset = np.concatenate([[0.0], cumulative])[np.searchsorted(chain, np.arange(chain.max() + 1))]
+    end_z = top[chain] - (cumulative - chain_offset[chain])
+    geo_df.loc[geo_df.index[edges], 'StartZ'] = end_z + fall
+    geo_df.loc[geo_df.index[edges], 'EndZ'] = end_z
+
+    # Schächte: Höhe des nächsten Haltungs-Endpunkts
+    points = np.column_stack([geo_df[['StartX', 'StartY']].to_numpy()[edges].T,
+                              geo_df[['EndX', 'EndY']].to_numpy()[edges].T]).T
+    point_z = np.concatenate([end_z + fall, end_z])
+    nearest = cKDTree(points).query(geo_df[['CenterX', 'CenterY']].to_numpy()[circles])[1]
+    geo_df.loc[geo_df.index[circles], 'CenterZ'] = point_z[nearest]
+
+    # Fehler in getrennten, zufälligen Haltungen bzw. Schächten; nur Haltungen mit
+    # Nachfolger, damit ein Höhensprung am Endpunkt einen Vergleichswert hat
+    error_count = max(1, int(len(edges) * error_share))
+    inner = edges[(edges % CHAIN_LENGTH < CHAIN_LENGTH - 1) & (edges + 1 < len(edges))]
+    chosen = rng.choice(inner, 4 * error_count, replace=False).reshape(4, error_count)
+    injected = dict(zip(ERRORS, chosen))
+    index = geo_df.index
+    start, end = geo_df['StartZ'].to_numpy(copy=True), geo_df['EndZ'].to_numpy(copy=True)
+    reversed_rows, steep_rows = injected['Reversed'], injected['Steep']
+    geo_df.loc[index[reversed_rows], 'StartZ'] = end[reversed_rows]
+    geo_df.loc[index[reversed_rows], 'EndZ'] = start[reversed_rows]
+    steep_chord = np.hypot(geo_df['EndX'].to_numpy()[steep_rows] - geo_df['StartX'].to_numpy()[steep_rows],
+                           geo_df['EndY'].to_numpy()[steep_rows] - geo_df['StartY'].to_numpy()[steep_rows])
+    geo_df.loc[index[steep_rows], 'EndZ'] = start[steep_rows] - 0.5 * steep_chord
+    geo_df.loc[index[injected['Jump']], 'EndZ'] = end[injected['Jump']] + rng.uniform(2, 5, error_count)
+    geo_df.loc[index[injected['Outlier']], ['StartZ', 'EndZ']] += 500.0
+    outlier_circles = rng.choice(circles, max(1, int(len(circles) * error_share)), replace=False)
+    geo_df.loc[index[outlier_circles], 'CenterZ'] += 500.0
+    injected['Outlier'] = np.concatenate([injected['Outlier'], outlier_circles])
+    return geo_df, injected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--error-share', type=float, default=0.01, help='Anteil gestörter Haltungen je Fehlerart')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    failures = 0
+    print(f"{'Elemente':>10}{'Fehler':>8}{'Markiert':>10}{'Prüfung [s]':>13}{'Gefunden':>10}{'Fehlalarme':>12}")
+    for size in options.sizes:
+        geo_df, injected = fixture(size, options.error_share, options.seed)
+        logic = HeightAnalysisLogic()
+        topology = logic.get_topology(geo_df)
+
+        start = time.perf_counter()
+        results = logic.check_plausibility(geo_df, topology=topology)
+        seconds = time.perf_counter() - start
+
+        # Jeder eingestreute Fehler mit dem erwarteten Befund
+        found = sum(int(results.loc[geo_df.index[rows], name].sum()) for name, rows in injected.items())
+        expected = sum(len(rows) for rows in injected.values())
+
+        # Fehlalarme: markierte Zeilen ohne gemeinsamen Knoten mit einer gestörten Zeile
+        disturbed = np.concatenate(list(injected.values()))
+        start_nodes, end_nodes = topology.row_nodes(geo_df.index)
+        disturbed_nodes = np.concatenate([start_nodes[disturbed], end_nodes[disturbed]])
+        near = np.isin(start_nodes, disturbed_nodes) | np.isin(end_nodes, disturbed_nodes)
+        near[disturbed] = True
+        flagged = results['Flagged'].reindex(geo_df.index, fill_value=False).to_numpy()
+        false_alarms = int((flagged & ~near).sum())
+
+        failures += found != expected or false_alarms > 0
+        print(f"{len(geo_df):>10}{expected:>8}{int(flagged.sum()):>10}{seconds:13.3f}"
+              f"{f'{found}/{expected}':>10}{false_alarms:>12}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
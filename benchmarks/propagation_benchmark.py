@@ -0,0 +1,132 @@
+"""
+Abgleich und Zeitmessung der Höhenpropagation
+(HeightAnalysisLogic.propagate_heights_along_network).
+
+Vergleicht den einmaligen Durchlauf über die Topologie-Knoten mit den ursprünglichen
+iterativen Durchläufen über point_distance (wörtliche Kopie in
+benchmarks/baseline_propagation.py) auf Fixture-Netzen: kleine Sonderfälle (Knoten mit widersprüchlichen Höhen, Linie und
+Bogen zwischen denselben Punkten, geschlossene Linie) und synthetische Netze
+(benchmarks/synthetic_network.py) mit lückenhaften Z-Werten und Höhentexten.
+Beide Verfahren müssen für jede Linie dieselben Start-/Endhöhen liefern.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/propagation_benchmark.py --sizes 1000 10000 50000
+"""
+import argparse
+import contextlib
+import copy
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.baseline_propagation import BaselinePropagation  # noqa: E402
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+
+def line_row(entity_id, start, end, start_z=np.nan, end_z=np.nan, direct_height=np.nan, entity_type='LINE'):
+    return {'ID': entity_id, 'EntityType': entity_type, 'Layer': 'KANAL',
+            'StartX': start[0], 'StartY': start[1], 'StartZ': start_z,
+            'EndX': end[0], 'EndY': end[1], 'EndZ': end_z,
+            'Direct_Height': direct_height, 'TextX': np.nan, 'TextY': np.nan}
+
+
+def special_fixtures():
+    """Kleine Netze mit den Sonderfällen der Vorrangregeln."""
+    return {
+        # Drei bekannte, verschiedene Höhen und zwei offene Enden an einem Knoten
+        'conflicting_node': pd.DataFrame([
+            line_row('A', (0, 0), (10, 0), end_z=100.0),
+            line_row('B', (10, 0), (20, 0)),
+            line_row('C', (10, 0), (10, 10), start_z=101.0),
+            line_row('D', (10, -10), (10, 0), end_z=102.0),
+            line_row('E', (20, 5), (10, 0)),
+        ]),
+        # Kette mit Lücken: Höhen wandern nur über gemeinsame Punkte, nicht entlang der Linien
+        'chain': pd.DataFrame([
+            line_row(f'K{i}', (10 * i, 0), (10 * (i + 1), 0),
+                     start_z=100.0 - i if i % 3 == 0 else np.nan) for i in range(12)
+        ]),
+        # Geschlossene Linie (Start = Ende) und ein angeschlossener Strang
+        'closed_line': pd.DataFrame([
+            line_row('L', (0, 0), (0, 0), start_z=99.0),
+            line_row('M', (0, 0), (5, 5)),
+            line_row('N', (5, 5), (9, 9), start_z=98.0),
+        ]),
+        # Linie und Bogen zwischen denselben zwei Punkten
+        'line_and_arc': pd.DataFrame([
+            line_row('P', (0, 0), (10, 0), start_z=100.0),
+            line_row('Q', (0, 0), (10, 0), entity_type='ARC'),
+            line_row('R', (10, 0), (20, 0), end_z=99.0),
+        ]),
+        # Endpunkte innerhalb der Toleranz, aber nicht identisch
+        'snapped': pd.DataFrame([
+            line_row('S', (0, 0), (10, 0), end_z=100.0),
+            line_row('T', (10.004, 0.003), (20, 0)),
+            line_row('U', (20.006, 0), (30, 0), start_z=99.0),
+        ]),
+    }
+
+
+def synthetic_fixture(size, seed):
+    """Synthetisches Netz mit ca. 10 % bekannten Z-Werten und einigen Texthöhen."""
+    geo_df, _ = generate_network(size, circle_share=0.0, seed=seed)
+    rng = np.random.default_rng(seed)
+    geo_df['StartZ'] = np.where(rng.random(len(geo_df)) < 0.1, geo_df['StartZ'], np.nan)
+    geo_df['EndZ'] = np.where(rng.random(len(geo_df)) < 0.1, geo_df['EndZ'], np.nan)
+    geo_df['Direct_Height'] = np.where(rng.random(len(geo_df)) < 0.05, rng.uniform(100, 120, len(geo_df)), np.nan)
+    geo_df['TextX'] = geo_df['StartX'] + rng.normal(0, 1, len(geo_df))
+    geo_df['TextY'] = geo_df['StartY'] + rng.normal(0, 1, len(geo_df))
+    return geo_df
+
+
+def compare(logic, df_lines):
+    """Führt beide Verfahren auf Kopien derselben Linien aus; Rückgabe: (Abweichungen, Zeit neu, Zeit alt)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        lines, connections = logic.find_connected_lines_and_arcs(df_lines)
+        reference_lines = copy.deepcopy(lines)
+
+        start = time.perf_counter()
+        result = logic.propagate_heights_along_network(lines, connections)
+        new_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = BaselinePropagation().propagate_heights_along_network(reference_lines, connections)
+        old_seconds = time.perf_counter() - start
+
+    def heights(values):
+        return np.array([(line['start_z'], line['end_z']) for line in values], dtype=float)
+
+    differences = ~np.isclose(heights(result), heights(reference), rtol=0, atol=0, equal_nan=True)
+    return int(differences.sum()), new_seconds, old_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 50_000])
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    logic = HeightAnalysisLogic()
+    fixtures = dict(special_fixtures())
+    for size in options.sizes:
+        fixtures[f'synthetic_{size}'] = synthetic_fixture(size, options.seed)
+
+    mismatches = 0
+    print(f"{'Fixture':<20}{'Linien':>8}{'Knoten [s]':>12}{'Durchläufe [s]':>16}  Abgleich")
+    for name, df_lines in fixtures.items():
+        differences, new_seconds, old_seconds = compare(logic, df_lines)
+        mismatches += differences > 0
+        check = 'identisch' if differences == 0 else f'ABWEICHUNG ({differences} Endpunkte)'
+        print(f"{name:<20}{len(df_lines):>8}{new_seconds:12.3f}{old_seconds:16.3f}  {check}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
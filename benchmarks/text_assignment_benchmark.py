@@ -0,0 +1,114 @@
+"""
+Abgleich und Zeitmessung der Text-Endpunkt-Zuordnung
+(HeightAnalysisLogic.create_text_assignment_table).
+
+Vergleicht die Abfrage über einen k-d-Baum der Textpositionen (k=2 für den
+Ausschluss des Starttexts am Endpunkt) mit dem bisherigen Verfahren (je Endpunkt
+Kopie der Texttabelle und iterrows über alle Texte) auf synthetischen Netzen
+(benchmarks/synthetic_network.py). Einige Texte erhalten doppelte TextIDs oder
+keine Position. Beide Verfahren müssen dieselbe Tabelle liefern.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/text_assignment_benchmark.py --sizes 200 2000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+
+def reference_nearest(text_df, point_x, point_y, entity_id, assignment_type, exclude_text_id=None):
+    """Bisheriges Verfahren je Endpunkt (Stand vor dem k-d-Baum)."""
+    available_texts = text_df.copy()
+    if exclude_text_id:
+        available_texts = available_texts[available_texts['TextID'] != exclude_text_id]
+    if available_texts.empty:
+        return None
+    distances = []
+    for _, text_row in available_texts.iterrows():
+        if pd.notna(text_row['TextX']) and pd.notna(text_row['TextY']):
+            distances.append(np.sqrt((point_x - text_row['TextX']) ** 2 + (point_y - text_row['TextY']) ** 2))
+        else:
+            distances.append(float('inf'))
+    if not distances or min(distances) == float('inf'):
+        return None
+    nearest_text = available_texts.iloc[distances.index(min(distances))]
+    return {'TextID': nearest_text['TextID'], 'Text': nearest_text['Text'], 'Height': nearest_text['Height'],
+            'TextX': nearest_text['TextX'], 'TextY': nearest_text['TextY'], 'AssignedEntityID': entity_id,
+            'AssignedTo': assignment_type, 'Distance': min(distances)}
+
+
+def reference_table(df_processed, text_df):
+    assignments = []
+    for _, row in df_processed.iterrows():
+        if row['EntityType'] in ['LINE', 'ARC'] and row[['StartX', 'StartY', 'EndX', 'EndY']].notna().all():
+            start_assignment = reference_nearest(text_df, row['StartX'], row['StartY'], row['ID'], 'StartZ')
+            if start_assignment:
+                assignments.append(start_assignment)
+            end_assignment = reference_nearest(
+                text_df, row['EndX'], row['EndY'], row['ID'], 'EndZ',
+                exclude_text_id=start_assignment['TextID'] if start_assignment else None
+            )
+            if end_assignment:
+                assignments.append(end_assignment)
+    return pd.DataFrame(assignments)
+
+
+def fixture(size, seed):
+    """Geometrien und Texttabelle (TextID, Text, Height, TextX, TextY) eines synthetischen Netzes."""
+    geo_df, text_df = generate_network(size, seed=seed)
+    rng = np.random.default_rng(seed)
+    text_df = pd.DataFrame({
+        'TextID': text_df['ID'].to_numpy(dtype=object), 'Text': text_df['Text'],
+        'Height': rng.uniform(90, 110, len(text_df)),
+        'TextX': text_df['InsertX'].to_numpy(dtype=float), 'TextY': text_df['InsertY'].to_numpy(dtype=float)
+    })
+    duplicated = rng.random(len(text_df)) < 0.05
+    text_df.loc[duplicated, 'TextID'] = text_df['TextID'].shift(1)[duplicated]
+    text_df.loc[rng.random(len(text_df)) < 0.02, ['TextX', 'TextY']] = np.nan
+    return geo_df, text_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 2_000, 100_000])
+    parser.add_argument('--reference-limit', type=int, default=2_000,
+                        help='Größte Elementzahl, für die das bisherige Verfahren noch läuft')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    logic = HeightAnalysisLogic()
+    mismatches = 0
+    print(f"{'Elemente':>10}{'Texte':>8}{'Zuordnungen':>13}{'KD-Baum [s]':>13}{'Je Punkt [s]':>14}  Abgleich")
+    for size in options.sizes:
+        geo_df, text_df = fixture(size, options.seed)
+
+        start = time.perf_counter()
+        table = logic.create_text_assignment_table(geo_df, text_df)
+        tree_seconds = time.perf_counter() - start
+
+        reference_time, check = f"{'-':>14}", 'n/a'
+        if size <= options.reference_limit:
+            start = time.perf_counter()
+            reference = reference_table(geo_df, text_df)
+            reference_time = f"{time.perf_counter() - start:14.3f}"
+            try:
+                pd.testing.assert_frame_equal(table, reference, check_dtype=False, rtol=1e-12)
+                check = 'identisch'
+            except AssertionError as error:
+                mismatches += 1
+                check = f'ABWEICHUNG ({str(error).splitlines()[0]})'
+        print(f"{size:>10}{len(text_df):>8}{len(table):>13}{tree_seconds:13.3f}{reference_time}  {check}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
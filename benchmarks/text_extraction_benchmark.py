@@ -0,0 +1,112 @@
+"""
+Abgleich und Zeitmessung der Höhenextraktion aus Texten
+(HeightAnalysisLogic.extract_height_columns).
+
+Vergleicht die vektorisierte Extraktion (ein kompiliertes Schlüsselwort-Muster,
+Series.str.extract/extractall) mit dem bisherigen Verfahren (je Text re.sub und
+ein neu kompiliertes Muster je Schlüsselwort über Series.apply). Die Texte stammen
+aus synthetischen Netzen (benchmarks/synthetic_network.py), ergänzt um Sonderfälle
+(Koordinaten in [x, y], überlappende Schlüsselwörter, Werte außerhalb des Bereichs,
+Zahlen ohne Schlüsselwort). Beide Verfahren müssen dieselben Höhen und Koordinaten liefern.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/text_extraction_benchmark.py --sizes 10000 100000 500000
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_network import generate_network  # noqa: E402
+from logic.height_analysis_logic import HeightAnalysisLogic  # noqa: E402
+
+KEYWORDS = ['OK', 'UK', 'KD', 'SOK', 'DH']
+
+SPECIAL_TEXTS = [
+    'OK=101.25 [12.5, -3.75]', 'SOK=300 OK=2000', 'UK = 99.1234', 'ok=120.5', 'OK=20 UK=150',
+    'DN300 112.45', 'KD=1200 [1.0, 2.0] 480.5', '[101.5, 202.25]', 'SO=98.765', 'DH=55.',
+    'OK=101.2;UK=99.9', 'UK=45 OK=46', '', None, np.nan, 'OKUK=100', '1234.5', 'S=77.7 KD =88.8',
+]
+
+
+def reference_height(text, keywords):
+    """Bisheriges Verfahren je Text (Stand vor der Vektorisierung)."""
+    if pd.isna(text) or text is None:
+        return None
+    text_cleaned = re.sub(r'\[.*?\]', '', str(text))
+    for keyword in keywords:
+        match = re.search(f'{keyword}[\\s]*=([\\d]+\\.?[\\d]{{0,3}})', text_cleaned, re.IGNORECASE)
+        if match:
+            height = float(match.group(1))
+            if 50 <= height <= 1000:
+                return height
+    number_match = re.search(r'(?<!\d)(\d{2,3}\.\d{1,3})(?!\d)', text_cleaned)
+    if number_match:
+        height = float(number_match.group(1))
+        if 50 <= height <= 500:
+            return height
+    return None
+
+
+def fixture_texts(size, seed):
+    """Texte eines synthetischen Netzes, gemischt mit Sonderfällen und Koordinatenangaben."""
+    _, text_df = generate_network(size, label_share=1.0, seed=seed)
+    rng = np.random.default_rng(seed)
+    texts = text_df['Text'].to_numpy(dtype=object)
+    with_coordinates = rng.random(len(texts)) < 0.3
+    x, y = text_df['InsertX'].to_numpy()[with_coordinates], text_df['InsertY'].to_numpy()[with_coordinates]
+    texts[with_coordinates] = [f"{text} [{tx:.2f}, {ty:.2f}]" for text, tx, ty in zip(texts[with_coordinates], x, y)]
+    special = rng.random(len(texts)) < 0.05
+    texts[special] = rng.choice(np.array(SPECIAL_TEXTS, dtype=object), special.sum())
+    return pd.Series(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--reference-limit', type=int, default=200_000,
+                        help='Größte Textanzahl, für die das bisherige Verfahren noch läuft')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    logic = HeightAnalysisLogic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        logic.set_height_keywords(','.join(KEYWORDS))
+
+    mismatches = 0
+    print(f"{'Texte':>10}{'Höhen':>10}{'Vektor [s]':>12}{'Je Text [s]':>13}  Abgleich")
+    for size in options.sizes:
+        texts = fixture_texts(size, options.seed)
+
+        start = time.perf_counter()
+        extracted = logic.extract_height_columns(texts)
+        vector_seconds = time.perf_counter() - start
+
+        reference_time, check = f"{'-':>13}", 'n/a'
+        if len(texts) <= options.reference_limit:
+            start = time.perf_counter()
+            reference = texts.apply(reference_height, keywords=KEYWORDS).astype(float).to_numpy()
+            reference_time = f"{time.perf_counter() - start:13.3f}"
+            coordinates = np.array([logic.extract_text_coordinates(text) for text in texts], dtype=float)
+            scalar = texts.apply(logic.extract_height_from_text).astype(float).to_numpy()
+            differences = (
+                (~np.isclose(extracted['Height'].to_numpy(), reference, rtol=0, atol=0, equal_nan=True)).sum() +
+                (~np.isclose(scalar, reference, rtol=0, atol=0, equal_nan=True)).sum() +
+                (~np.isclose(extracted[['TextX', 'TextY']].to_numpy(), coordinates, rtol=0, atol=0, equal_nan=True)).sum()
+            )
+            mismatches += differences > 0
+            check = 'identisch' if differences == 0 else f'ABWEICHUNG ({differences} Werte)'
+        print(f"{len(texts):>10}{int(extracted['Height'].notna().sum()):>10}{vector_seconds:12.3f}{reference_time}  {check}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,17 @@ import ezdxf
 import pandas as pd
 import numpy as np
 
+# Approximate glyph width relative to the text height (for the text extent estimate)
+CHAR_WIDTH_RATIO = 0.8
+# Baseline-to-baseline distance of MTEXT lines relative to the character height
+MTEXT_LINE_SPACING = 5.0 / 3.0
+
+# TEXT alignment codes -> relative anchor position (0 = left/bottom, 1 = right/top)
+TEXT_HALIGN_FRACTION = {0: 0.0, 1: 0.5, 2: 1.0, 3: 0.5, 4: 0.5, 5: 0.5}
+TEXT_VALIGN_FRACTION = {0: 0.0, 1: 0.0, 2: 0.5, 3: 1.0}
+# Layout columns from _text_layout; only needed to compute the Box* columns
+TEXT_LAYOUT_COLUMNS = ['TextHeight', 'WidthFactor', 'AnchorX', 'AnchorY', 'AlignH', 'AlignV']
+
 class DXFParser:
     """
     A class for reading and parsing DXF files,
@@ -101,9 +112,63 @@ class DXFParser:
         """Creates a DataFrame from the collected text data (TEXT, MTEXT, Block texts)."""
         if not text_data:
             print("INFO: No supported texts found.")
-            text_cols = ['ID','EntityType','Layer','InsertX','InsertY','InsertZ','Text','BlockName']
+            text_cols = ['ID','EntityType','Layer','InsertX','InsertY','InsertZ','Text','BlockName',
+                         'BoxCenterX','BoxCenterY','BoxHalfWidth','BoxHalfHeight']
             return pd.DataFrame(columns=text_cols)
-        return pd.DataFrame(text_data)
+        return self.compute_text_boxes(pd.DataFrame(text_data))
+
+    @staticmethod
+    def compute_text_boxes(text_df):
+        """
+        Adds the oriented bounding box of every text (vectorized over the DataFrame):
+        BoxCenterX/BoxCenterY (WCS) and BoxHalfWidth/BoxHalfHeight along the text direction
+        given by 'Rotation' (degrees). The width is estimated from the longest line,
+        the text height and the width factor. Texts without a height get an empty box
+        at their anchor point. The layout columns (TEXT_LAYOUT_COLUMNS) are dropped
+        afterwards so they do not show up in the table or in exports.
+        """
+        text = text_df['Text'].fillna('').astype(str)
+        lines = text.str.split('\n')
+        max_line_length = lines.explode().str.len().groupby(level=0).max().reindex(text.index).fillna(0)
+        line_count = lines.str.len()
+
+        height = pd.to_numeric(text_df['TextHeight'], errors='coerce').fillna(0.0).to_numpy()
+        width_factor = pd.to_numeric(text_df['WidthFactor'], errors='coerce').fillna(1.0).to_numpy()
+        width = max_line_length.to_numpy(dtype=float) * height * CHAR_WIDTH_RATIO * width_factor
+        box_height = height * (1.0 + (line_count.to_numpy(dtype=float) - 1.0) * MTEXT_LINE_SPACING)
+
+        # Box centre relative to the anchor in text coordinates, then rotated into WCS
+        local_x = (0.5 - text_df['AlignH'].fillna(0.0).to_numpy(dtype=float)) * width
+        local_y = (0.5 - text_df['AlignV'].fillna(0.0).to_numpy(dtype=float)) * box_height
+        rotation = np.radians(pd.to_numeric(text_df['Rotation'], errors='coerce').fillna(0.0).to_numpy())
+        cos_r, sin_r = np.cos(rotation), np.sin(rotation)
+
+        anchor_x = text_df['AnchorX'].fillna(text_df['InsertX']).to_numpy(dtype=float)
+        anchor_y = text_df['AnchorY'].fillna(text_df['InsertY']).to_numpy(dtype=float)
+        text_df['BoxCenterX'] = anchor_x + local_x * cos_r - local_y * sin_r
+        text_df['BoxCenterY'] = anchor_y + local_x * sin_r + local_y * cos_r
+        text_df['BoxHalfWidth'] = width / 2.0
+        text_df['BoxHalfHeight'] = box_height / 2.0
+        return text_df.drop(columns=TEXT_LAYOUT_COLUMNS, errors='ignore')
+
+    @staticmethod
+    def export_text_arrays(text_df, coords_path, labels_path=None):
+        """
+        Writes the text positions as a float64 (n, 2) .npy array for the out-of-core
+        association (AnalysisHandler.find_associations_out_of_core). The box centre is
+        used where available, otherwise the insert point. The optional labels file holds
+        the texts as a fixed-width unicode array in the same order, so both files can be
+        opened with np.load(..., mmap_mode='r').
+        """
+        x = text_df['InsertX'].astype(float)
+        y = text_df['InsertY'].astype(float)
+        if 'BoxCenterX' in text_df.columns and 'BoxCenterY' in text_df.columns:
+            x = text_df['BoxCenterX'].astype(float).fillna(x)
+            y = text_df['BoxCenterY'].astype(float).fillna(y)
+        np.save(coords_path, np.column_stack([x.to_numpy(), y.to_numpy()]))
+        if labels_path is not None:
+            np.save(labels_path, text_df['Text'].fillna('').astype(str).to_numpy().astype(str))
+        return coords_path, labels_path
 
     def _create_base_dict(self, entity, handle: str):
         """Creates a base dictionary with common attributes."""
@@ -185,6 +250,8 @@ class DXFParser:
                     # Construct block name from BlockTableRecord and attribute tag.
                     'BlockName': f"{block_name} [{attrib.dxf.tag}]"
                 })
+                # The text extent uses the attribute's own (WCS) placement.
+                data.update(self._text_layout(attrib))
                 found_texts.append(data)
             
             # Return the list of all found attribute texts.
@@ -218,6 +285,15 @@ class DXFParser:
                     'Rotation': block_entity.dxf.rotation if hasattr(block_entity.dxf, 'rotation') else 0.0,
                     'BlockName': block_name
                 })
+                # Text extent: size from the block definition, placed at the block insertion point.
+                layout = self._text_layout(sub_entity)
+                y_scale = abs(block_entity.dxf.yscale) if hasattr(block_entity.dxf, 'yscale') else 1.0
+                layout.update({
+                    'TextHeight': layout['TextHeight'] * y_scale,
+                    'AnchorX': block_entity.dxf.insert.x,
+                    'AnchorY': block_entity.dxf.insert.y,
+                })
+                data.update(layout)
                 found_texts.append(data)
         
         return found_texts
@@ -245,7 +321,46 @@ class DXFParser:
             'Rotation': entity.dxf.rotation if hasattr(entity.dxf, 'rotation') else 0.0,
             'BlockName': np.nan  # No block for standalone text
         })
+        data.update(self._text_layout(entity))
         return data
+
+    def _text_layout(self, entity):
+        """
+        Collects what is needed to estimate the extent of a TEXT/MTEXT/ATTRIB entity:
+        text height, width factor, the WCS anchor point and the anchor's relative
+        position within the text box (AlignH: 0 = left .. 1 = right, AlignV: 0 = bottom .. 1 = top).
+        The boxes themselves are computed vectorized in _build_text_df.
+        """
+        dxf = entity.dxf
+        layout = {
+            'TextHeight': np.nan, 'WidthFactor': 1.0,
+            'AnchorX': dxf.insert.x, 'AnchorY': dxf.insert.y,
+            'AlignH': 0.0, 'AlignV': 0.0,
+        }
+        if entity.dxftype() == 'MTEXT':
+            layout['TextHeight'] = dxf.char_height if hasattr(dxf, 'char_height') else np.nan
+            attachment = dxf.attachment_point if hasattr(dxf, 'attachment_point') else 1
+            layout['AlignH'] = ((attachment - 1) % 3) * 0.5
+            layout['AlignV'] = 1.0 - ((attachment - 1) // 3) * 0.5
+            return layout
+
+        # TEXT / ATTRIB
+        layout['TextHeight'] = dxf.height if hasattr(dxf, 'height') else np.nan
+        layout['WidthFactor'] = dxf.width if hasattr(dxf, 'width') else 1.0
+        halign = dxf.halign if hasattr(dxf, 'halign') else 0
+        valign = dxf.valign if hasattr(dxf, 'valign') else 0
+        if (halign or valign) and dxf.hasattr('align_point'):
+            align_point = dxf.align_point
+            if halign in (3, 5):
+                # ALIGNED/FIT: the text runs from insert to align_point on the baseline
+                layout['AnchorX'] = (dxf.insert.x + align_point.x) / 2.0
+                layout['AnchorY'] = (dxf.insert.y + align_point.y) / 2.0
+            else:
+                layout['AnchorX'] = align_point.x
+                layout['AnchorY'] = align_point.y
+        layout['AlignH'] = TEXT_HALIGN_FRACTION.get(halign, 0.0)
+        layout['AlignV'] = 0.5 if halign == 4 else TEXT_VALIGN_FRACTION.get(valign, 0.0)
+        return layout
     
     def get_document(self):
         """
@@ -1,9 +1,15 @@
+import logging
 import pandas as pd
 import numpy as np
 import PySide6.QtCore as QtCore
+from logic.arc_geometry import arc_parameters
+from logic.network_topology import NetworkTopology
+from logic.pipeline_logging import PipelineStage, get_logger
 
 # import re # No longer strictly needed for parsing core attributes
 
+geometry_log = get_logger('geometry')
+
 
 class GeometryManager:
     def __init__(self):
@@ -17,9 +23,15 @@ class GeometryManager:
             'Radius', 'NormalX', 'NormalY', 'NormalZ', 'StartAngle', 'EndAngle'
         ]
         self.text_df = pd.DataFrame()
+        # Langformat-Treffertabelle der Geometrie-Text-Analyse (ein Eintrag pro Treffer)
+        self.association_matches_df = pd.DataFrame()
+        # Associated_Text je ID, wie ihn die Analyse zur Treffertabelle geschrieben hat
+        self.association_texts = pd.Series(dtype=object)
         self.all_layer_names = []
         self.analysis_results_applied = False
         self.id_column_name_in_all_entities_df = 'ID'
+        # Shared node/edge topology of the geometry, rebuilt only when the geometry changes
+        self.topology = NetworkTopology()
     def has_data(self):
         """
         Checks if geometry data has been loaded.
@@ -29,11 +41,15 @@ class GeometryManager:
 
 
     def process_dxf_data_frame(self, geo_df: pd.DataFrame, text_df: pd.DataFrame, all_layer_names: list):
-        print("--- Starte process_dxf_data_frame ---")
+        geometry_log.debug("Starte process_dxf_data_frame")
         
         # 1) Speicher die DataFrames intern
         self.all_entities_df = geo_df.copy() if geo_df is not None else pd.DataFrame()
         self.text_df = text_df.copy() if text_df is not None else pd.DataFrame()
+        self.topology.invalidate()
+        # Treffer der vorherigen Zeichnung verwerfen (Handles wiederholen sich zwischen Dateien)
+        self.reset_association_matches()
+        self.analysis_results_applied = False
 
         # 2) Layer aus Geometrie + Text + DXF-Layer vereinen
         unique_geo_layers = set(self.all_entities_df['Layer'].unique()) if not self.all_entities_df.empty else set()
@@ -43,20 +59,24 @@ class GeometryManager:
         all_collected_layers = unique_geo_layers.union(unique_text_layers).union(unique_dxf_layers)
         self.all_layer_names = sorted(list(all_collected_layers))
         
-        print(f"DEBUG GM: {len(self.all_entities_df)} Geometrien und {len(self.text_df)} Texte verarbeitet.")
-        print(f"DEBUG GM: {len(self.all_layer_names)} Layer insgesamt erkannt.")
-        print(f"DEBUG GM: Geo-Layer: {unique_geo_layers}")
-        print(f"DEBUG GM: Text-Layer: {unique_text_layers}")
-        print(f"--- Beende process_dxf_data_frame. ---")
+        geometry_log.debug("%d Geometrien und %d Texte verarbeitet", len(self.all_entities_df), len(self.text_df))
+        geometry_log.debug("%d Layer insgesamt erkannt", len(self.all_layer_names))
+        geometry_log.debug("Geo-Layer: %s", unique_geo_layers)
+        geometry_log.debug("Text-Layer: %s", unique_text_layers)
+        geometry_log.debug("Beende process_dxf_data_frame")
     
     
-    def apply_analysis_results(self, analysis_results_df):
+    def apply_analysis_results(self, analysis_results_df, match_df=None):
         """
         Wendet die Analyseergebnisse auf die Geometriedaten an.
         Fügt Associated_Text, Associated_BlockName und Distance zu allen Geometrien hinzu.
+        match_df ist die Langformat-Treffertabelle aus AnalysisHandler.match_df und wird
+        für die Z-Analyse aufbewahrt.
         """
+        self.association_matches_df = match_df.copy() if match_df is not None else pd.DataFrame()
+
         if self.all_entities_df.empty:
-            print("WARNUNG: Keine Geometriedaten zum Anwenden der Analyseergebnisse.")
+            geometry_log.warning("Keine Geometriedaten zum Anwenden der Analyseergebnisse")
             # Dennoch die Spalten hinzufügen, um Konsistenz zu wahren
             self.all_entities_df['Associated_Text'] = ''
             self.all_entities_df['Associated_BlockName'] = ''
@@ -93,20 +113,20 @@ class GeometryManager:
                         enhanced_df.at[idx, 'Associated_BlockName'] = analysis_dict[geo_id]['Associated_BlockName']
                         enhanced_df.at[idx, 'Distance'] = analysis_dict[geo_id]['Distance']
                 
-                print(f"DEBUG GM: Analyseergebnisse angewendet. {len(analysis_dict)} Zuordnungen von {len(enhanced_df)} Geometrien.")
+                geometry_log.debug("Analyseergebnisse angewendet: %d Zuordnungen von %d Geometrien",
+                                   len(analysis_dict), len(enhanced_df))
             else:
-                print("DEBUG GM: Keine Analyseergebnisse zum Anwenden.")
+                geometry_log.debug("Keine Analyseergebnisse zum Anwenden")
             
             # Enhanced DataFrame als neuen Geometrie-DataFrame setzen
             self.all_entities_df = enhanced_df
+            self.association_texts = self._associated_texts_by_id(enhanced_df)
             self.analysis_results_applied = True
             
             return True
             
-        except Exception as e:
-            print(f"FEHLER beim Anwenden der Analyseergebnisse: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+        except Exception:
+            geometry_log.exception("Fehler beim Anwenden der Analyseergebnisse")
             return False
 
     def get_filtered_data(self, selected_layers=None, selected_entity_types=None):
@@ -160,10 +180,42 @@ class GeometryManager:
         """Gibt den DataFrame mit allen Geometrie-Entitäten zurück."""
         return self.all_entities_df
     
+    def get_topology(self):
+        """Gibt das Knoten-/Kantenmodell der aktuellen Geometrie zurück (neu aufgebaut nur bei geänderter Geometrie)."""
+        return self.topology.update(self.all_entities_df)
+
     def get_text_data(self):
         """Gibt den DataFrame mit allen Text-Entitäten zurück."""
         return self.text_df
 
+    def get_association_matches(self, geo_df=None):
+        """
+        Gibt die Langformat-Treffertabelle der zuletzt angewendeten Analyse zurück.
+        Stimmt Associated_Text in geo_df (sonst in den Geometriedaten) nicht mehr mit dem
+        Ergebnis dieser Analyse überein (z.B. nach Bearbeitung in der Tabelle), wird die
+        Tabelle verworfen und eine leere zurückgegeben; die Z-Analyse liest dann Associated_Text.
+        """
+        if self.association_matches_df.empty:
+            return self.association_matches_df
+        current = self._associated_texts_by_id(self.all_entities_df if geo_df is None else geo_df)
+        if not current.equals(self.association_texts.reindex(current.index)):
+            geometry_log.info("Associated_Text wurde seit der Analyse geändert, Treffertabelle verworfen")
+            self.reset_association_matches()
+        return self.association_matches_df
+
+    def reset_association_matches(self):
+        """Verwirft die Treffertabelle der letzten Analyse."""
+        self.association_matches_df = pd.DataFrame()
+        self.association_texts = pd.Series(dtype=object)
+
+    def _associated_texts_by_id(self, df):
+        """Associated_Text je ID (leer statt NaN, erste Zeile je ID)."""
+        if df is None or df.empty or 'ID' not in df.columns or 'Associated_Text' not in df.columns:
+            return pd.Series(dtype=object)
+        texts = pd.Series(df['Associated_Text'].fillna('').astype(str).to_numpy(dtype=object),
+                          index=df['ID'].astype(str).to_numpy())
+        return texts[~texts.index.duplicated()]
+
     def get_display_df(self):
         if self.all_entities_df.empty:
             return pd.DataFrame(columns=self.display_column_order if self.display_column_order else self._get_default_all_entities_columns())
@@ -193,10 +245,15 @@ class GeometryManager:
 
     def update_processed_df(self, modified_view_df_part: pd.DataFrame):
         id_col_to_use = self.id_column_name_in_all_entities_df # Sollte 'ID' sein
-        if not id_col_to_use: print("WARNUNG in update_processed_df: ID-Spalte für Updates nicht definiert.") ; return
+        if not id_col_to_use:
+            geometry_log.warning("update_processed_df: ID-Spalte für Updates nicht definiert")
+            return
         if id_col_to_use not in modified_view_df_part.columns or id_col_to_use not in self.all_entities_df.columns:
-            print(f"WARNUNG in update_processed_df: ID-Spalte '{id_col_to_use}' nicht konsistent.") ; return
-        if self.all_entities_df.empty: print("WARNUNG: update_processed_df - all_entities_df ist leer."); return
+            geometry_log.warning("update_processed_df: ID-Spalte '%s' nicht konsistent", id_col_to_use)
+            return
+        if self.all_entities_df.empty:
+            geometry_log.warning("update_processed_df: all_entities_df ist leer")
+            return
         try:
             # Wichtig: Stelle sicher, dass der Index des Master-DataFrames für das Update korrekt ist.
             # modified_view_df_part enthält nur einen Teil der Zeilen.
@@ -214,8 +271,8 @@ class GeometryManager:
             self.all_entities_df = temp_all_entities_indexed.reset_index(drop=True)
             
             # print(f"GM.update_processed_df: Master-DF aktualisiert via '{id_col_to_use}'.")
-        except Exception as e:
-            print(f"FEHLER in update_processed_df: {e}")
+        except Exception:
+            geometry_log.exception("Fehler in update_processed_df")
     
     def update_geometry_by_id(self, entity_id: str, updated_data: dict):
         """
@@ -230,7 +287,8 @@ class GeometryManager:
             # 1. Finde den korrekten Index im Master-DataFrame
             matching_indices = self.all_entities_df.index[self.all_entities_df['ID'] == entity_id].tolist()
             if not matching_indices:
-                print(f"DEBUG: ID '{entity_id}' nicht in all_entities_df gefunden.")
+                geometry_log.debug("ID '%s' nicht in all_entities_df gefunden", entity_id)
+                return False, None
             
             master_row_index = matching_indices[0]
 
@@ -251,11 +309,8 @@ class GeometryManager:
             final_updated_row = self.all_entities_df.loc[master_row_index]
             return True, final_updated_row
 
-        except Exception as e:
-            print(f"DEBUG: Fehler beim Aktualisieren der Geometrie mit ID '{entity_id}': {e}")
-
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            geometry_log.exception("Fehler beim Aktualisieren der Geometrie mit ID '%s'", entity_id)
             return False, None
 
 
@@ -263,144 +318,142 @@ class GeometryManager:
     def _recalculate_arc_points(self, row_index, row_data):
         """
         Berechnet abhängige Parameter für Bögen basierend auf geänderten StartZ/EndZ-Werten neu.
+        Für mehrere Bögen _recalculate_arc_points_batch verwenden.
+        """
+        self._recalculate_arc_points_batch([row_index])
+
+    def _recalculate_arc_points_batch(self, row_indices):
+        """
+        Berechnet CenterZ, Radius, Normale und Start-/Endwinkel für mehrere Bögen
+        (Indexwerte von all_entities_df) gesammelt neu (logic.arc_geometry.arc_parameters).
+        Bei kollinearen Bogenpunkten wird nur CenterZ aktualisiert.
         """
         try:
-            import math
-            from ezdxf.math import Vec3, OCS
-
-            center_x = float(row_data.get('CenterX', 0))
-            center_y = float(row_data.get('CenterY', 0))
-            start_x = float(row_data.get('StartX', 0))
-            start_y = float(row_data.get('StartY', 0))
-            end_x = float(row_data.get('EndX', 0))
-            end_y = float(row_data.get('EndY', 0))
-
-            start_z = row_data.get('StartZ')
-            end_z = row_data.get('EndZ')
-
-            actual_start_z = float(start_z) if pd.notna(start_z) else 0.0
-            actual_end_z = float(end_z) if pd.notna(end_z) else 0.0
-
-            # CenterZ als Durchschnitt von Start und Ende bestimmen
-            if pd.notna(start_z) and pd.notna(end_z):
-                new_center_z = (actual_start_z + actual_end_z) / 2.0
-            elif pd.notna(start_z):
-                new_center_z = actual_start_z
-            elif pd.notna(end_z):
-                new_center_z = actual_end_z
-            else:
-                old_center_z = row_data.get('CenterZ')
-                new_center_z = float(old_center_z) if pd.notna(old_center_z) else 0.0
+            row_indices = pd.Index(row_indices)
+            if row_indices.empty:
+                return
 
-            new_radius = math.sqrt((start_x - center_x)**2 + (start_y - center_y)**2)
+            columns = ['CenterX', 'CenterY', 'StartX', 'StartY', 'EndX', 'EndY']
+            arcs = self.all_entities_df.loc[row_indices].reindex(columns=columns + ['StartZ', 'EndZ', 'CenterZ'])
+            for column in columns:
+                if column not in self.all_entities_df.columns:
+                    arcs[column] = 0.0
+            xy = arcs[columns].to_numpy(dtype=float)
+
+            parameters = arc_parameters(
+                xy[:, 2:4], xy[:, 4:6], xy[:, 0:2],
+                pd.to_numeric(arcs['StartZ'], errors='coerce').to_numpy(dtype=float),
+                pd.to_numeric(arcs['EndZ'], errors='coerce').to_numpy(dtype=float),
+                pd.to_numeric(arcs['CenterZ'], errors='coerce').to_numpy(dtype=float)
+            )
+            collinear = parameters['collinear']
+            if collinear.any():
+                geometry_log.warning("Bogen-Punkte kollinear für Zeilen %s", list(row_indices[collinear]))
 
-            p_start = Vec3(start_x, start_y, actual_start_z)
-            p_end = Vec3(end_x, end_y, actual_end_z)
-            center = Vec3(center_x, center_y, new_center_z)
-            
-            # Die Vektoren für die Normalenberechnung müssen vom 3D-Mittelpunkt ausgehen.
-            v_center_to_start = p_start - center
-            v_center_to_end = p_end - center
-            # --- KORREKTUR ENDET HIER ---
-
-            new_normal = v_center_to_start.cross(v_center_to_end)
-            magnitude = new_normal.magnitude
-            if magnitude < 1e-9:
-                print(f"WARNUNG: Bogen-Punkte kollinear für Zeile {row_index}")
-                # In diesem Fall keine weiteren Parameter aktualisieren, nur CenterZ
-                self.all_entities_df.at[row_index, 'CenterZ'] = new_center_z
-                return
-            new_normal = new_normal.normalize()
-
-            ocs = OCS(new_normal)
-            ocs_start_vec = ocs.from_wcs(v_center_to_start)
-            ocs_end_vec = ocs.from_wcs(v_center_to_end)
-            new_start_angle = math.degrees(math.atan2(ocs_start_vec.y, ocs_start_vec.x))
-            new_end_angle = math.degrees(math.atan2(ocs_end_vec.y, ocs_end_vec.x))
-            if new_start_angle < 0: new_start_angle += 360
-            if new_end_angle < 0: new_end_angle += 360
-            
             # Alle abhängigen Werte im DataFrame aktualisieren
-            self.all_entities_df.at[row_index, 'CenterZ'] = new_center_z
-            self.all_entities_df.at[row_index, 'Radius'] = new_radius
-            self.all_entities_df.at[row_index, 'NormalX'] = new_normal.x
-            self.all_entities_df.at[row_index, 'NormalY'] = new_normal.y
-            self.all_entities_df.at[row_index, 'NormalZ'] = new_normal.z
-            self.all_entities_df.at[row_index, 'StartAngle'] = new_start_angle
-            self.all_entities_df.at[row_index, 'EndAngle'] = new_end_angle
-            print(f"DEBUG: Bogen-Parameter neu berechnet für Zeile {row_index}: R={new_radius:.4f}, CZ={new_center_z:.4f}")
-
-        except Exception as e:
-            print(f"DEBUG: Fehler beim Neuberechnen der Bogen-Parameter: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            self.all_entities_df.loc[row_indices, 'CenterZ'] = parameters['center_z']
+            rows = row_indices[~collinear]
+            normal = parameters['normal'][~collinear]
+            self.all_entities_df.loc[rows, 'Radius'] = parameters['radius'][~collinear]
+            self.all_entities_df.loc[rows, 'NormalX'] = normal[:, 0]
+            self.all_entities_df.loc[rows, 'NormalY'] = normal[:, 1]
+            self.all_entities_df.loc[rows, 'NormalZ'] = normal[:, 2]
+            self.all_entities_df.loc[rows, 'StartAngle'] = parameters['start_angle'][~collinear]
+            self.all_entities_df.loc[rows, 'EndAngle'] = parameters['end_angle'][~collinear]
+            geometry_log.debug("Bogen-Parameter neu berechnet für %d von %d Zeilen", len(rows), len(row_indices))
+
+        except Exception:
+            geometry_log.exception("Fehler beim Neuberechnen der Bogen-Parameter")
+
+    def update_arc_heights_by_id(self, entity_ids, start_z, end_z):
+        """
+        Setzt StartZ/EndZ für mehrere Bögen (je ID die erste passende Zeile) und berechnet
+        deren Parameter gesammelt neu.
+        Gibt die aktualisierten Zeilen in Reihenfolge der gefundenen IDs zurück.
+        """
+        if self.all_entities_df.empty:
+            return pd.DataFrame()
+
+        ids = self.all_entities_df['ID']
+        first_rows = pd.Series(self.all_entities_df.index[~ids.duplicated()], index=ids[~ids.duplicated()])
+        row_indices = pd.Index(first_rows.reindex(entity_ids))
+        found = row_indices.notna()
+        missing = [entity_id for entity_id, is_found in zip(entity_ids, found) if not is_found]
+        if missing:
+            geometry_log.warning("%d IDs nicht in all_entities_df gefunden: %s", len(missing), missing[:20])
+        row_indices = pd.Index(row_indices[found].to_numpy(dtype=self.all_entities_df.index.dtype))
+
+        self.all_entities_df.loc[row_indices, 'StartZ'] = np.asarray(start_z)[found]
+        self.all_entities_df.loc[row_indices, 'EndZ'] = np.asarray(end_z)[found]
+        arcs = row_indices[self.all_entities_df.loc[row_indices, 'EntityType'].astype(str).str.upper().to_numpy() == 'ARC']
+        self._recalculate_arc_points_batch(arcs)
+        return self.all_entities_df.loc[row_indices]
 
     def update_z_coordinates(self, updated_df):
         """Aktualisiert die Z-Koordinaten und berechnet ARC-Parameter neu."""
         try:
-            print("DEBUG GM: Starte Z-Koordinaten-Update...")
-            
-            # Merge die Z-Koordinaten basierend auf der ID
-            if 'ID' not in self.all_entities_df.columns or 'ID' not in updated_df.columns:
-                raise ValueError("Beide DataFrames müssen ID-Spalten haben")
-            
-            # Spalten, die aktualisiert werden sollen
-            z_columns = ['StartZ', 'EndZ', 'CenterZ']
-            status_columns = [col for col in updated_df.columns if col.endswith('_Status')]
-            update_columns = z_columns + status_columns
-            
-            # Filtere nur verfügbare Spalten
-            available_columns = [col for col in update_columns if col in updated_df.columns]
-            
-            if not available_columns:
-                print("DEBUG GM: Keine Z-Spalten zum Update gefunden")
-                return
-            
-            # Aktualisiere Zeile für Zeile basierend auf ID
-            updates_applied = 0
-            arcs_to_recalculate = []
-            
-            for _, updated_row in updated_df.iterrows():
-                updated_id = updated_row['ID']
+            with PipelineStage(geometry_log, 'Z-Koordinaten-Update') as stage:
+                # Merge die Z-Koordinaten basierend auf der ID
+                if 'ID' not in self.all_entities_df.columns or 'ID' not in updated_df.columns:
+                    raise ValueError("Beide DataFrames müssen ID-Spalten haben")
                 
-                # Finde entsprechende Zeile in all_entities_df
-                mask = self.all_entities_df['ID'] == updated_id
-                matching_indices = self.all_entities_df.index[mask]
+                # Spalten, die aktualisiert werden sollen
+                z_columns = ['StartZ', 'EndZ', 'CenterZ']
+                status_columns = [col for col in updated_df.columns if col.endswith('_Status')]
+                update_columns = z_columns + status_columns
                 
-                if len(matching_indices) == 0:
-                    print(f"WARNING: ID '{updated_id}' not found in all_entities_df. Skipping row.")
-                    continue
-                idx = matching_indices[0]  # Nimm die erste Übereinstimmung
+                # Filtere nur verfügbare Spalten
+                available_columns = [col for col in update_columns if col in updated_df.columns]
                 
-                # Aktualisiere verfügbare Spalten
-                for col in available_columns:
-                    if col in updated_row and pd.notna(updated_row[col]):
-                        old_value = self.all_entities_df.at[idx, col] if col in self.all_entities_df.columns else "N/A"
-                        self.all_entities_df.at[idx, col] = updated_row[col]
-                        print(f"DEBUG GM: ID {updated_id}, {col}: {old_value} -> {updated_row[col]}")
+                if not available_columns:
+                    geometry_log.warning("Keine Z-Spalten zum Update gefunden")
+                    return
                 
-                # Prüfe, ob es sich um einen ARC handelt
-                if self.all_entities_df.at[idx, 'EntityType'] == 'ARC':
-                    # Prüfe, ob StartZ oder EndZ definiert sind
-                    has_start_z = pd.notna(self.all_entities_df.at[idx, 'StartZ'])
-                    has_end_z = pd.notna(self.all_entities_df.at[idx, 'EndZ'])
+                # Aktualisiere Zeile für Zeile basierend auf ID
+                arcs_to_recalculate = []
+                
+                for _, updated_row in updated_df.iterrows():
+                    updated_id = updated_row['ID']
+                    
+                    # Finde entsprechende Zeile in all_entities_df
+                    mask = self.all_entities_df['ID'] == updated_id
+                    matching_indices = self.all_entities_df.index[mask]
                     
-                    if has_start_z or has_end_z:
-                        arcs_to_recalculate.append(idx)
+                    if len(matching_indices) == 0:
+                        geometry_log.debug("ID '%s' not found in all_entities_df. Skipping row.", updated_id)
+                        stage.count('IDs nicht gefunden')
+                        continue
+                    idx = matching_indices[0]  # Nimm die erste Übereinstimmung
+                    
+                    # Aktualisiere verfügbare Spalten
+                    for col in available_columns:
+                        if col in updated_row and pd.notna(updated_row[col]):
+                            if geometry_log.isEnabledFor(logging.DEBUG):
+                                old_value = self.all_entities_df.at[idx, col] if col in self.all_entities_df.columns else "N/A"
+                                geometry_log.debug("ID %s, %s: %s -> %s", updated_id, col, old_value, updated_row[col])
+                            self.all_entities_df.at[idx, col] = updated_row[col]
+                            stage.count('Werte geändert')
+                    
+                    # Prüfe, ob es sich um einen ARC handelt
+                    if self.all_entities_df.at[idx, 'EntityType'] == 'ARC':
+                        # Prüfe, ob StartZ oder EndZ definiert sind
+                        has_start_z = pd.notna(self.all_entities_df.at[idx, 'StartZ'])
+                        has_end_z = pd.notna(self.all_entities_df.at[idx, 'EndZ'])
+                        
+                        if has_start_z or has_end_z:
+                            arcs_to_recalculate.append(idx)
+                    
+                    stage.count('Zeilen aktualisiert')
                 
-                updates_applied += 1
-            
-            # Berechne ARC-Parameter neu
-            for idx in arcs_to_recalculate:
-                arc_row = self.all_entities_df.iloc[idx]
-                self._recalculate_arc_points(idx, arc_row)
+                # Berechne ARC-Parameter gesammelt neu
+                self._recalculate_arc_points_batch(arcs_to_recalculate)
+                stage.count('ARC-Parameter neu berechnet', len(arcs_to_recalculate))
             
-            print(f"DEBUG GM: {updates_applied} Zeilen aktualisiert, {len(arcs_to_recalculate)} ARC-Parameter neu berechnet")
+            if stage.counters.get('IDs nicht gefunden'):
+                geometry_log.warning("%d IDs nicht in all_entities_df gefunden", stage.counters['IDs nicht gefunden'])
             
-        except Exception as e:
-            print(f"DEBUG GM: Fehler beim Z-Koordinaten-Update: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+        except Exception:
+            geometry_log.exception("Fehler beim Z-Koordinaten-Update")
             
     def get_updated_dataframe(self):
         """Gibt den aktuellen DataFrame mit allen Änderungen zurück."""
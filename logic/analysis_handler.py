@@ -1,6 +1,61 @@
+import json
+import os
+import shutil
+import hashlib
+import tempfile
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from scipy.spatial import cKDTree
+from logic.distance_kernels import point_to_segment_dist_2d, point_to_arc_dist_2d
+from logic.pipeline_logging import get_logger
+
+association_log = get_logger('association')
+
+# Spalten der Langformat-Treffertabelle (ein Eintrag pro Geometrie-Text-Paar).
+# TextRow ist der Index-Wert der Zeile im übergebenen text_df.
+MATCH_COLUMNS = ['GeometryID', 'TextRow', 'TextID', 'Text', 'TextBlockName', 'TextX', 'TextY', 'Distance']
+
+# Zuordnungsmodi: 'all' = jede Geometrie in Reichweite, 'nearest' = nur die nächste Geometrie je Text
+ASSIGNMENT_MODES = ('all', 'nearest')
+
+# Blockgröße für die Kandidatensuche (Fortschrittsmeldung und Abbruch zwischen den Blöcken)
+ASSOCIATION_CHUNK_SIZE = 5000
+
+# Out-of-Core-Zuordnung: Standard-Speicherbudget und geschätzter Bedarf je Text im Arbeitsblock
+# (Koordinaten, Zeilennummer, k-d-Baum und Kandidatenlisten)
+OUT_OF_CORE_BUDGET_MB = 512
+OUT_OF_CORE_BYTES_PER_TEXT = 128
+
+# Maximale Anzahl zwischengespeicherter Analyse-Ergebnisse (LRU, im Speicher und auf der Festplatte)
+RESULT_CACHE_SIZE = 16
+
+# Ablage des Ergebnis-Caches auf der Festplatte nur auf Wunsch: Umgebungsvariable mit einem
+# Verzeichnis (z.B. im Projektordner) oder '1' für das Benutzerverzeichnis DEFAULT_CACHE_DIR.
+# Je Eintrag eine JSON-Datei (beim Laden wird kein Code ausgeführt).
+CACHE_ENVIRONMENT = 'DXF_VIEWER_ASSOCIATION_CACHE'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'dxf_viewer', 'associations')
+CACHE_FORMAT_VERSION = 2
+
+# Spalten, die in den Fingerabdruck der Eingabedaten eingehen
+FINGERPRINT_GEO_COLUMNS = ['ID', 'EntityType', 'Layer', 'StartX', 'StartY', 'EndX', 'EndY',
+                           'CenterX', 'CenterY', 'Radius', 'StartAngle', 'EndAngle', 'NormalZ']
+FINGERPRINT_TEXT_COLUMNS = ['ID', 'Layer', 'Text', 'BlockName', 'InsertX', 'InsertY', 'Rotation',
+                            'BoxCenterX', 'BoxCenterY', 'BoxHalfWidth', 'BoxHalfHeight']
+
+def association_cache_dir():
+    """Cache-Verzeichnis aus CACHE_ENVIRONMENT; None, wenn die Ablage nicht aktiviert ist."""
+    value = os.environ.get(CACHE_ENVIRONMENT, '').strip()
+    if value.lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    if value.lower() in ('1', 'true', 'yes', 'on'):
+        return DEFAULT_CACHE_DIR
+    return os.path.expanduser(value)
+
+
+class AnalysisCancelled(Exception):
+    """Wird ausgelöst, wenn eine laufende Zuordnung über cancel_check abgebrochen wurde."""
+
 
 class AnalysisHandler:
     """
@@ -8,6 +63,16 @@ class AnalysisHandler:
     Uses a k-d tree for efficient spatial search.
     """
 
+    def __init__(self):
+        # Langformat-Treffertabelle der letzten find_associations-Ausführung
+        self.match_df = pd.DataFrame(columns=MATCH_COLUMNS)
+        # Layer-Paar-Regeln: Text-Layer -> erlaubte Geometrie-Layer
+        self.layer_rules = {}
+        # Ergebnis-Cache: Fingerabdruck -> (Anzeige-Tabelle, Treffertabelle), LRU-Reihenfolge
+        self.result_cache = OrderedDict()
+        self.result_cache_size = RESULT_CACHE_SIZE
+        self.cache_dir = None
+
 
     def analyze_text_geometry_proximity(self, geo_df: pd.DataFrame, text_df: pd.DataFrame, radius: float):
         """
@@ -56,134 +121,952 @@ class AnalysisHandler:
             print(f"DEBUG AnalysisHandler Fehler: {e}")
             raise e
 
-    def find_associations(self, geo_df: pd.DataFrame, text_df: pd.DataFrame, search_radius: float, line_offset: float):
+    def set_layer_rules(self, rules_string):
+        """
+        Setzt die Layer-Paar-Regeln für die Zuordnung.
+        rules_string: z.B. "KANAL_BESCHRIFTUNG=KANAL; SCHACHT_TXT=SCHACHT,SCHACHT_ALT"
+        (Text-Layer = erlaubte Geometrie-Layer). Leerer String hebt alle Regeln auf.
+        """
+        self.layer_rules = self.parse_layer_rules(rules_string)
+        if self.layer_rules:
+            association_log.info("📋 Layer-Regeln gesetzt: %s", self.layer_rules)
+        return self.layer_rules
+
+    @staticmethod
+    def parse_layer_rules(rules_string):
+        """Parst Layer-Paar-Regeln in ein dict Text-Layer -> Menge erlaubter Geometrie-Layer."""
+        rules = {}
+        if not rules_string or not rules_string.strip():
+            return rules
+        for rule in rules_string.split(';'):
+            if '=' not in rule:
+                continue
+            text_layer, geo_layers = rule.split('=', 1)
+            text_layer = text_layer.strip()
+            allowed = {layer.strip() for layer in geo_layers.split(',') if layer.strip()}
+            if text_layer and allowed:
+                rules.setdefault(text_layer, set()).update(allowed)
+        return rules
+
+    def find_associations(self, geo_df: pd.DataFrame, text_df: pd.DataFrame, search_radius: float, line_offset: float,
+                          layer_rules=None, assignment_mode='all', max_texts_per_geometry=None,
+                          progress_callback=None, cancel_check=None):
         """
         Findet Zuordnungen zwischen Geometrie- und Text-Entitäten.
         Suche erfolgt nur in der X-Y-Ebene (Z-Koordinaten werden ignoriert).
+
+        Neben der Anzeige-Tabelle (ein Eintrag pro Geometrie mit zusammengefügtem
+        Text) wird in self.match_df eine Langformat-Tabelle mit einem Eintrag pro
+        Geometrie-Text-Treffer abgelegt (siehe MATCH_COLUMNS).
+
+        layer_rules: dict Text-Layer -> erlaubte Geometrie-Layer (Standard: self.layer_rules).
+        Texte auf Layern mit Regel werden nur den erlaubten Geometrie-Layern zugeordnet,
+        Texte auf Layern ohne Regel allen Geometrien.
+
+        assignment_mode: 'all' ordnet einen Text jeder Geometrie in Reichweite zu,
+        'nearest' nur der nächstgelegenen Geometrie. Mit max_texts_per_geometry
+        nimmt jede Geometrie im Modus 'nearest' höchstens so viele Texte auf;
+        überzählige Texte gehen an ihre nächste freie Geometrie.
+
+        Ergebnisse werden über einen Fingerabdruck der Eingabedaten und Parameter
+        zwischengespeichert; eine erneute Analyse derselben Auswahl kommt aus dem Cache.
+
+        progress_callback(erledigt, gesamt) wird nach jedem Block aufgerufen (Einheit:
+        Geometrien, im Modus 'nearest' Texte). Liefert cancel_check() True, wird mit
+        AnalysisCancelled abgebrochen; Teilergebnisse werden verworfen.
         """
+        self.match_df = pd.DataFrame(columns=MATCH_COLUMNS)
         if geo_df.empty or text_df.empty:
             return pd.DataFrame()
-        
-        associations = []
-        
-        # Text-Positionen für k-d-Baum vorbereiten (nur X,Y - Z wird ignoriert)
-        text_positions = np.column_stack([
-            text_df['InsertX'].astype(float),
-            text_df['InsertY'].astype(float)
-        ])
-        
-        # k-d-Baum für 2D-Suche erstellen
-        text_tree = cKDTree(text_positions)
-        
-        for geo_idx, geo_row in geo_df.iterrows():
-            geo_type = geo_row['EntityType'].upper()
-            
-            found_matches = []
-
-            if geo_type == 'CIRCLE':
-                # Kreismittelpunkt (nur X,Y)
-                center = np.array([geo_row['CenterX'], geo_row['CenterY']])
-                radius = geo_row['Radius']
-                
-                # Suche in erweitertem Radius
-                query_radius = radius + search_radius
-                indices = text_tree.query_ball_point(center, r=query_radius)
-                
-                for text_idx in indices:
-                    # 2D-Distanz berechnen
-                    text_pos_2d = text_positions[text_idx]
-                    dist_to_center = np.linalg.norm(text_pos_2d - center)
-                    
-                    # Abstand zum Kreisrand
-                    dist = abs(dist_to_center - radius)
-                    
-                    if dist <= search_radius:
-                        text = text_df.iat[text_idx, text_df.columns.get_loc('Text')]
-                        blockname = text_df.iat[text_idx, text_df.columns.get_loc('BlockName')]
-                        text_with_coords = f"{text} [{text_pos_2d[0]:.2f}, {text_pos_2d[1]:.2f}]"
-                        found_matches.append({'text': text_with_coords, 'blockname': blockname, 'distance': dist})
-                        
-            elif geo_type == 'ARC':
-                # Arc-Mittelpunkt (nur X,Y)
-                center = np.array([geo_row['CenterX'], geo_row['CenterY']])
-                radius = geo_row['Radius']
-                
-                query_radius = radius + search_radius
-                indices = text_tree.query_ball_point(center, r=query_radius)
-                
-                for text_idx in indices:
-                    text_pos_2d = text_positions[text_idx]
-                    dist_to_center = np.linalg.norm(text_pos_2d - center)
-                    dist = abs(dist_to_center - radius)
-                    
-                    if dist <= search_radius:
-                        text = text_df.iat[text_idx, text_df.columns.get_loc('Text')]
-                        blockname = text_df.iat[text_idx, text_df.columns.get_loc('BlockName')]
-                        text_with_coords = f"{text} [{text_pos_2d[0]:.2f}, {text_pos_2d[1]:.2f}]"
-                        found_matches.append({'text': text_with_coords, 'blockname': blockname, 'distance': dist})
-                        
-            elif geo_type == 'LINE':
-                # Linienpunkte (nur X,Y)
-                p_start = np.array([geo_row['StartX'], geo_row['StartY']])
-                p_end = np.array([geo_row['EndX'], geo_row['EndY']])
-                line_midpoint = (p_start + p_end) / 2
-                line_length = np.linalg.norm(p_start - p_end)
-                
-                query_radius = (line_length / 2) + line_offset
-                indices = text_tree.query_ball_point(line_midpoint, r=query_radius)
-                
-                for text_idx in indices:
-                    # 2D-Abstand zur Linie berechnen
-                    text_pos_2d = text_positions[text_idx]
-                    dist = self._point_to_line_segment_dist_2d(text_pos_2d, p_start, p_end)
-                    
-                    if dist <= line_offset:
-                        text = text_df.iat[text_idx, text_df.columns.get_loc('Text')]
-                        blockname = text_df.iat[text_idx, text_df.columns.get_loc('BlockName')]
-                        text_with_coords = f"{text} [{text_pos_2d[0]:.2f}, {text_pos_2d[1]:.2f}]"
-                        found_matches.append({'text': text_with_coords, 'blockname': blockname, 'distance': dist})
-            
-            # Zuordnung hinzufügen, wenn gefunden
-            if found_matches:
-                # Nach Distanz sortieren, um die kleinste für die Ausgabe zu erhalten
-                found_matches.sort(key=lambda x: x['distance'])
-                
-                min_distance = found_matches[0]['distance']
-                
-                # Eindeutige Texte und Blocknamen sammeln
-                unique_texts = sorted(list(set(match['text'] for match in found_matches)))
-                unique_blocknames = sorted(list(set(str(match['blockname']) for match in found_matches if pd.notna(match['blockname']))))
-
-                all_texts = "; ".join(unique_texts)
-                all_blocknames = "; ".join(unique_blocknames)
-
-                associations.append({
-                    'GeometryID': geo_row['ID'],
-                    'GeometryType': geo_type,
-                    'GeometryLayer': geo_row['Layer'],
-                    'AssociatedText': all_texts,
-                    'TextBlockName': all_blocknames,
-                    'Distance': round(min_distance, 4)
-                })
-        
-        return pd.DataFrame(associations)
-
-    def _point_to_line_segment_dist_2d(self, p, a, b):
-        """Berechnet den 2D-Abstand von einem Punkt zu einem Liniensegment."""
-        # Konvertiere zu 2D-Arrays falls nötig
-        p = np.array(p[:2]) if len(p) > 2 else np.array(p)
-        a = np.array(a[:2]) if len(a) > 2 else np.array(a)
-        b = np.array(b[:2]) if len(b) > 2 else np.array(b)
-        
-        if np.array_equal(a, b):
-            return np.linalg.norm(p - a)
-        
-        line_vec = b - a
-        p_vec = p - a
-        line_len_sq = np.dot(line_vec, line_vec)
-        
-        t = np.dot(p_vec, line_vec) / line_len_sq
-        t = np.clip(t, 0.0, 1.0)
-        
-        nearest_point = a + t * line_vec
-        return np.linalg.norm(p - nearest_point)
\ No newline at end of file
+
+        if layer_rules is None:
+            layer_rules = self.layer_rules
+        if assignment_mode not in ASSIGNMENT_MODES:
+            raise ValueError(f"Unbekannter Zuordnungsmodus: {assignment_mode}")
+
+        cache_key = self.fingerprint(geo_df, text_df, search_radius, line_offset,
+                                     layer_rules, assignment_mode, max_texts_per_geometry)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            result_df, match_df = cached
+            association_log.info("📦 Zuordnungen aus Cache: %d Geometrien", len(result_df))
+            self.match_df = match_df.copy()
+            return result_df.copy()
+
+        result_df = self._compute_associations(geo_df, text_df, search_radius, line_offset,
+                                               layer_rules, assignment_mode, max_texts_per_geometry,
+                                               progress_callback, cancel_check)
+        self._cache_store(cache_key, result_df, self.match_df)
+        return result_df
+
+    def _compute_associations(self, geo_df, text_df, search_radius, line_offset,
+                              layer_rules, assignment_mode, max_texts_per_geometry,
+                              progress_callback=None, cancel_check=None):
+        """Eigentliche Zuordnung ohne Cache (Parameter siehe find_associations)."""
+        # Text-Boxen (nur X,Y - Z wird ignoriert); gesucht wird mit den Box-Mittelpunkten
+        texts = self._prepare_texts(text_df)
+        text_positions = texts['positions']
+        text_layers = text_df['Layer'].to_numpy() if 'Layer' in text_df.columns else np.full(len(text_df), '0', dtype=object)
+
+        geometry = self._prepare_geometry(geo_df, search_radius, line_offset)
+        if geometry is None:
+            return pd.DataFrame()
+
+        # Blockweise Kandidatensuche: im Modus 'all' über die Geometrien,
+        # im Modus 'nearest' über die Texte (Fortschritt in derselben Einheit)
+        if assignment_mode == 'nearest':
+            geometry_trees = self._build_geometry_trees(geometry)
+            total = len(text_positions)
+        else:
+            text_trees = self._build_text_trees(geometry, text_positions, text_layers, layer_rules, texts['extent'])
+            total = len(geometry['rows'])
+
+        geo_pos_parts, text_idx_parts, dist_parts = [], [], []
+        for chunk_start in range(0, total, ASSOCIATION_CHUNK_SIZE):
+            if cancel_check is not None and cancel_check():
+                raise AnalysisCancelled("Analyse abgebrochen")
+            chunk = np.arange(chunk_start, min(chunk_start + ASSOCIATION_CHUNK_SIZE, total))
+
+            if assignment_mode == 'nearest':
+                geo_pos, text_idx = self._reverse_candidates(geometry, geometry_trees, text_positions, chunk,
+                                                             text_layers, layer_rules, texts['extent'])
+            else:
+                geo_pos, text_idx = self._forward_candidates(geometry, chunk, text_trees)
+
+            # Exakte Abstände je Geometrietyp in einem Durchlauf
+            dist = self._candidate_distances(geometry, geo_pos, texts, text_idx)
+            hit = dist <= geometry['thresholds'][geo_pos]
+            geo_pos_parts.append(geo_pos[hit])
+            text_idx_parts.append(text_idx[hit])
+            dist_parts.append(dist[hit])
+
+            if progress_callback is not None:
+                progress_callback(int(chunk[-1]) + 1, total)
+
+        geo_pos = np.concatenate(geo_pos_parts)
+        text_idx = np.concatenate(text_idx_parts)
+        dist = np.concatenate(dist_parts)
+
+        if assignment_mode == 'nearest':
+            keep = self._assign_nearest(geo_pos, text_idx, dist, len(geometry['rows']), max_texts_per_geometry)
+            geo_pos, text_idx, dist = geo_pos[keep], text_idx[keep], dist[keep]
+        if len(geo_pos) == 0:
+            return pd.DataFrame()
+
+        return self._build_results(geo_df, text_df, geometry, geo_pos, text_idx, dist, text_positions)
+
+    def find_associations_out_of_core(self, geo_df: pd.DataFrame, text_coords, search_radius: float, line_offset: float,
+                                      text_labels=None, assignment_mode='all', max_texts_per_geometry=None,
+                                      memory_budget_mb=OUT_OF_CORE_BUDGET_MB, work_dir=None,
+                                      progress_callback=None, cancel_check=None):
+        """
+        Zuordnung für Textmengen, die nicht in den Arbeitsspeicher passen.
+
+        text_coords: Pfad zu einer .npy-Datei (oder Array/Memmap) der Form (n, 2) mit den
+        Text-Positionen, z.B. aus DXFParser.export_text_arrays. text_labels optional:
+        Pfad/Array mit den Texten in derselben Reihenfolge (nur für die Ergebnis-Tabellen).
+
+        Die Texte werden in zwei Durchläufen blockweise gelesen und per Counting Sort in
+        eine nach räumlichen Buckets sortierte Temporärdatei geschrieben. Je Bucket wird
+        ein k-d-Baum gebaut und mit den Suchkreisen der überlappenden Geometrien abgefragt.
+        Die Bucket-Größe richtet sich nach memory_budget_mb; übervolle Buckets werden in
+        Teilblöcken verarbeitet. Jeder Text liegt in genau einem Bucket, es entstehen also
+        keine doppelten Treffer.
+
+        Layer-Regeln werden hier nicht ausgewertet (keine Text-Layer in den Arrays).
+        Rückgabe und self.match_df wie bei find_associations (TextRow = Zeile im Array).
+        """
+        self.match_df = pd.DataFrame(columns=MATCH_COLUMNS)
+        if assignment_mode not in ASSIGNMENT_MODES:
+            raise ValueError(f"Unbekannter Zuordnungsmodus: {assignment_mode}")
+
+        coords = np.load(text_coords, mmap_mode='r') if isinstance(text_coords, (str, os.PathLike)) else text_coords
+        if isinstance(text_labels, (str, os.PathLike)):
+            text_labels = np.load(text_labels, mmap_mode='r')
+        text_count = len(coords)
+        if geo_df.empty or text_count == 0:
+            return pd.DataFrame()
+
+        geometry = self._prepare_geometry(geo_df, search_radius, line_offset)
+        if geometry is None:
+            return pd.DataFrame()
+
+        budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        block_rows = max(1, budget_bytes // OUT_OF_CORE_BYTES_PER_TEXT)
+        association_log.info("📦 Out-of-Core-Zuordnung: %d Texte, %d Geometrien, Budget %s MB (%d Texte je Block)",
+                             text_count, len(geometry['rows']), memory_budget_mb, block_rows)
+
+        own_work_dir = work_dir is None
+        work_dir = tempfile.mkdtemp(prefix='association_') if own_work_dir else work_dir
+        try:
+            grid = self._text_bucket_grid(coords, block_rows)
+            if grid is None:
+                return pd.DataFrame()
+            sorted_xy, sorted_rows, bucket_offsets = self._sort_texts_by_bucket(coords, grid, block_rows, work_dir)
+            geo_pos, text_rows, dist = self._query_buckets(
+                geometry, grid, sorted_xy, sorted_rows, bucket_offsets, block_rows, progress_callback, cancel_check
+            )
+            del sorted_xy, sorted_rows
+        finally:
+            if own_work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        if assignment_mode == 'nearest':
+            keep = self._assign_nearest(geo_pos, text_rows, dist, len(geometry['rows']), max_texts_per_geometry)
+            geo_pos, text_rows, dist = geo_pos[keep], text_rows[keep], dist[keep]
+        if len(geo_pos) == 0:
+            return pd.DataFrame()
+
+        # Nur die getroffenen Texte als kleine Tabelle laden
+        hit_rows, text_idx = np.unique(text_rows, return_inverse=True)
+        hit_xy = np.asarray(coords[hit_rows], dtype=float)
+        text_df = pd.DataFrame({
+            'ID': hit_rows,
+            'Text': np.asarray(text_labels[hit_rows]).astype(str) if text_labels is not None else '',
+            'InsertX': hit_xy[:, 0],
+            'InsertY': hit_xy[:, 1]
+        }, index=hit_rows)
+        association_log.info("✅ Out-of-Core-Zuordnung: %d Treffer", len(geo_pos))
+        return self._build_results(geo_df, text_df, geometry, geo_pos, text_idx.ravel(), dist)
+
+    def _text_bucket_grid(self, coords, block_rows):
+        """
+        Legt das Bucket-Raster fest: Ausdehnung in einem Durchlauf über die Blöcke,
+        Rastergröße so, dass ein Bucket bei gleichmäßiger Verteilung etwa einen Block füllt.
+        """
+        lower = np.array([np.inf, np.inf])
+        upper = np.array([-np.inf, -np.inf])
+        for block_start in range(0, len(coords), block_rows):
+            block = np.asarray(coords[block_start:block_start + block_rows], dtype=float)
+            if np.isfinite(block).all(axis=1).any():
+                lower = np.fmin(lower, np.nanmin(block, axis=0))
+                upper = np.fmax(upper, np.nanmax(block, axis=0))
+        if not np.isfinite(lower).all():
+            return None
+
+        extent = np.maximum(upper - lower, 1e-9)
+        bucket_target = max(1, int(np.ceil(len(coords) / block_rows)))
+        columns = max(1, int(np.ceil(np.sqrt(bucket_target * extent[0] / extent[1]))))
+        rows = max(1, int(np.ceil(bucket_target / columns)))
+        return {
+            'origin': lower,
+            'cell': extent / np.array([columns, rows]) * (1 + 1e-12),
+            'shape': (columns, rows)
+        }
+
+    def _bucket_of(self, xy, grid):
+        """Bucket-Nummer je Punkt (-1 für ungültige Koordinaten)."""
+        columns, rows = grid['shape']
+        cell = np.floor((xy - grid['origin']) / grid['cell'])
+        valid = np.isfinite(cell).all(axis=1)
+        cell = np.where(valid[:, None], cell, 0).astype(np.int64)
+        cell[:, 0] = np.clip(cell[:, 0], 0, columns - 1)
+        cell[:, 1] = np.clip(cell[:, 1], 0, rows - 1)
+        return np.where(valid, cell[:, 1] * columns + cell[:, 0], -1)
+
+    def _sort_texts_by_bucket(self, coords, grid, block_rows, work_dir):
+        """
+        Counting Sort der Texte nach Bucket in Temporärdateien (Memmaps):
+        1. Durchlauf zählt die Texte je Bucket, 2. Durchlauf schreibt sie an ihre Position.
+        Rückgabe: (Koordinaten, ursprüngliche Zeilen, Bucket-Offsets).
+        """
+        bucket_count = grid['shape'][0] * grid['shape'][1]
+        counts = np.zeros(bucket_count, dtype=np.int64)
+        for block_start in range(0, len(coords), block_rows):
+            buckets = self._bucket_of(np.asarray(coords[block_start:block_start + block_rows], dtype=float), grid)
+            counts += np.bincount(buckets[buckets >= 0], minlength=bucket_count)
+        bucket_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        valid_count = int(bucket_offsets[-1])
+        sorted_xy = np.lib.format.open_memmap(os.path.join(work_dir, 'text_xy_sorted.npy'), mode='w+',
+                                              dtype=np.float64, shape=(max(valid_count, 1), 2))
+        sorted_rows = np.lib.format.open_memmap(os.path.join(work_dir, 'text_rows_sorted.npy'), mode='w+',
+                                                dtype=np.int64, shape=(max(valid_count, 1),))
+
+        cursor = bucket_offsets[:-1].copy()
+        for block_start in range(0, len(coords), block_rows):
+            block = np.asarray(coords[block_start:block_start + block_rows], dtype=float)
+            buckets = self._bucket_of(block, grid)
+            valid = np.flatnonzero(buckets >= 0)
+            order = valid[np.argsort(buckets[valid], kind='stable')]
+            block_buckets = buckets[order]
+
+            # Zielposition: bisheriger Füllstand des Buckets + Rang innerhalb des Blocks
+            present, first, per_bucket = np.unique(block_buckets, return_index=True, return_counts=True)
+            rank = np.arange(len(order)) - np.repeat(first, per_bucket)
+            target = cursor[block_buckets] + rank
+            sorted_xy[target] = block[order]
+            sorted_rows[target] = block_start + order
+            cursor[present] += per_bucket
+
+        sorted_xy.flush()
+        sorted_rows.flush()
+        return sorted_xy, sorted_rows, bucket_offsets
+
+    def _query_buckets(self, geometry, grid, sorted_xy, sorted_rows, bucket_offsets, block_rows,
+                       progress_callback=None, cancel_check=None):
+        """
+        Fragt je Bucket einen k-d-Baum über dessen Texte mit den überlappenden Geometrien ab.
+        Rückgabe: (Geometrie-Positionen, Text-Zeilen, Abstände) der Treffer.
+        """
+        columns, rows = grid['shape']
+        centers = geometry['query_centers']
+        radii = geometry['query_radii']
+
+        # Geometrien auf alle Buckets verteilen, die ihr Suchkreis überlappt
+        low = np.floor((centers - radii[:, None] - grid['origin']) / grid['cell']).astype(np.int64)
+        high = np.floor((centers + radii[:, None] - grid['origin']) / grid['cell']).astype(np.int64)
+        low = np.maximum(low, 0)
+        high = np.minimum(high, np.array([columns - 1, rows - 1]))
+        span = np.maximum(high - low + 1, 0)
+        per_geometry = span[:, 0] * span[:, 1]
+        geo_of_entry = np.repeat(np.arange(len(centers)), per_geometry)
+        local = np.arange(per_geometry.sum()) - np.repeat(np.cumsum(per_geometry) - per_geometry, per_geometry)
+        entry_x = low[geo_of_entry, 0] + local % span[geo_of_entry, 0]
+        entry_y = low[geo_of_entry, 1] + local // span[geo_of_entry, 0]
+        entry_bucket = entry_y * columns + entry_x
+        order = np.argsort(entry_bucket, kind='stable')
+        entry_bucket, geo_of_entry = entry_bucket[order], geo_of_entry[order]
+        buckets, first, per_bucket = np.unique(entry_bucket, return_index=True, return_counts=True)
+
+        geo_pos_parts, text_row_parts, dist_parts = [], [], []
+        for done, (bucket, start, count) in enumerate(zip(buckets, first, per_bucket), 1):
+            if cancel_check is not None and cancel_check():
+                raise AnalysisCancelled("Analyse abgebrochen")
+            geo_subset = geo_of_entry[start:start + count]
+
+            # Übervolle Buckets in Teilblöcken innerhalb des Budgets verarbeiten
+            for block_start in range(bucket_offsets[bucket], bucket_offsets[bucket + 1], block_rows):
+                block_end = min(block_start + block_rows, bucket_offsets[bucket + 1])
+                points = np.asarray(sorted_xy[block_start:block_end])
+                geo_pos, text_idx = self._query_candidates(cKDTree(points), centers[geo_subset], radii[geo_subset])
+                if len(geo_pos) == 0:
+                    continue
+                geo_pos = geo_subset[geo_pos]
+                texts = {'positions': points, 'extent': np.zeros(len(points))}
+                dist = self._candidate_distances(geometry, geo_pos, texts, text_idx)
+                hit = dist <= geometry['thresholds'][geo_pos]
+                geo_pos_parts.append(geo_pos[hit])
+                text_row_parts.append(np.asarray(sorted_rows[block_start:block_end])[text_idx[hit]])
+                dist_parts.append(dist[hit])
+
+            if progress_callback is not None:
+                progress_callback(done, len(buckets))
+
+        if not geo_pos_parts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(geo_pos_parts), np.concatenate(text_row_parts), np.concatenate(dist_parts)
+
+    def fingerprint(self, geo_df, text_df, *params):
+        """
+        Schneller Fingerabdruck der Eingabedaten (relevante Spalten inkl. Index)
+        und der Analyse-Parameter.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for df, columns in ((geo_df, FINGERPRINT_GEO_COLUMNS), (text_df, FINGERPRINT_TEXT_COLUMNS)):
+            present = [c for c in columns if c in df.columns]
+            digest.update(repr(present).encode())
+            digest.update(pd.util.hash_pandas_object(df[present], index=True).to_numpy().tobytes())
+        for param in params:
+            if isinstance(param, dict):
+                param = sorted((key, sorted(value)) for key, value in param.items())
+            digest.update(repr(param).encode())
+        return digest.hexdigest()
+
+    def set_cache_dir(self, cache_dir):
+        """
+        Aktiviert die Ablage des Ergebnis-Caches im Verzeichnis cache_dir (None = nur im Speicher).
+        Das Verzeichnis wird nur für den aktuellen Benutzer lesbar angelegt; Einträge werden
+        erst bei Bedarf (Cache-Treffer) gelesen.
+        """
+        self.cache_dir = cache_dir
+        if not cache_dir:
+            return
+        try:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        except OSError as e:
+            association_log.warning("⚠️ Cache-Verzeichnis nicht verfügbar, Cache nur im Speicher: %s", e)
+            self.cache_dir = None
+
+    def clear_cache(self):
+        """Leert den Ergebnis-Cache (auch die Dateien, falls aktiviert)."""
+        self.result_cache.clear()
+        for path in self._cache_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _cache_files(self):
+        """Cache-Dateien im Verzeichnis, älteste zuerst."""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return []
+        entries = [entry for entry in os.scandir(self.cache_dir)
+                   if entry.is_file() and entry.name.endswith('.json')]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        return [entry.path for entry in entries]
+
+    def _cache_lookup(self, key):
+        if key not in self.result_cache:
+            stored = self._cache_read(key)
+            if stored is None:
+                return None
+            self.result_cache[key] = stored
+            self._trim_cache()
+        self.result_cache.move_to_end(key)
+        return self.result_cache[key]
+
+    def _cache_store(self, key, result_df, match_df):
+        self.result_cache[key] = (result_df.copy(), match_df.copy())
+        self.result_cache.move_to_end(key)
+        self._trim_cache()
+        self._cache_write(key, result_df, match_df)
+
+    def _cache_read(self, key):
+        """Liest einen Eintrag aus dem Cache-Verzeichnis; None ohne (gültige) Datei."""
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('version') != CACHE_FORMAT_VERSION or stored.get('key') != key:
+                return None
+            os.utime(path)
+            return _frame_from_json(stored['result']), _frame_from_json(stored['matches'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            association_log.warning("⚠️ Cache-Eintrag konnte nicht gelesen werden: %s", e)
+            return None
+
+    def _cache_write(self, key, result_df, match_df):
+        """Schreibt nur den geänderten Eintrag und entfernt die ältesten Dateien über der Cache-Größe."""
+        if not self.cache_dir:
+            return
+        path = self._cache_path(key)
+        try:
+            stored = {'version': CACHE_FORMAT_VERSION, 'key': key,
+                      'result': _frame_to_json(result_df), 'matches': _frame_to_json(match_df)}
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(stored, f)
+            os.replace(path + '.tmp', path)
+            for old_path in self._cache_files()[:-self.result_cache_size]:
+                os.remove(old_path)
+        except (OSError, TypeError, ValueError) as e:
+            association_log.warning("⚠️ Ergebnis-Cache konnte nicht gespeichert werden: %s", e)
+
+    def _trim_cache(self):
+        while len(self.result_cache) > self.result_cache_size:
+            self.result_cache.popitem(last=False)
+
+    def _build_text_trees(self, geometry, text_positions, text_layers, layer_rules, text_extents=None):
+        """
+        Ein k-d-Baum je Text-Gruppe (siehe _text_groups) mit den dafür erlaubten Geometrien,
+        innerhalb der Gruppe getrennt nach Box-Größe (Klassen in Zweierpotenzen, punktförmige
+        Texte eigene Klasse). Die Suchkreise werden je Baum nur um die größte Ausdehnung
+        seiner Klasse erweitert, damit einzelne große Boxen (Legende, Schriftfeld) nicht
+        jede Abfrage aufblähen.
+        Rückgabe: Liste von (Text-Positionen, Geometrie-Maske oder None, k-d-Baum, Erweiterung).
+        """
+        if text_extents is None:
+            text_extents = np.zeros(len(text_positions))
+        extent_class = np.where(text_extents > 0,
+                                np.ceil(np.log2(np.maximum(text_extents, 1e-9))), -np.inf)
+        text_trees = []
+        for text_subset, allowed_geo_layers in self._text_groups(text_layers, layer_rules):
+            if len(text_subset) == 0:
+                continue
+            geo_mask = None
+            if allowed_geo_layers is not None:
+                geo_mask = np.isin(geometry['layers'], list(allowed_geo_layers))
+            subset_class = extent_class[text_subset]
+            for size_class in np.unique(subset_class):
+                class_subset = text_subset[subset_class == size_class]
+                text_trees.append((class_subset, geo_mask, cKDTree(text_positions[class_subset]),
+                                   float(text_extents[class_subset].max())))
+        return text_trees
+
+    def _forward_candidates(self, geometry, chunk, text_trees):
+        """
+        Kandidatenpaare für die Geometrien in chunk, abgefragt mit ihren Suchkreisen
+        in den k-d-Bäumen der Text-Gruppen. Rückgabe: (Geometrie-Positionen, Text-Positionen).
+        """
+        geo_pos_parts, text_idx_parts = [], []
+        for text_subset, geo_mask, text_tree, extent in text_trees:
+            geo_subset = chunk if geo_mask is None else chunk[geo_mask[chunk]]
+            if len(geo_subset) == 0:
+                continue
+
+            geo_pos, tree_idx = self._query_candidates(
+                text_tree, geometry['query_centers'][geo_subset], geometry['query_radii'][geo_subset] + extent
+            )
+            geo_pos_parts.append(geo_subset[geo_pos])
+            text_idx_parts.append(text_subset[tree_idx])
+
+        if not geo_pos_parts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.concatenate(geo_pos_parts), np.concatenate(text_idx_parts)
+
+    def _build_geometry_trees(self, geometry):
+        """
+        Räumlicher Index der Geometrien für die Abfrage mit Text-Positionen.
+        Die Geometrien werden nach Größe ihres Suchkreises in Klassen (Zweierpotenzen)
+        mit je einem k-d-Baum eingeteilt, damit einzelne lange Linien nicht den
+        Abfrageradius für alle Texte bestimmen.
+        Rückgabe: Liste von (Geometrie-Positionen, k-d-Baum, größter Suchradius).
+        """
+        query_radii = geometry['query_radii']
+        size_class = np.ceil(np.log2(np.maximum(query_radii, 1e-9))).astype(int)
+        geometry_trees = []
+        for radius_class in np.unique(size_class):
+            geo_subset = np.flatnonzero(size_class == radius_class)
+            geometry_trees.append((geo_subset, cKDTree(geometry['query_centers'][geo_subset]),
+                                   query_radii[geo_subset].max()))
+        return geometry_trees
+
+    def _reverse_candidates(self, geometry, geometry_trees, text_positions, chunk, text_layers, layer_rules,
+                            text_extents=None):
+        """
+        Kandidatenpaare für die Texte in chunk über den räumlichen Index der Geometrien.
+        Der Suchkreis wird je Text um dessen eigene Box-Ausdehnung erweitert.
+        Rückgabe: (Geometrie-Positionen, Text-Positionen).
+        """
+        query_radii = geometry['query_radii']
+        points = text_positions[chunk]
+        extents = np.zeros(len(text_positions)) if text_extents is None else text_extents
+
+        geo_pos_parts, text_idx_parts = [], []
+        for geo_subset, geo_tree, max_radius in geometry_trees:
+            neighbours = geo_tree.query_ball_point(points, r=max_radius + extents[chunk])
+            counts = np.fromiter((len(n) for n in neighbours), dtype=np.intp, count=len(neighbours))
+            if counts.sum() == 0:
+                continue
+            text_idx = np.repeat(chunk, counts)
+            geo_pos = geo_subset[np.concatenate([np.asarray(n, dtype=np.intp) for n in neighbours if n])]
+
+            # Nur Paare innerhalb des Suchkreises der jeweiligen Geometrie
+            offset = text_positions[text_idx] - geometry['query_centers'][geo_pos]
+            inside = np.hypot(offset[:, 0], offset[:, 1]) <= query_radii[geo_pos] + extents[text_idx]
+            geo_pos_parts.append(geo_pos[inside])
+            text_idx_parts.append(text_idx[inside])
+
+        if not geo_pos_parts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        geo_pos = np.concatenate(geo_pos_parts)
+        text_idx = np.concatenate(text_idx_parts)
+
+        allowed = self._allowed_pairs(text_layers[text_idx], geometry['layers'][geo_pos], layer_rules)
+        return geo_pos[allowed], text_idx[allowed]
+
+    def _allowed_pairs(self, pair_text_layers, pair_geo_layers, layer_rules):
+        """Prüft die Layer-Paar-Regeln für Kandidatenpaare (vektorisiert je Text-Layer mit Regel)."""
+        allowed = np.ones(len(pair_text_layers), dtype=bool)
+        for text_layer, allowed_geo_layers in (layer_rules or {}).items():
+            ruled = pair_text_layers == text_layer
+            allowed[ruled] = np.isin(pair_geo_layers[ruled], list(allowed_geo_layers))
+        return allowed
+
+    def _assign_nearest(self, geo_pos, text_idx, dist, geometry_count, capacity=None):
+        """
+        Ordnet jeden Text der nächstgelegenen Geometrie zu (1:1-Modus).
+        Mit capacity nimmt jede Geometrie höchstens capacity Texte auf: in jeder Runde
+        schlägt jeder offene Text seine nächste verfügbare Geometrie vor, die
+        Geometrien nehmen die nächstgelegenen Vorschläge bis zur Kapazität an.
+        Rückgabe: Bool-Maske der beibehaltenen Paare.
+        """
+        keep = np.zeros(len(geo_pos), dtype=bool)
+        if len(geo_pos) == 0:
+            return keep
+
+        # Paare nach Text und Distanz sortieren: erster Eintrag je Text = nächste Geometrie
+        # (bei gleicher Distanz entscheidet die Geometrie-Reihenfolge, unabhängig von der Suchreihenfolge)
+        order = np.lexsort((geo_pos, dist, text_idx))
+        if not capacity:
+            first = np.unique(text_idx[order], return_index=True)[1]
+            keep[order[first]] = True
+            return keep
+
+        remaining_capacity = np.full(geometry_count, int(capacity))
+        open_pairs = order
+        while len(open_pairs):
+            # Vorschlag je Text: nächste noch verfügbare Geometrie
+            first = np.unique(text_idx[open_pairs], return_index=True)[1]
+            proposals = open_pairs[first]
+
+            # Rang der Vorschläge je Geometrie nach Distanz
+            by_geometry = proposals[np.lexsort((text_idx[proposals], dist[proposals], geo_pos[proposals]))]
+            geometries = geo_pos[by_geometry]
+            group_start = np.r_[0, np.flatnonzero(np.diff(geometries)) + 1]
+            rank = np.arange(len(by_geometry)) - np.repeat(group_start, np.diff(np.r_[group_start, len(by_geometry)]))
+            accepted = by_geometry[rank < remaining_capacity[geometries]]
+
+            keep[accepted] = True
+            np.subtract.at(remaining_capacity, geo_pos[accepted], 1)
+
+            # Zugeordnete Texte und volle Geometrien aus den offenen Paaren entfernen
+            assigned_texts = np.zeros(text_idx.max() + 1, dtype=bool)
+            assigned_texts[text_idx[accepted]] = True
+            open_pairs = open_pairs[~assigned_texts[text_idx[open_pairs]] & (remaining_capacity[geo_pos[open_pairs]] > 0)]
+        return keep
+
+    def _prepare_geometry(self, geo_df, search_radius, line_offset):
+        """
+        Bereitet die Geometrien als Arrays vor: Typ, Layer, Koordinaten, Suchkreis
+        (Mittelpunkt und Radius für die Kandidatensuche) und Distanzschwelle.
+        Geometrien ohne gültige Koordinaten werden ausgelassen.
+        """
+        def column(name):
+            if name not in geo_df.columns:
+                return np.full(len(geo_df), np.nan)
+            return pd.to_numeric(geo_df[name], errors='coerce').to_numpy(dtype=float)
+
+        types = geo_df['EntityType'].astype(str).str.upper().to_numpy()
+        start = np.column_stack([column('StartX'), column('StartY')])
+        end = np.column_stack([column('EndX'), column('EndY')])
+        center = np.column_stack([column('CenterX'), column('CenterY')])
+        radius = column('Radius')
+        start_angle = column('StartAngle')
+        end_angle = column('EndAngle')
+
+        # Gespiegelte Bögen (Extrusion 0,0,-1): OCS-Winkel in WCS-Winkel umrechnen
+        mirrored = column('NormalZ') < 0
+        start_angle, end_angle = (
+            np.where(mirrored, 180.0 - end_angle, start_angle),
+            np.where(mirrored, 180.0 - start_angle, end_angle)
+        )
+
+        is_line = types == 'LINE'
+        is_circle = types == 'CIRCLE'
+        is_arc = types == 'ARC'
+        has_center = ~np.isnan(center).any(axis=1) & ~np.isnan(radius)
+        valid = (
+            (is_line & ~np.isnan(start).any(axis=1) & ~np.isnan(end).any(axis=1)) |
+            (is_circle & has_center) |
+            (is_arc & has_center & ~np.isnan(start_angle) & ~np.isnan(end_angle))
+        )
+        if not valid.any():
+            return None
+
+        midpoint = (start + end) / 2
+        half_length = np.hypot(end[:, 0] - start[:, 0], end[:, 1] - start[:, 1]) / 2
+        query_centers = np.where(is_line[:, None], midpoint, center)
+        query_radii = np.where(is_line, half_length + line_offset, radius + search_radius)
+        thresholds = np.where(is_line, line_offset, search_radius)
+
+        layers = geo_df['Layer'].to_numpy() if 'Layer' in geo_df.columns else np.full(len(geo_df), '0', dtype=object)
+        return {
+            'rows': np.flatnonzero(valid),
+            'types': types[valid],
+            'layers': layers[valid],
+            'start': start[valid],
+            'end': end[valid],
+            'center': center[valid],
+            'radius': radius[valid],
+            'start_angle': start_angle[valid],
+            'end_angle': end_angle[valid],
+            'query_centers': query_centers[valid],
+            'query_radii': query_radii[valid],
+            'thresholds': thresholds[valid]
+        }
+
+    def _text_groups(self, text_layers, layer_rules):
+        """
+        Teilt die Texte in Gruppen mit je einem eigenen k-d-Baum auf.
+        Rückgabe: Liste von (Text-Positionen, erlaubte Geometrie-Layer oder None für alle).
+        """
+        if not layer_rules:
+            return [(np.arange(len(text_layers)), None)]
+
+        groups = []
+        ruled = np.isin(text_layers, list(layer_rules))
+        if (~ruled).any():
+            groups.append((np.flatnonzero(~ruled), None))
+        for text_layer, allowed_geo_layers in layer_rules.items():
+            subset = np.flatnonzero(text_layers == text_layer)
+            if len(subset):
+                groups.append((subset, allowed_geo_layers))
+        return groups
+
+    def _query_candidates(self, text_tree, centers, radii):
+        """
+        Fragt alle Suchkreise in einem Aufruf ab.
+        Rückgabe: (Positionen der Suchkreise, Text-Positionen im Baum) als flache Arrays.
+        """
+        neighbours = text_tree.query_ball_point(centers, r=radii)
+        counts = np.fromiter((len(n) for n in neighbours), dtype=np.intp, count=len(neighbours))
+        if counts.sum() == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        query_pos = np.repeat(np.arange(len(neighbours)), counts)
+        tree_idx = np.concatenate([np.asarray(n, dtype=np.intp) for n in neighbours if n])
+        return query_pos, tree_idx
+
+    def _prepare_texts(self, text_df):
+        """
+        Bereitet die Texte als orientierte Boxen vor (siehe DXFParser.compute_text_boxes):
+        Mittelpunkt, halbe Breite/Höhe, Drehung und Umkreisradius.
+        Ohne Box-Spalten wird der Einfügepunkt als punktförmige Box verwendet.
+        """
+        def column(name, default):
+            if name not in text_df.columns:
+                return np.full(len(text_df), default, dtype=float)
+            return pd.to_numeric(text_df[name], errors='coerce').to_numpy(dtype=float)
+
+        insert = np.column_stack([column('InsertX', np.nan), column('InsertY', np.nan)])
+        box_center = np.column_stack([column('BoxCenterX', np.nan), column('BoxCenterY', np.nan)])
+        positions = np.where(np.isnan(box_center), insert, box_center)
+
+        half_width = np.nan_to_num(column('BoxHalfWidth', 0.0))
+        half_height = np.nan_to_num(column('BoxHalfHeight', 0.0))
+        rotation = np.radians(np.nan_to_num(column('Rotation', 0.0)))
+        return {
+            'positions': positions,
+            'half_width': half_width,
+            'half_height': half_height,
+            'cos': np.cos(rotation),
+            'sin': np.sin(rotation),
+            'extent': np.hypot(half_width, half_height)
+        }
+
+    def _candidate_distances(self, geometry, geo_pos, texts, text_idx):
+        """
+        Berechnet die 2D-Abstände aller Kandidatenpaare, je Geometrietyp vektorisiert.
+        Texte mit Ausdehnung werden als orientierte Box gemessen, sonst als Punkt.
+        """
+        dist = np.full(len(geo_pos), np.inf)
+        types = geometry['types'][geo_pos]
+        points = texts['positions'][text_idx]
+
+        line = types == 'LINE'
+        if line.any():
+            pos = geo_pos[line]
+            dist[line] = self._point_to_segment_dist_2d(points[line], geometry['start'][pos], geometry['end'][pos])
+
+        circle = types == 'CIRCLE'
+        if circle.any():
+            pos = geo_pos[circle]
+            offset = points[circle] - geometry['center'][pos]
+            dist[circle] = np.abs(np.hypot(offset[:, 0], offset[:, 1]) - geometry['radius'][pos])
+
+        arc = types == 'ARC'
+        if arc.any():
+            pos = geo_pos[arc]
+            dist[arc] = self._point_to_arc_dist_2d(
+                points[arc], geometry['center'][pos], geometry['radius'][pos],
+                geometry['start_angle'][pos], geometry['end_angle'][pos]
+            )
+
+        boxed = texts['extent'][text_idx] > 0
+        if boxed.any():
+            dist[boxed] = self._box_distances(geometry, geo_pos[boxed], texts, text_idx[boxed])
+        return dist
+
+    def _box_distances(self, geometry, geo_pos, texts, text_idx):
+        """
+        Abstände zwischen Geometrien und orientierten Text-Boxen.
+        Alle Typen werden im Koordinatensystem der jeweiligen Box gemessen.
+        """
+        dist = np.full(len(geo_pos), np.inf)
+        types = geometry['types'][geo_pos]
+        centers = texts['positions'][text_idx]
+        half_width = texts['half_width'][text_idx]
+        half_height = texts['half_height'][text_idx]
+        cos_r = texts['cos'][text_idx]
+        sin_r = texts['sin'][text_idx]
+
+        def to_box(points, subset):
+            offset = points - centers[subset]
+            return np.column_stack([
+                offset[:, 0] * cos_r[subset] + offset[:, 1] * sin_r[subset],
+                -offset[:, 0] * sin_r[subset] + offset[:, 1] * cos_r[subset]
+            ])
+
+        line = types == 'LINE'
+        if line.any():
+            pos = geo_pos[line]
+            dist[line] = self._segment_to_box_dist_2d(
+                to_box(geometry['start'][pos], line), to_box(geometry['end'][pos], line),
+                half_width[line], half_height[line]
+            )
+
+        circle = types == 'CIRCLE'
+        if circle.any():
+            pos = geo_pos[circle]
+            local = to_box(geometry['center'][pos], circle)
+            radii = geometry['radius'][pos]
+            nearest = self._point_to_box_dist_2d(local, half_width[circle], half_height[circle])
+            farthest = np.hypot(np.abs(local[:, 0]) + half_width[circle], np.abs(local[:, 1]) + half_height[circle])
+            dist[circle] = np.where(radii < nearest, nearest - radii, np.where(radii > farthest, radii - farthest, 0.0))
+
+        arc = types == 'ARC'
+        if arc.any():
+            pos = geo_pos[arc]
+            rotation = np.degrees(np.arctan2(sin_r[arc], cos_r[arc]))
+            dist[arc] = self._arc_to_box_dist_2d(
+                to_box(geometry['center'][pos], arc), geometry['radius'][pos],
+                geometry['start_angle'][pos] - rotation, geometry['end_angle'][pos] - rotation,
+                half_width[arc], half_height[arc]
+            )
+        return dist
+
+    def _arc_to_box_dist_2d(self, centers, radii, start_angles, end_angles, half_width, half_height):
+        """
+        Abstand von Kreisbögen (im Box-Koordinatensystem) zu achsparallelen Boxen um den Ursprung.
+        Kandidaten sind: Bogenendpunkte zur Box, Box-Ecken zum Bogen, Schnittpunkte der
+        Box-Kanten mit dem Bogen (Abstand 0) und der Kantenpunkt in radialer Richtung
+        zum Kreismittelpunkt, sofern er im Winkelbereich des Bogens liegt.
+        """
+        span = np.mod(end_angles - start_angles, 360.0)
+        span = np.where(span == 0.0, 360.0, span)
+
+        def in_sector(vectors):
+            angles = np.degrees(np.arctan2(vectors[:, 1], vectors[:, 0]))
+            return np.mod(angles - start_angles, 360.0) <= span
+
+        dist = np.full(len(centers), np.inf)
+        for angles in (start_angles, end_angles):
+            rad = np.radians(angles)
+            endpoint = centers + radii[:, None] * np.column_stack([np.cos(rad), np.sin(rad)])
+            dist = np.minimum(dist, self._point_to_box_dist_2d(endpoint, half_width, half_height))
+
+        corners = [np.column_stack([fx * half_width, fy * half_height])
+                   for fx, fy in ((1, 1), (-1, 1), (-1, -1), (1, -1))]
+        for corner in corners:
+            dist = np.minimum(dist, self._point_to_arc_dist_2d(corner, centers, radii, start_angles, end_angles))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for edge_start, edge_end in zip(corners, corners[1:] + corners[:1]):
+                direction = edge_end - edge_start
+                offset = edge_start - centers
+                a = np.einsum('ij,ij->i', direction, direction)
+                b = 2.0 * np.einsum('ij,ij->i', offset, direction)
+                c = np.einsum('ij,ij->i', offset, offset) - radii ** 2
+                valid_edge = a > 0
+
+                # Schnittpunkte Kante / Kreis im Winkelbereich -> Abstand 0
+                root = np.sqrt(np.maximum(b ** 2 - 4.0 * a * c, 0.0))
+                has_roots = valid_edge & (b ** 2 - 4.0 * a * c >= 0)
+                for sign in (-1.0, 1.0):
+                    t = (-b + sign * root) / (2.0 * a)
+                    on_edge = has_roots & (t >= 0.0) & (t <= 1.0)
+                    crossing = edge_start + np.nan_to_num(t)[:, None] * direction - centers
+                    dist = np.where(on_edge & in_sector(crossing), 0.0, dist)
+
+                # Kantenpunkt mit kürzestem Abstand zum Mittelpunkt (radiale Richtung)
+                t = np.clip(np.where(valid_edge, -0.5 * b / a, 0.0), 0.0, 1.0)
+                foot = edge_start + t[:, None] * direction - centers
+                foot_dist = np.abs(np.hypot(foot[:, 0], foot[:, 1]) - radii)
+                dist = np.where(in_sector(foot), np.minimum(dist, foot_dist), dist)
+        return dist
+
+    def _point_to_box_dist_2d(self, local_points, half_width, half_height):
+        """Abstand von Punkten (im Box-Koordinatensystem) zu achsparallelen Boxen um den Ursprung."""
+        dx = np.maximum(np.abs(local_points[:, 0]) - half_width, 0.0)
+        dy = np.maximum(np.abs(local_points[:, 1]) - half_height, 0.0)
+        return np.hypot(dx, dy)
+
+    def _segment_to_box_dist_2d(self, starts, ends, half_width, half_height):
+        """
+        Abstand von Segmenten (im Box-Koordinatensystem) zu achsparallelen Boxen um den Ursprung.
+        Schneidet das Segment die Box (Slab-Test), ist der Abstand 0; sonst liegt das Minimum
+        an einem Segmentendpunkt oder an einer Box-Ecke.
+        """
+        direction = ends - starts
+        t_min = np.zeros(len(starts))
+        t_max = np.ones(len(starts))
+        missed = np.zeros(len(starts), dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for axis, half in ((0, half_width), (1, half_height)):
+                parallel = direction[:, axis] == 0
+                missed |= parallel & (np.abs(starts[:, axis]) > half)
+                t1 = (-half - starts[:, axis]) / direction[:, axis]
+                t2 = (half - starts[:, axis]) / direction[:, axis]
+                t_min = np.maximum(t_min, np.where(parallel, -np.inf, np.minimum(t1, t2)))
+                t_max = np.minimum(t_max, np.where(parallel, np.inf, np.maximum(t1, t2)))
+        intersects = ~missed & (t_min <= t_max)
+
+        dist = np.minimum(self._point_to_box_dist_2d(starts, half_width, half_height),
+                          self._point_to_box_dist_2d(ends, half_width, half_height))
+        for fx, fy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+            corner = np.column_stack([fx * half_width, fy * half_height])
+            dist = np.minimum(dist, self._point_to_segment_dist_2d(corner, starts, ends))
+        return np.where(intersects, 0.0, dist)
+
+    def _build_results(self, geo_df, text_df, geometry, geo_pos, text_idx, dist, text_positions=None):
+        """
+        Erstellt self.match_df (ein Eintrag pro Treffer) und die Anzeige-Tabelle
+        (ein Eintrag pro Geometrie mit zusammengefügten Texten).
+        TextX/TextY ist die Position, mit der gemessen wurde (Box-Mittelpunkt, sonst Einfügepunkt).
+        """
+        # Je Geometrie nach Distanz sortieren; Geometrien in Reihenfolge von geo_df
+        geo_rows = geometry['rows'][geo_pos]
+        order = np.lexsort((dist, geo_rows))
+        geo_rows, text_idx, dist = geo_rows[order], text_idx[order], dist[order]
+
+        texts = text_df['Text'].to_numpy()[text_idx]
+        blocknames = text_df['BlockName'].to_numpy()[text_idx] if 'BlockName' in text_df.columns else np.full(len(text_idx), None)
+        text_ids = text_df['ID'].to_numpy()[text_idx] if 'ID' in text_df.columns else text_df.index.to_numpy()[text_idx]
+        if text_positions is None:
+            text_positions = self._prepare_texts(text_df)['positions']
+        text_x = text_positions[text_idx, 0]
+        text_y = text_positions[text_idx, 1]
+
+        self.match_df = pd.DataFrame({
+            'GeometryID': geo_df['ID'].to_numpy()[geo_rows],
+            'TextRow': text_df.index.to_numpy()[text_idx],
+            'TextID': text_ids,
+            'Text': texts,
+            'TextBlockName': blocknames,
+            'TextX': text_x,
+            'TextY': text_y,
+            'Distance': dist
+        }, columns=MATCH_COLUMNS)
+
+        display = pd.DataFrame({
+            'row': geo_rows,
+            'text': [f"{text} [{x:.2f}, {y:.2f}]" for text, x, y in zip(texts, text_x, text_y)],
+            'blockname': blocknames,
+            'distance': dist
+        })
+        grouped = display.groupby('row', sort=True)
+        rows = grouped.size().index.to_numpy()
+        return pd.DataFrame({
+            'GeometryID': geo_df['ID'].to_numpy()[rows],
+            'GeometryType': geo_df['EntityType'].astype(str).str.upper().to_numpy()[rows],
+            'GeometryLayer': geo_df['Layer'].to_numpy()[rows],
+            'AssociatedText': grouped['text'].agg(lambda values: "; ".join(sorted(set(values)))).to_numpy(),
+            'TextBlockName': grouped['blockname'].agg(
+                lambda values: "; ".join(sorted(set(str(v) for v in values if pd.notna(v))))).to_numpy(),
+            'Distance': grouped['distance'].min().round(4).to_numpy()
+        })
+
+    def _point_to_arc_dist_2d(self, points, centers, radii, start_angles, end_angles):
+        """
+        Vektorisierter 2D-Abstand von Punkten zu Kreisbögen (alle Argumente zeilenweise).
+        Liegt der Punkt im Winkelbereich des Bogens (gegen den Uhrzeigersinn von
+        start_angles bis end_angles, in Grad), zählt der Abstand zum Kreisrand,
+        sonst der Abstand zum näheren Bogenendpunkt.
+        """
+        return point_to_arc_dist_2d(points, centers, radii, start_angles, end_angles)
+
+    def _point_to_segment_dist_2d(self, points, starts, ends):
+        """Vektorisierter 2D-Abstand von Punkten zu Liniensegmenten (alle Argumente zeilenweise)."""
+        return point_to_segment_dist_2d(points, starts, ends)
+
+
+def _frame_to_json(df):
+    """DataFrame als JSON-fähiges Dict (Werte, Index und Spaltentypen; Gleitkommazahlen exakt)."""
+    stored = df.to_dict(orient='split')
+    stored['index_name'] = df.index.name
+    stored['dtypes'] = [str(dtype) for dtype in df.dtypes]
+    return stored
+
+
+def _frame_from_json(stored):
+    """Gegenstück zu _frame_to_json."""
+    df = pd.DataFrame(stored['data'], index=stored['index'], columns=stored['columns'])
+    df.index.name = stored['index_name']
+    return df.astype(dict(zip(stored['columns'], stored['dtypes'])))
@@ -0,0 +1,95 @@
+"""
+Gebündelte Neuberechnung der Bogen-Parameter nach Änderung der Endpunkt-Höhen.
+
+Alle Funktionen arbeiten auf Arrays (eine Zeile je Bogen) statt auf einzelnen
+DataFrame-Zeilen mit ezdxf-Vektoren. Normale und OCS-Winkel folgen denselben
+Formeln wie ezdxf (Vec3.cross/normalize, OCS mit dem Arbitrary-Axis-Algorithmus);
+Abgleich mit dem zeilenweisen Verfahren: benchmarks/arc_geometry_benchmark.py.
+"""
+import numpy as np
+
+# Grenze des Arbitrary-Axis-Algorithmus (wie ezdxf.math.OCS)
+ARBITRARY_AXIS_LIMIT = 1.0 / 64.0
+
+# Unterhalb dieser Länge der Normalen gelten die Bogenpunkte als kollinear
+COLLINEAR_TOLERANCE = 1e-9
+
+
+def center_heights(start_z, end_z, fallback=np.nan):
+    """
+    CenterZ je Bogen: Mittel aus Start- und End-Z, sonst der vorhandene Wert,
+    sonst fallback (Skalar oder Array).
+    """
+    start_z = np.asarray(start_z, dtype=float)
+    end_z = np.asarray(end_z, dtype=float)
+    return np.where(np.isnan(start_z), np.where(np.isnan(end_z), fallback, end_z),
+                    np.where(np.isnan(end_z), start_z, (start_z + end_z) / 2.0))
+
+
+def ocs_axes(normals):
+    """
+    x- und y-Achse des OCS je Normale (Array (n, 3), normiert).
+    Normalen, die (nahezu) der WCS-z-Achse entsprechen, behalten die WCS-Achsen.
+    """
+    az_x, az_y, az_z = normals[:, 0], normals[:, 1], normals[:, 2]
+    # Y × Az für Normalen nahe der z-Achse, sonst Z × Az
+    near_z = (np.abs(az_x) < ARBITRARY_AXIS_LIMIT) & (np.abs(az_y) < ARBITRARY_AXIS_LIMIT)
+    zeros = np.zeros_like(az_x)
+    ux = np.where(near_z[:, None], np.column_stack([az_z, zeros, -az_x]), np.column_stack([-az_y, az_x, zeros]))
+    ux = ux / np.linalg.norm(ux, axis=1)[:, None]
+    uy = np.cross(normals, ux)
+    uy = uy / np.linalg.norm(uy, axis=1)[:, None]
+
+    # Keine Transformation, wenn die Normale der z-Achse entspricht (Toleranzen wie Vec3.isclose)
+    is_wcs = ((np.abs(az_x) <= 1e-12) & (np.abs(az_y) <= 1e-12) &
+              (np.abs(az_z - 1.0) <= np.maximum(1e-9 * np.maximum(np.abs(az_z), 1.0), 1e-12)))
+    ux[is_wcs] = (1.0, 0.0, 0.0)
+    uy[is_wcs] = (0.0, 1.0, 0.0)
+    return ux, uy
+
+
+def arc_parameters(start_xy, end_xy, center_xy, start_z, end_z, center_z=None):
+    """
+    Berechnet CenterZ, Radius, Normale und OCS-Start-/Endwinkel für viele Bögen.
+
+    start_xy, end_xy, center_xy: Arrays (n, 2); start_z, end_z: Arrays (n,) mit NaN für
+    fehlende Höhen (in der Geometrie als 0 gerechnet); center_z: bisheriges CenterZ,
+    verwendet, wenn beide Höhen fehlen (sonst 0).
+    Rückgabe: Dict mit center_z, radius (2D-Abstand Mittelpunkt-Startpunkt),
+    normal (n, 3), start_angle, end_angle (Grad, 0-360) und collinear (Bogenpunkte
+    kollinear; Normale und Winkel sind dort nicht definiert).
+    """
+    start_xy = np.asarray(start_xy, dtype=float).reshape(-1, 2)
+    end_xy = np.asarray(end_xy, dtype=float).reshape(-1, 2)
+    center_xy = np.asarray(center_xy, dtype=float).reshape(-1, 2)
+    start_z = np.asarray(start_z, dtype=float)
+    end_z = np.asarray(end_z, dtype=float)
+    fallback = 0.0 if center_z is None else np.nan_to_num(np.asarray(center_z, dtype=float), nan=0.0)
+    new_center_z = center_heights(start_z, end_z, fallback)
+
+    radius = np.sqrt((start_xy[:, 0] - center_xy[:, 0])**2 + (start_xy[:, 1] - center_xy[:, 1])**2)
+
+    # Vektoren vom 3D-Mittelpunkt zu den Endpunkten
+    center = np.column_stack([center_xy, new_center_z])
+    to_start = np.column_stack([start_xy, np.nan_to_num(start_z, nan=0.0)]) - center
+    to_end = np.column_stack([end_xy, np.nan_to_num(end_z, nan=0.0)]) - center
+
+    normal = np.cross(to_start, to_end)
+    magnitude = np.linalg.norm(normal, axis=1)
+    collinear = magnitude < COLLINEAR_TOLERANCE
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normal = normal / magnitude[:, None]
+    normal[collinear] = np.nan
+
+    ux, uy = ocs_axes(normal)
+    start_angle = np.degrees(np.arctan2(np.einsum('ij,ij->i', to_start, uy), np.einsum('ij,ij->i', to_start, ux)))
+    end_angle = np.degrees(np.arctan2(np.einsum('ij,ij->i', to_end, uy), np.einsum('ij,ij->i', to_end, ux)))
+
+    return {
+        'center_z': new_center_z,
+        'radius': radius,
+        'normal': normal,
+        'start_angle': np.where(start_angle < 0, start_angle + 360, start_angle),
+        'end_angle': np.where(end_angle < 0, end_angle + 360, end_angle),
+        'collinear': collinear
+    }
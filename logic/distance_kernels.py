@@ -0,0 +1,190 @@
+"""
+Gebündelte Abstands-Kernel für die Geometrie-Text-Zuordnung. Die Endpunkt-Paarung ist das
+Referenzverfahren der Verbindungssuche (benchmarks/connectivity_benchmark.py); die
+Propagation selbst verbindet Linien über die Knoten von NetworkTopology.
+
+Alle Funktionen arbeiten zeilenweise auf Arrays (ein Aufruf für viele Paare statt
+vieler Aufrufe mit Einzelpunkten). Ist Numba installiert, werden kompilierte
+Schleifen verwendet, sonst NumPy. Beide Varianten rechnen mit denselben Formeln
+und liefern identische Ergebnisse (Tests: tests/test_distance_kernels.py, Zeitmessung:
+benchmarks/distance_kernels_benchmark.py).
+"""
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # Numba ist optional
+    NUMBA_AVAILABLE = False
+
+DEG_TO_RAD = math.pi / 180.0
+
+# Bits der Endpunkt-Paarung (Reihenfolge wie in der ursprünglichen Propagation geprüft)
+START_START = 1
+START_END = 2
+END_START = 4
+END_END = 8
+
+# Kann zur Laufzeit abgeschaltet werden, um den NumPy-Pfad zu erzwingen
+use_numba = NUMBA_AVAILABLE
+
+
+# --- NumPy-Varianten ----------------------------------------------------------
+
+def _point_to_segment_dist_numpy(points, starts, ends):
+    line_x = ends[:, 0] - starts[:, 0]
+    line_y = ends[:, 1] - starts[:, 1]
+    p_x = points[:, 0] - starts[:, 0]
+    p_y = points[:, 1] - starts[:, 1]
+    line_len_sq = line_x * line_x + line_y * line_y
+
+    # Degenerierte Segmente (Start == Ende): Abstand zum Startpunkt
+    safe_len_sq = np.where(line_len_sq > 0, line_len_sq, 1.0)
+    t = np.where(line_len_sq > 0, (p_x * line_x + p_y * line_y) / safe_len_sq, 0.0)
+    t = np.minimum(np.maximum(t, 0.0), 1.0)
+
+    return np.hypot(points[:, 0] - (starts[:, 0] + t * line_x),
+                    points[:, 1] - (starts[:, 1] + t * line_y))
+
+
+def _point_to_arc_dist_numpy(points, centers, radii, start_angles, end_angles):
+    offset_x = points[:, 0] - centers[:, 0]
+    offset_y = points[:, 1] - centers[:, 1]
+    span = np.mod(end_angles - start_angles, 360.0)
+    span = np.where(span == 0.0, 360.0, span)  # Start == Ende: Vollkreis
+
+    start_x, start_y = np.cos(start_angles * DEG_TO_RAD), np.sin(start_angles * DEG_TO_RAD)
+    end_x, end_y = np.cos(end_angles * DEG_TO_RAD), np.sin(end_angles * DEG_TO_RAD)
+
+    # Sektortest über Kreuzprodukte mit den Start-/Endrichtungen (ohne Winkelberechnung)
+    after_start = start_x * offset_y - start_y * offset_x >= 0.0
+    before_end = offset_x * end_y - offset_y * end_x >= 0.0
+    in_sector = np.where(span <= 180.0, after_start & before_end, after_start | before_end)
+
+    dist_start = np.hypot(points[:, 0] - (centers[:, 0] + radii * start_x),
+                          points[:, 1] - (centers[:, 1] + radii * start_y))
+    dist_end = np.hypot(points[:, 0] - (centers[:, 0] + radii * end_x),
+                        points[:, 1] - (centers[:, 1] + radii * end_y))
+
+    return np.where(in_sector, np.abs(np.hypot(offset_x, offset_y) - radii), np.minimum(dist_start, dist_end))
+
+
+def _endpoint_pairing_numpy(first_starts, first_ends, second_starts, second_ends, tolerance):
+    def close(a, b):
+        return np.hypot(a[:, 0] - b[:, 0], a[:, 1] - b[:, 1]) <= tolerance
+
+    return (close(first_starts, second_starts) * START_START |
+            close(first_starts, second_ends) * START_END |
+            close(first_ends, second_starts) * END_START |
+            close(first_ends, second_ends) * END_END).astype(np.uint8)
+
+
+# --- Numba-Varianten ----------------------------------------------------------
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _point_to_segment_dist_numba(points, starts, ends):
+        result = np.empty(points.shape[0])
+        for i in range(points.shape[0]):
+            line_x = ends[i, 0] - starts[i, 0]
+            line_y = ends[i, 1] - starts[i, 1]
+            p_x = points[i, 0] - starts[i, 0]
+            p_y = points[i, 1] - starts[i, 1]
+            line_len_sq = line_x * line_x + line_y * line_y
+            t = 0.0
+            if line_len_sq > 0:
+                t = (p_x * line_x + p_y * line_y) / line_len_sq
+            t = min(max(t, 0.0), 1.0)
+            result[i] = math.hypot(points[i, 0] - (starts[i, 0] + t * line_x),
+                                   points[i, 1] - (starts[i, 1] + t * line_y))
+        return result
+
+    @njit(cache=True)
+    def _point_to_arc_dist_numba(points, centers, radii, start_angles, end_angles):
+        result = np.empty(points.shape[0])
+        for i in range(points.shape[0]):
+            offset_x = points[i, 0] - centers[i, 0]
+            offset_y = points[i, 1] - centers[i, 1]
+            span = (end_angles[i] - start_angles[i]) % 360.0
+            if span == 0.0:
+                span = 360.0
+
+            start_x, start_y = math.cos(start_angles[i] * DEG_TO_RAD), math.sin(start_angles[i] * DEG_TO_RAD)
+            end_x, end_y = math.cos(end_angles[i] * DEG_TO_RAD), math.sin(end_angles[i] * DEG_TO_RAD)
+            after_start = start_x * offset_y - start_y * offset_x >= 0.0
+            before_end = offset_x * end_y - offset_y * end_x >= 0.0
+            if span <= 180.0:
+                in_sector = after_start and before_end
+            else:
+                in_sector = after_start or before_end
+
+            if in_sector:
+                result[i] = abs(math.hypot(offset_x, offset_y) - radii[i])
+            else:
+                dist_start = math.hypot(points[i, 0] - (centers[i, 0] + radii[i] * start_x),
+                                        points[i, 1] - (centers[i, 1] + radii[i] * start_y))
+                dist_end = math.hypot(points[i, 0] - (centers[i, 0] + radii[i] * end_x),
+                                      points[i, 1] - (centers[i, 1] + radii[i] * end_y))
+                result[i] = min(dist_start, dist_end)
+        return result
+
+    @njit(cache=True)
+    def _endpoint_pairing_numba(first_starts, first_ends, second_starts, second_ends, tolerance):
+        result = np.zeros(first_starts.shape[0], dtype=np.uint8)
+        for i in range(first_starts.shape[0]):
+            mask = 0
+            if math.hypot(first_starts[i, 0] - second_starts[i, 0], first_starts[i, 1] - second_starts[i, 1]) <= tolerance:
+                mask |= 1
+            if math.hypot(first_starts[i, 0] - second_ends[i, 0], first_starts[i, 1] - second_ends[i, 1]) <= tolerance:
+                mask |= 2
+            if math.hypot(first_ends[i, 0] - second_starts[i, 0], first_ends[i, 1] - second_starts[i, 1]) <= tolerance:
+                mask |= 4
+            if math.hypot(first_ends[i, 0] - second_ends[i, 0], first_ends[i, 1] - second_ends[i, 1]) <= tolerance:
+                mask |= 8
+            result[i] = mask
+        return result
+
+
+# --- Öffentliche Schnittstelle ------------------------------------------------
+
+def _as_points(values):
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64).reshape(-1, 2))
+
+
+def _as_values(values):
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64).ravel())
+
+
+def point_to_segment_dist_2d(points, starts, ends):
+    """2D-Abstand von Punkten zu Liniensegmenten (alle Argumente zeilenweise, Form (n, 2))."""
+    points, starts, ends = _as_points(points), _as_points(starts), _as_points(ends)
+    if use_numba and NUMBA_AVAILABLE:
+        return _point_to_segment_dist_numba(points, starts, ends)
+    return _point_to_segment_dist_numpy(points, starts, ends)
+
+
+def point_to_arc_dist_2d(points, centers, radii, start_angles, end_angles):
+    """
+    2D-Abstand von Punkten zu Kreisbögen (alle Argumente zeilenweise).
+    Liegt der Punkt im Winkelbereich des Bogens (gegen den Uhrzeigersinn von
+    start_angles bis end_angles, in Grad), zählt der Abstand zum Kreisrand,
+    sonst der Abstand zum näheren Bogenendpunkt.
+    """
+    points, centers = _as_points(points), _as_points(centers)
+    radii, start_angles, end_angles = _as_values(radii), _as_values(start_angles), _as_values(end_angles)
+    if use_numba and NUMBA_AVAILABLE:
+        return _point_to_arc_dist_numba(points, centers, radii, start_angles, end_angles)
+    return _point_to_arc_dist_numpy(points, centers, radii, start_angles, end_angles)
+
+
+def endpoint_pairing(first_starts, first_ends, second_starts, second_ends, tolerance):
+    """
+    Prüft für Paare von Linien/Bögen, welche Endpunkte zusammenfallen (Abstand <= tolerance).
+    Rückgabe: uint8-Bitmaske je Paar aus START_START, START_END, END_START, END_END.
+    """
+    first_starts, first_ends = _as_points(first_starts), _as_points(first_ends)
+    second_starts, second_ends = _as_points(second_starts), _as_points(second_ends)
+    if use_numba and NUMBA_AVAILABLE:
+        return _endpoint_pairing_numba(first_starts, first_ends, second_starts, second_ends, float(tolerance))
+    return _endpoint_pairing_numpy(first_starts, first_ends, second_starts, second_ends, float(tolerance))
@@ -1,15 +1,142 @@
+import hashlib
+import logging
+import multiprocessing
+import os
 import pandas as pd
 import re
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import spsolve
 from sklearn.neighbors import KNeighborsRegressor
+from logic.arc_geometry import center_heights
+from logic.network_topology import NetworkTopology
+from logic.pipeline_logging import PipelineStage, collect_messages, get_logger
+
+# Verfahren für die Zuordnung der Höhentexte:
+# 'network' = über die Geometrie-Zuordnung in der Netzwerk-Propagation,
+# 'direct'  = jeder Höhentext direkt an den nächstgelegenen Endpunkt (assign_heights_direct)
+ASSIGNMENT_ENGINES = ('network', 'direct')
+
+# Füllen offener Knotenhöhen nach der Propagation:
+# 'copy'     = nur Übernahme über gemeinsame Endpunkte (bisheriges Verhalten),
+# 'gradient' = zusätzlich längengewichtete Interpolation zwischen bekannten Knoten (interpolate_gradient)
+INTERPOLATION_MODES = ('copy', 'gradient')
+
+# Konsenshöhe an Knoten mit mehreren bekannten Endpunkt-Höhen (ensure_coordinate_consistency):
+# 'mean'   = Mittelwert (bisheriges Verhalten), 'median' = Median,
+# 'flag'   = bei widersprüchlichen Höhen nichts setzen, offene Endpunkte als 'Konflikt' markieren
+CONSENSUS_MODES = ('mean', 'median', 'flag')
+
+# Status abgeleiteter Endpunkt-Höhen; sie werden bei der Neupropagation nach manuellen
+# Änderungen verworfen und neu bestimmt (repropagate_component)
+DERIVED_STATUSES = ('Interpoliert', 'Gradient')
+
+# Ausführung der Propagation je Layer (Layer sind unabhängig voneinander):
+# 'serial'  = nacheinander im aktuellen Prozess, 'process' = parallel in einem Prozess-Pool
+EXECUTION_MODES = ('serial', 'process')
+
+# Unterhalb dieser Gesamtzahl an Linien/Bögen lohnt der Start der Worker-Prozesse nicht
+PROCESS_MIN_LINES = 50_000
+
+# Untergrenze der Kantenlänge für die Gewichte 1/Länge (degenerierte Linien)
+MIN_EDGE_LENGTH = 1e-6
+
+# Textmuster der Höhenextraktion: Koordinaten des Textobjekts in eckigen Klammern [x, y]
+# werden vor der Höhensuche entfernt; Zahlen ohne Schlüsselwort nur als Rückfall
+BRACKET_PATTERN = re.compile(r'\[.*?\]')
+COORDINATE_PATTERN = re.compile(r'\[(-?\d+\.?\d*),\s*(-?\d+\.?\d*)\]')
+PLAIN_HEIGHT_PATTERN = re.compile(r'(?<!\d)(\d{2,3}\.\d{1,3})(?!\d)')
+
+# Realistische Höhenbereiche für Werte mit bzw. ohne Schlüsselwort
+KEYWORD_HEIGHT_RANGE = (50, 1000)
+PLAIN_HEIGHT_RANGE = (50, 500)
+
+# Direkt-Zuordnung (assign_heights_direct): Anzahl der nächsten Knoten, die je Höhentext geprüft
+# werden, Texte je Knoten (weitere weichen auf den nächsten freien Knoten aus) und Status von
+# Höhen, die nicht überschrieben werden
+DIRECT_CANDIDATES = 8
+DIRECT_NODE_CAPACITY = 1
+DIRECT_EXCLUDED_STATUSES = ('Original', 'Manuell')
+
+# KNN-Höhenmodell (train_and_predict): Nachbarn, Zeilen je Vorhersage-Block und
+# ab welcher Zeilenzahl die Blöcke parallel in Threads vorhergesagt werden
+KNN_NEIGHBORS = 5
+PREDICT_BATCH_SIZE = 50_000
+PREDICT_THREAD_MIN_ROWS = 200_000
+# Dateiformat von save_model/load_model (.npz ohne Pickle)
+MODEL_FORMAT_VERSION = 1
+# Endung der Modelldatei neben einer Ergebnisdatei (model_path_for)
+MODEL_FILE_SUFFIX = '.knn.npz'
+
+# Grenzwerte der Plausibilitätsprüfung (check_plausibility), je Aufruf überschreibbar:
+# max_gradient    = größtes zulässiges Gefälle |ΔZ| / Länge
+# min_gradient    = kleinere Gefälle gelten als flach und werden nicht auf Gegengefälle geprüft
+# max_height_jump = größte Abweichung einer Endpunkt-Höhe vom Knoten-Median [m]
+# outlier_score   = robuster z-Wert (Abstand zum Layer-Median in MAD) ab dem eine Höhe als Ausreißer gilt
+# min_outlier_spread = kleinste Streuung je Layer [m]; bei (nahezu) konstanten Layern ist die MAD 0
+PLAUSIBILITY_LIMITS = {
+    'max_gradient': 0.15,
+    'min_gradient': 0.001,
+    'max_height_jump': 0.5,
+    'outlier_score': 6.0,
+    'min_outlier_spread': 0.1
+}
+
+# Skalierung der MAD auf die Standardabweichung (Normalverteilung)
+MAD_SCALE = 1.4826
+
+# Logger je Teilsystem (Stufe über ZPIPELINE_LOG_LEVEL bzw. pipeline_logging.configure_logging)
+pipeline_log = get_logger('pipeline')
+text_log = get_logger('text')
+propagation_log = get_logger('propagation')
+consistency_log = get_logger('consistency')
+gradient_log = get_logger('gradient')
+plausibility_log = get_logger('plausibility')
+arc_log = get_logger('arcs')
+model_log = get_logger('model')
 
 class HeightAnalysisLogic:
     def __init__(self):
         self.model = None
         self.features = []
+        # KNN-Modell: verwendete Features, Trainingsdaten (für save_model), deren Fingerprint,
+        # Laufzeiten von Training/Vorhersage
+        self.model_features = []
+        self.model_training = None
+        self.model_fingerprint = None
+        self.model_timings = {}
         self.df_processed = None # Speichert den für ML vorbereiteten DataFrame
+        self.text_elements = pd.DataFrame() # Langformat-Tabelle der Höhentexte pro Geometrie
         # Standard-Schlüsselwörter für Höhenextraktion
         self.height_keywords = ['OK', 'UK', 'KD']  # Default Werte
+        # Kompilierte Schlüsselwort-Muster je Keyword-Satz (wird in set_height_keywords geleert)
+        self._keyword_patterns = {}
+        # Knoten-/Kantenmodell des Netzes, wird nur bei geänderter Geometrie neu aufgebaut
+        self.topology = NetworkTopology()
+        # Knoten mit widersprüchlichen Höhen aus der letzten Konsistenzprüfung
+        self.coordinate_conflicts = pd.DataFrame(columns=['X', 'Y', 'Count', 'MinZ', 'MaxZ'])
+        # Stand des letzten Laufs für repropagate_component: Knoten und Komponente je Zeile, Modi
+        self.row_nodes = None
+        self.row_components = None
+        self.last_interpolation_mode = 'copy'
+        self.last_consensus_mode = 'mean'
+        # Laufzeit und Zähler je Stufe des letzten prepare_data_for_line_interpolation
+        self.stage_stats = {}
+        # Grenzwerte und Ergebnis der letzten Plausibilitätsprüfung (check_plausibility)
+        self.plausibility_limits = dict(PLAUSIBILITY_LIMITS)
+        self.plausibility_results = pd.DataFrame()
+        # Regeln der Direkt-Zuordnung (Standardwerte für assign_heights_direct)
+        self.direct_node_capacity = DIRECT_NODE_CAPACITY
+        self.direct_excluded_statuses = DIRECT_EXCLUDED_STATUSES
+
+    def get_topology(self, df, tolerance=0.01):
+        """Gemeinsames Topologie-Modell für df (aus dem Cache, solange sich die Geometrie nicht ändert)."""
+        if self.topology.tolerance != tolerance:
+            self.topology = NetworkTopology(tolerance)
+        return self.topology.update(df)
 
     def set_height_keywords(self, keywords_string):
         """
@@ -20,11 +147,30 @@ class HeightAnalysisLogic:
             # Bereinige und splitte die Keywords
             keywords = [kw.strip().upper() for kw in keywords_string.split(',') if kw.strip()]
             self.height_keywords = keywords
-            print(f"📋 Höhen-Schlüsselwörter gesetzt: {self.height_keywords}")
+            text_log.info("📋 Höhen-Schlüsselwörter gesetzt: %s", self.height_keywords)
         else:
             # Fallback auf Standard-Keywords
             self.height_keywords = ['OK', 'UK', 'KD']
-            print(f"📋 Standard Höhen-Schlüsselwörter verwendet: {self.height_keywords}")
+            text_log.info("📋 Standard Höhen-Schlüsselwörter verwendet: %s", self.height_keywords)
+        self._keyword_patterns.clear()
+
+    def _keyword_pattern(self, keywords):
+        """
+        Kompiliertes Muster 'Schlüsselwort = Höhe' für alle keywords (aus dem Cache).
+        Die Alternation steht in einem Lookahead, damit auch überlappende Treffer
+        (z.B. 'OK' in 'SOK=...') gefunden werden - wie bei der Suche je Schlüsselwort.
+        Rückgabe: (Muster, dict Schlüsselwort in Großbuchstaben -> Rang in keywords).
+        """
+        key = tuple(keywords)
+        cached = self._keyword_patterns.get(key)
+        if cached is None:
+            ranks = {}
+            for rank, keyword in enumerate(keywords):
+                ranks.setdefault(str(keyword).upper(), rank)
+            alternatives = '|'.join(re.escape(keyword) for keyword in sorted(ranks, key=len, reverse=True))
+            pattern = re.compile(rf'(?=(?P<keyword>{alternatives})\s*=(?P<height>\d+\.?\d{{0,3}}))', re.IGNORECASE)
+            cached = self._keyword_patterns[key] = (pattern, ranks)
+        return cached
 
     def extract_height_from_text(self, text, custom_keywords=None):
         """Extrahiert die Höhe aus dem Associated_Text mit bis zu 3 Nachkommastellen.
@@ -42,31 +188,93 @@ class HeightAnalysisLogic:
         
         # Entferne alle Inhalte innerhalb von eckigen Klammern [x, y]
         # Dies sind X/Y-Koordinaten des Textobjekts und sollen nicht als Höhe interpretiert werden
-        text_cleaned = re.sub(r'\[.*?\]', '', text_str)
+        text_cleaned = BRACKET_PATTERN.sub('', text_str)
         
         # Verwende benutzerdefinierte Keywords oder Instanz-Keywords
         keywords = custom_keywords if custom_keywords else self.height_keywords
         
-        # Suche nach verschiedenen Höhen-Mustern basierend auf den konfigurierten Schlüsselwörtern
-        for keyword in keywords:
-            pattern = f'{keyword}[\\s]*=([\\d]+\\.?[\\d]{{0,3}})'
-            match = re.search(pattern, text_cleaned, re.IGNORECASE)
-            if match:
-                height = float(match.group(1))
-                # Prüfe auf realistischen Höhenbereich
-                if 50 <= height <= 1000:  # Erweiteter realistischer Bereich
-                    return height
+        # Erster Treffer je Schlüsselwort; gültig ist der erste im realistischen Bereich in Keyword-Reihenfolge
+        pattern, ranks = self._keyword_pattern(keywords)
+        first_heights = {}
+        for match in pattern.finditer(text_cleaned):
+            first_heights.setdefault(ranks[match.group('keyword').upper()], float(match.group('height')))
+        for rank in sorted(first_heights):
+            height = first_heights[rank]
+            if KEYWORD_HEIGHT_RANGE[0] <= height <= KEYWORD_HEIGHT_RANGE[1]:
+                return height
         
         # Auch ohne Bezeichnung - reine Zahlen in realistischem Bereich
         # Suche nach alleinstehenden Zahlen mit bis zu 3 Nachkommastellen
-        number_match = re.search(r'(?<!\d)(\d{2,3}\.\d{1,3})(?!\d)', text_cleaned)
+        number_match = PLAIN_HEIGHT_PATTERN.search(text_cleaned)
         if number_match:
             height = float(number_match.group(1))
-            if 50 <= height <= 500:  # Realistischer Höhenbereich
+            if PLAIN_HEIGHT_RANGE[0] <= height <= PLAIN_HEIGHT_RANGE[1]:
                 return height
         
         return None
     
+    def extract_height_columns(self, texts, custom_keywords=None):
+        """
+        Vektorisierte Variante von extract_height_from_text und extract_text_coordinates
+        für eine ganze Text-Spalte (gleiche Regeln, ohne Python-Schleife je Text).
+        Jeder unterschiedliche Text wird nur einmal ausgewertet, und jedes Muster läuft nur
+        über Texte, die es treffen können ('[' für Koordinaten, '=' für Schlüsselwörter).
+        Rückgabe: DataFrame mit Index von texts und den Spalten
+            Height  - extrahierte Höhe (NaN ohne gültige Höhe)
+            Keyword - Schlüsselwort des Treffers (None bei Zahl ohne Schlüsselwort)
+            TextX/TextY - Koordinaten aus [x, y] (NaN ohne Angabe)
+        """
+        texts = pd.Series(texts)
+        keywords = custom_keywords if custom_keywords else self.height_keywords
+        codes, uniques = pd.factorize(texts, use_na_sentinel=True)
+        strings = pd.Series(np.asarray(uniques, dtype=object)).astype(str)
+        height = np.full(len(strings), np.nan)
+        keyword = np.full(len(strings), None, dtype=object)
+        coordinates = np.full((len(strings), 2), np.nan)
+        
+        if len(strings):
+            # Koordinaten [x, y] lesen und für die Höhensuche entfernen
+            cleaned = strings.copy()
+            bracketed = strings.str.contains('[', regex=False).to_numpy()
+            if bracketed.any():
+                coordinates[bracketed] = strings[bracketed].str.extract(COORDINATE_PATTERN).astype(float).to_numpy()
+                cleaned[bracketed] = strings[bracketed].str.replace(BRACKET_PATTERN, '', regex=True)
+            
+            # Alle Schlüsselwort-Treffer; je (Text, Schlüsselwort) zählt nur der erste
+            pattern, ranks = self._keyword_pattern(keywords)
+            candidates = np.flatnonzero(cleaned.str.contains('=', regex=False).to_numpy())
+            matches = cleaned.iloc[candidates].reset_index(drop=True).str.extractall(pattern)
+            found = np.zeros(len(strings), dtype=bool)
+            if not matches.empty:
+                match_row = candidates[matches.index.get_level_values(0).to_numpy()]
+                match_rank = matches['keyword'].str.upper().map(ranks).to_numpy(dtype=np.int64)
+                match_height = matches['height'].astype(float).to_numpy()
+                first = ~pd.DataFrame({'row': match_row, 'rank': match_rank}).duplicated().to_numpy()
+                valid = first & (match_height >= KEYWORD_HEIGHT_RANGE[0]) & (match_height <= KEYWORD_HEIGHT_RANGE[1])
+                match_row, match_rank, match_height = match_row[valid], match_rank[valid], match_height[valid]
+                # Je Text der gültige Treffer mit dem kleinsten Rang
+                order = np.lexsort((match_rank, match_row))
+                match_row, match_rank, match_height = match_row[order], match_rank[order], match_height[order]
+                best = np.unique(match_row, return_index=True)[1]
+                found[match_row[best]] = True
+                height[match_row[best]] = match_height[best]
+                keyword[match_row[best]] = np.asarray(keywords, dtype=object)[match_rank[best]]
+            
+            # Rückfall: erste alleinstehende Zahl im realistischen Bereich
+            fallback = np.flatnonzero(~found & cleaned.str.contains('.', regex=False).to_numpy())
+            if len(fallback):
+                plain = cleaned.iloc[fallback].str.extract(PLAIN_HEIGHT_PATTERN)[0].astype(float).to_numpy()
+                height[fallback] = np.where((plain >= PLAIN_HEIGHT_RANGE[0]) & (plain <= PLAIN_HEIGHT_RANGE[1]),
+                                            plain, np.nan)
+        
+        # Ergebnisse der unterschiedlichen Texte auf alle Zeilen verteilen (-1 = fehlender Text)
+        return pd.DataFrame({
+            'Height': np.append(height, np.nan)[codes],
+            'Keyword': np.append(keyword, None)[codes],
+            'TextX': np.append(coordinates[:, 0], np.nan)[codes],
+            'TextY': np.append(coordinates[:, 1], np.nan)[codes]
+        }, index=texts.index)
+    
     def extract_text_coordinates(self, text):
         """Extrahiert Koordinaten aus dem Associated_Text in eckigen Klammern [x, y]."""
         if pd.isna(text) or text is None:
@@ -74,357 +282,570 @@ class HeightAnalysisLogic:
         
         text_str = str(text)
         # Suche nach Koordinaten in eckigen Klammern, z.B. [123.45, 678.90]
-        coord_match = re.search(r'\[(\d+\.?\d*),\s*(\d+\.?\d*)\]', text_str)
+        coord_match = COORDINATE_PATTERN.search(text_str)
         if coord_match:
             return float(coord_match.group(1)), float(coord_match.group(2))
         
         return None, None
+
+    def build_text_elements(self, df, text_matches=None):
+        """
+        Erstellt die Langformat-Tabelle der Textelemente pro Geometrie mit den Spalten
+        GeometryID, TextRow, Text, TextX, TextY, Distance und Height.
+
+        text_matches ist die Treffertabelle aus AnalysisHandler.match_df. Fehlt sie
+        (z.B. bei XLSX-Import), wird die Tabelle einmalig aus Associated_Text erzeugt.
+        """
+        columns = ['GeometryID', 'TextRow', 'Text', 'TextX', 'TextY', 'Distance', 'Height']
+
+        if text_matches is not None and not text_matches.empty:
+            elements = text_matches.reindex(columns=columns).copy()
+        else:
+            # Associated_Text: mehrere Texte durch ';' getrennt, Koordinaten in [x, y]
+            associated = df['Associated_Text'].to_numpy() if 'Associated_Text' in df.columns else np.full(len(df), np.nan)
+            parts = pd.Series(associated, index=df['ID'].to_numpy())
+            parts = parts[parts.notna() & (parts != '')].astype(str).str.split(';').explode().str.strip()
+            parts = parts[parts != '']
+            extracted = self.extract_height_columns(parts)
+            elements = pd.DataFrame({
+                'GeometryID': parts.index.to_numpy(),
+                'TextRow': None,
+                'Text': parts.str.replace(BRACKET_PATTERN, '', regex=True).str.strip().to_numpy(),
+                'TextX': extracted['TextX'].to_numpy(),
+                'TextY': extracted['TextY'].to_numpy(),
+                'Distance': np.nan
+            }, columns=columns)
+
+        if elements.empty:
+            return elements
+
+        # IDs werden in der Z-Analyse als String geführt (siehe validate_and_clean_data)
+        elements['GeometryID'] = elements['GeometryID'].astype(str)
+        elements = elements[elements['GeometryID'].isin(df['ID'].astype(str))]
+        elements['TextX'] = pd.to_numeric(elements['TextX'], errors='coerce')
+        elements['TextY'] = pd.to_numeric(elements['TextY'], errors='coerce')
+        elements['Distance'] = pd.to_numeric(elements['Distance'], errors='coerce')
+        elements['Height'] = self.extract_height_columns(elements['Text'])['Height']
+
+        # Nächster Text zuerst; ohne Distanz bleibt die Reihenfolge erhalten
+        return elements.sort_values(['GeometryID', 'Distance'], kind='stable', na_position='last').reset_index(drop=True)
+
+    def group_text_elements(self, text_elements):
+        """
+        Gruppiert die Textelemente mit gültiger Höhe pro Geometrie.
+        Rückgabe: dict GeometryID -> Array mit Zeilen (Height, TextX, TextY).
+        """
+        if text_elements is None or text_elements.empty:
+            return {}
+        valid = text_elements[text_elements['Height'].notna()]
+        values = valid[['Height', 'TextX', 'TextY']].to_numpy(dtype=float)
+        groups = valid.groupby('GeometryID', sort=False).indices
+        return {entity_id: values[positions] for entity_id, positions in groups.items()}
     
-    def find_connected_lines_and_arcs(self, df_lines_arcs, tolerance=0.01):
+    def find_connected_lines_and_arcs(self, df_lines_arcs, tolerance=0.01, text_elements_by_id=None, include_text=True,
+                                      topology=None):
         """
         Findet zusammenhängende Linien und Bögen basierend auf gemeinsamen Endpunkten.
         Optimiert für Layer-basierte Analyse.
+        text_elements_by_id: Ergebnis von group_text_elements (Höhentexte pro Geometrie).
+        include_text: False, wenn die Texthöhen bereits in StartZ/EndZ stehen (Direkt-Zuordnung).
+        topology: gemeinsames Knotenmodell (NetworkTopology) des gesamten Datensatzes;
+        ohne Angabe wird eines für df_lines_arcs aufgebaut.
         """
-        lines = []
+        arrays = self.layer_arrays(df_lines_arcs, tolerance, text_elements_by_id, include_text, topology)
+        return self.lines_from_arrays(arrays)
+    
+    def layer_arrays(self, df_lines_arcs, tolerance=0.01, text_elements_by_id=None, include_text=True, topology=None):
+        """
+        Kompakte Arrays der gültigen Linien/Bögen eines Layers (Eingabe von lines_from_arrays).
+        Enthält alles, was Verbindungssuche und Propagation brauchen - auch für die Übergabe an
+        einen Worker-Prozess (propagate_layer_arrays), ohne den DataFrame mitzuschicken.
+        'rows' sind die Zeilenpositionen in df_lines_arcs.
+        """
+        text_elements_by_id = text_elements_by_id or {}
         
-        # Erstelle optimierte Datenstruktur für diesen Layer
-        for idx, row in df_lines_arcs.iterrows():
-            if row['EntityType'] in ['LINE', 'ARC']:
-                start_x, start_y = row['StartX'], row['StartY']
-                end_x, end_y = row['EndX'], row['EndY']
-                
-                # Überspringe Linien/Bögen ohne gültige Koordinaten
-                if pd.isna(start_x) or pd.isna(start_y) or pd.isna(end_x) or pd.isna(end_y):
-                    continue
-                
-                lines.append({
-                    'id': row['ID'],
-                    'entity_type': row['EntityType'],
-                    'layer': row.get('Layer', 'DEFAULT'),
-                    'start': (float(start_x), float(start_y)),
-                    'end': (float(end_x), float(end_y)),
-                    'start_z': row.get('StartZ') if pd.notna(row.get('StartZ')) and row.get('StartZ') != 0.0 else np.nan,
-                    'end_z': row.get('EndZ') if pd.notna(row.get('EndZ')) and row.get('EndZ') != 0.0 else np.nan,
-                    'direct_height': row.get('Direct_Height', np.nan),
-                    'text_coords': (row.get('TextX'), row.get('TextY')),
-                    'associated_text': row.get('Associated_Text', ''),  # Hinzugefügt für intelligente Zuweisung
-                    'row_idx': len(lines),  # Index in der lines-Liste
-                    'original_idx': idx  # Behalte Original-Index für Debug
-                })
+        def column(name, default=None):
+            if name in df_lines_arcs.columns:
+                return df_lines_arcs[name].to_numpy()
+            return np.full(len(df_lines_arcs), default, dtype=object)
+        
+        def height(name):
+            values = pd.to_numeric(df_lines_arcs[name], errors='coerce').to_numpy(dtype=float) if name in df_lines_arcs.columns else np.full(len(df_lines_arcs), np.nan)
+            return np.where(values != 0.0, values, np.nan)
+        
+        coords = df_lines_arcs.reindex(columns=['StartX', 'StartY', 'EndX', 'EndY']).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        # Überspringe Linien/Bögen ohne gültige Koordinaten
+        valid = df_lines_arcs['EntityType'].isin(['LINE', 'ARC']).to_numpy() & ~np.isnan(coords).any(axis=1)
+        direct_heights = column('Direct_Height', np.nan) if include_text else np.full(len(df_lines_arcs), np.nan)
+        
+        # Knoten der Endpunkte aus dem gemeinsamen Topologie-Modell
+        if valid.any() and topology is None:
+            topology = NetworkTopology(tolerance).update(df_lines_arcs)
+        ids = column('ID')[valid]
+        start_nodes, end_nodes = topology.row_nodes(df_lines_arcs.index[valid], ids) if valid.any() else (np.empty(0, np.int64),) * 2
+        
+        return {
+            'rows': np.flatnonzero(valid),
+            'index': df_lines_arcs.index[valid].to_numpy(),
+            'id': ids,
+            'entity_type': column('EntityType')[valid],
+            'layer': column('Layer', 'DEFAULT')[valid],
+            'coords': coords[valid],
+            'start_z': height('StartZ')[valid],
+            'end_z': height('EndZ')[valid],
+            'direct_height': direct_heights[valid],
+            'text_x': column('TextX')[valid],
+            'text_y': column('TextY')[valid],
+            'associated_text': column('Associated_Text', '')[valid],
+            'start_node': start_nodes,
+            'end_node': end_nodes,
+            'text_elements': {str(entity_id): text_elements_by_id[str(entity_id)] for entity_id in ids
+                              if str(entity_id) in text_elements_by_id}  # (Height, TextX, TextY)
+        }
+    
+    def lines_from_arrays(self, arrays):
+        """Baut aus layer_arrays die Linienliste und den Verbindungsgraphen (Linien mit gemeinsamem Knoten)."""
+        lines = []
+        empty_elements = np.empty((0, 3))
+        text_elements_by_id = arrays['text_elements']
+        rows = zip(arrays['index'], arrays['id'], arrays['entity_type'], arrays['layer'], arrays['coords'].tolist(),
+                   arrays['start_z'], arrays['end_z'], arrays['direct_height'], arrays['text_x'], arrays['text_y'],
+                   arrays['associated_text'], arrays['start_node'].tolist(), arrays['end_node'].tolist())
+        for idx, entity_id, entity_type, layer, (start_x, start_y, end_x, end_y), start_z, end_z, direct_height, text_x, text_y, associated_text, start_node, end_node in rows:
+            lines.append({
+                'id': entity_id,
+                'entity_type': entity_type,
+                'layer': layer,
+                'start': (start_x, start_y),
+                'end': (end_x, end_y),
+                'start_z': start_z,
+                'end_z': end_z,
+                'direct_height': direct_height,
+                'text_coords': (text_x, text_y),
+                'associated_text': associated_text,
+                'text_elements': text_elements_by_id.get(str(entity_id), empty_elements),  # (Height, TextX, TextY)
+                'row_idx': len(lines),  # Index in der lines-Liste
+                'original_idx': idx,  # Behalte Original-Index für Debug
+                'start_node': start_node,
+                'end_node': end_node
+            })
         
         if not lines:
             return [], {}
         
-        print(f"    🔗 Suche Verbindungen zwischen {len(lines)} Linien/Bögen im Layer...")
+        # Baue Verbindungsgraph auf: Linien mit gemeinsamem Knoten sind verbunden
+        connections = self._node_connections(arrays['start_node'], arrays['end_node'])
         
-        # Baue Verbindungsgrph auf 
-        connections = {}
-        for i, line in enumerate(lines):
-            connections[i] = []
-            
-            # Optimierung: Verwende räumliche Nähe für Vorfilterung
-            for j, other_line in enumerate(lines[i+1:], i+1):  # Vermeide doppelte Prüfungen
-                # Berechne alle möglichen Verbindungen effizient
-                distances = [
-                    self.point_distance(line['start'], other_line['start']),
-                    self.point_distance(line['start'], other_line['end']),
-                    self.point_distance(line['end'], other_line['start']),
-                    self.point_distance(line['end'], other_line['end'])
-                ]
-                
-                min_distance = min(distances)
-                if min_distance <= tolerance:
-                    connections[i].append(j)
-                    # Bidirektionale Verbindung
-                    if j not in connections:
-                        connections[j] = []
-                    connections[j].append(i)
-        
-        # Zähle gefundene Verbindungen
-        total_connections = sum(len(conn) for conn in connections.values()) // 2  # Durch 2 wegen bidirektionaler Zählung
-        print(f"    ✅ {total_connections} Verbindungen gefunden")
+        if propagation_log.isEnabledFor(logging.DEBUG):
+            # Durch 2 wegen bidirektionaler Zählung
+            total_connections = sum(len(conn) for conn in connections.values()) // 2
+            propagation_log.debug("    🔗 %d Verbindungen zwischen %d Linien/Bögen im Layer", total_connections, len(lines))
         
         return lines, connections
     
+    def _node_connections(self, start_nodes, end_nodes):
+        """
+        Verbindungen zwischen Linien/Bögen mit mindestens einem gemeinsamen Knoten.
+        Rückgabe: {Index: aufsteigend sortierte Liste der verbundenen Indizes} für alle Indizes.
+        """
+        line_count = len(start_nodes)
+        endpoints = pd.DataFrame({
+            'node': np.concatenate([start_nodes, end_nodes]),
+            'line': np.tile(np.arange(line_count), 2)
+        })
+        endpoints = endpoints[endpoints['node'] >= 0]
+        pairs = endpoints.merge(endpoints, on='node')[['line_x', 'line_y']].to_numpy()
+        # Bidirektional (beide Richtungen aus dem Merge), ohne Selbstbezug, nach Linie und Nachbar sortiert
+        pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+        counts = np.bincount(pairs[:, 0], minlength=line_count)
+        neighbours = np.split(pairs[:, 1], np.cumsum(counts)[:-1])
+        return {i: neighbours[i].tolist() for i in range(line_count)}
+
     def recalculate_arc_geometry(self, df_processed, arc_idx):
         """
         Berechnet die Bogen-Geometrie neu, wenn Start/End-Z-Werte geändert wurden.
-        Für Bögen wird Center_Z ignoriert und neu berechnet, Radius und Normalvektor werden aktualisiert.
+        Für mehrere Bögen recalculate_arc_geometries verwenden.
+        """
+        self.recalculate_arc_geometries(df_processed, [arc_idx])
+    
+    def recalculate_arc_geometries(self, df_processed, arc_index):
+        """
+        Berechnet die Bogen-Geometrie für mehrere Zeilen (Indexwerte) gesammelt neu.
+        Für Bögen wird Center_Z ignoriert und als Mittel der Endpunkt-Höhen neu berechnet
+        (nur ein Wert vorhanden: dieser), der Radius wird als Mittel der 2D-Abstände
+        Mittelpunkt-Start/Ende aktualisiert. Zeilen ohne Bogen oder ohne Lagekoordinaten bleiben unverändert.
         """
         try:
-            row = df_processed.loc[arc_idx]
-            
-            # Nur für Bögen
-            if row['EntityType'] != 'ARC':
+            arcs = df_processed.loc[pd.Index(arc_index)].reindex(
+                columns=['EntityType', 'StartX', 'StartY', 'StartZ', 'EndX', 'EndY', 'EndZ', 'CenterX', 'CenterY'])
+            xy = arcs[['StartX', 'StartY', 'EndX', 'EndY', 'CenterX', 'CenterY']].apply(
+                pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            arcs = arcs[(arcs['EntityType'] == 'ARC').to_numpy() & ~np.isnan(xy).any(axis=1)]
+            if arcs.empty:
                 return
             
-            # Hol Start- und End-Koordinaten
-            start_x, start_y, start_z = row['StartX'], row['StartY'], row['StartZ']
-            end_x, end_y, end_z = row['EndX'], row['EndY'], row['EndZ']
-            center_x, center_y = row['CenterX'], row['CenterY']
+            start_x, start_y, end_x, end_y, center_x, center_y = arcs[
+                ['StartX', 'StartY', 'EndX', 'EndY', 'CenterX', 'CenterY']].to_numpy(dtype=float).T
+            start_z = pd.to_numeric(arcs['StartZ'], errors='coerce').to_numpy(dtype=float)
+            end_z = pd.to_numeric(arcs['EndZ'], errors='coerce').to_numpy(dtype=float)
             
-            # Überspringe wenn kritische Koordinaten fehlen
-            if any(pd.isna(val) for val in [start_x, start_y, end_x, end_y, center_x, center_y]):
-                return
-            
-            # Berechne neuen Radius (2D, da Z-Koordinaten variieren können)
+            # Neuer Radius (2D, da Z-Koordinaten variieren können): Durchschnitt aus Start und Ende
             radius_start = np.sqrt((start_x - center_x)**2 + (start_y - center_y)**2)
             radius_end = np.sqrt((end_x - center_x)**2 + (end_y - center_y)**2)
-            new_radius = (radius_start + radius_end) / 2  # Durchschnitt
-            
-            # Berechne Center_Z als Durchschnitt von Start und End
-            new_center_z = None
-            if pd.notna(start_z) and pd.notna(end_z):
-                new_center_z = (start_z + end_z) / 2
-                df_processed.loc[arc_idx, 'CenterZ'] = new_center_z
-                df_processed.loc[arc_idx, 'CenterZ_Status'] = 'Berechnet'
-            elif pd.notna(start_z):
-                # Wenn nur Start-Z vorhanden, verwende diesen
-                new_center_z = start_z
-                df_processed.loc[arc_idx, 'CenterZ'] = new_center_z
-                df_processed.loc[arc_idx, 'CenterZ_Status'] = 'Berechnet'
-            elif pd.notna(end_z):
-                # Wenn nur End-Z vorhanden, verwende diesen
-                new_center_z = end_z
-                df_processed.loc[arc_idx, 'CenterZ'] = new_center_z
-                df_processed.loc[arc_idx, 'CenterZ_Status'] = 'Berechnet'
+            df_processed.loc[arcs.index, 'Radius'] = (radius_start + radius_end) / 2
             
-            # Aktualisiere Radius
-            df_processed.loc[arc_idx, 'Radius'] = new_radius
-            
-            # Log-Meldung nur wenn CenterZ berechnet wurde
-            if new_center_z is not None:
-                print(f"    Bogen {row['ID']}: Radius={new_radius:.4f}, CenterZ={new_center_z:.4f}")
-            else:
-                print(f"    Bogen {row['ID']}: Radius={new_radius:.4f}, CenterZ=unverändert (keine Z-Werte)")
+            # Center_Z nur setzen, wenn mindestens eine Endpunkt-Höhe vorhanden ist
+            center_z = center_heights(start_z, end_z)
+            has_center = ~np.isnan(center_z)
+            df_processed.loc[arcs.index[has_center], 'CenterZ'] = center_z[has_center]
+            df_processed.loc[arcs.index[has_center], 'CenterZ_Status'] = 'Berechnet'
             
+            arc_log.debug("    %d Bögen neu berechnet (%d mit CenterZ)", len(arcs), int(has_center.sum()))
+        
         except Exception as e:
-            print(f"    Fehler bei Bogen-Neuberechnung für ID {row.get('ID', 'unknown')}: {e}")
+            arc_log.warning("    Fehler bei Bogen-Neuberechnung: %s", e)
     
     def find_connected_lines(self, df_lines, tolerance=0.01):
         """Legacy-Methode - wird durch find_connected_lines_and_arcs ersetzt."""
         return self.find_connected_lines_and_arcs(df_lines, tolerance)
     
-    def point_distance(self, p1, p2):
-        """Berechnet die Distanz zwischen zwei Punkten."""
-        return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-    
-    def assign_height_to_line_endpoints(self, line, text_height, text_coords):
-        """Weist einer Linie die Höhe zu, basierend auf der Nähe zu den Textkoordinaten."""
-        if text_coords[0] is None or text_coords[1] is None:
-            # Wenn keine Textkoordinaten vorhanden, prüfe ob mehrere Texte im Associated_Text stehen
-            associated_text = line.get('associated_text', '')
-            if ';' in str(associated_text):
-                # Mehrere Texte vorhanden - parse sie separat
-                start_height, end_height = self.parse_text_elements_for_line_arc(
-                    associated_text, 
-                    line['start'][0], line['start'][1], 
-                    line['end'][0], line['end'][1]
-                )
-                return start_height if start_height else text_height, end_height if end_height else text_height
-            else:
-                # Nur ein Text - beide Endpunkte gleich setzen
-                return text_height, text_height
-        
-        # Berechne Distanz des Texts zu Start- und Endpunkt
-        start_dist = self.point_distance((line['start'][0], line['start'][1]), text_coords)
-        end_dist = self.point_distance((line['end'][0], line['end'][1]), text_coords)
-        
-        if start_dist <= end_dist:
-            # Text ist näher am Startpunkt
-            return text_height, np.nan
-        else:
-            # Text ist näher am Endpunkt
-            return np.nan, text_height
-    
-    def propagate_heights_along_network(self, lines, connections):
+    def text_nearer_to_start(self, lines):
         """
-        Propagiert Höhen entlang des Liniennetzwerks.
+        Für alle Linien auf einmal: liegt die Textposition (text_coords) näher am Start- als am
+        Endpunkt (bei Gleichstand Start)? Rückgabe: (nearer_to_start, has_coords) als Arrays.
         """
         if not lines:
-            return lines
-        
-        max_iterations = 20  # Erhöht für komplexere Netzwerke
-        tolerance = 0.01
-        
-        print(f"    Starte Höhenpropagation ({len(lines)} Linien)...")
-        
-        # Erste Phase: Text-Höhen zuweisen
+            return np.empty(0, dtype=bool), np.empty(0, dtype=bool)
+        starts = np.array([line['start'] for line in lines], dtype=float)
+        ends = np.array([line['end'] for line in lines], dtype=float)
+        text_xy = np.array([line['text_coords'] for line in lines], dtype=float)
+        has_coords = ~np.isnan(text_xy).any(axis=1)
+        start_dist = np.sqrt((starts[:, 0] - text_xy[:, 0])**2 + (starts[:, 1] - text_xy[:, 1])**2)
+        end_dist = np.sqrt((ends[:, 0] - text_xy[:, 0])**2 + (ends[:, 1] - text_xy[:, 1])**2)
+        return start_dist <= end_dist, has_coords
+    
+    def assign_text_elements_to_endpoints(self, text_elements, start, end):
+        """
+        Ordnet mehrere Höhentexte (Zeilen Height, TextX, TextY) dem Start- und
+        Endpunkt nach Distanz zu. Ohne Koordinaten: erster Text für Start, letzter für End.
+        """
+        heights = text_elements[:, 0]
+        text_xy = text_elements[:, 1:3]
+        has_coords = ~np.isnan(text_xy).any(axis=1)
+
+        if not has_coords.any():
+            return heights[0], heights[-1]
+
+        start_dist = np.where(has_coords, np.hypot(text_xy[:, 0] - start[0], text_xy[:, 1] - start[1]), np.inf)
+        end_dist = np.where(has_coords, np.hypot(text_xy[:, 0] - end[0], text_xy[:, 1] - end[1]), np.inf)
+        return heights[np.argmin(start_dist)], heights[np.argmin(end_dist)]
+
+    def assign_heights_direct(self, df_processed, text_elements=None, tolerance=0.01, max_distance=None,
+                              node_capacity=None, excluded_statuses=None):
+        """
+        Direkt-Zuordnung: jeder Höhentext geht an den nächstgelegenen Knoten (Topologie-Knoten
+        der LINE/ARC-Endpunkte oder Kreismittelpunkt) und wird direkt in StartZ/EndZ/CenterZ
+        aller Punkte dieses Knotens geschrieben.
+
+        Knoten: Endpunkte aus dem gemeinsamen Topologie-Modell (get_topology, Toleranz
+        tolerance); Kreismittelpunkte gehören zum Topologie-Knoten innerhalb der Toleranz,
+        sonst bilden zusammenfallende Mittelpunkte einen eigenen Knoten.
+        Regeln:
+        - ein Text belegt genau einen Knoten
+        - node_capacity: Texte je Knoten (Standard self.direct_node_capacity = 1); weitere
+          Texte weichen auf ihren nächsten freien Knoten aus. Nimmt ein Knoten mehrere Texte
+          auf, bestimmt der nächstgelegene die Höhe.
+        - excluded_statuses: Punkte mit diesem Z-Status werden nicht überschrieben
+          (Standard self.direct_excluded_statuses = 'Original', 'Manuell')
+        - max_distance begrenzt den Abstand Text–Knoten
+        Geprüft werden je Text die DIRECT_CANDIDATES nächsten Knoten.
+        Die Zuordnungen stehen anschließend in self.text_assignment_table.
+        """
+        if text_elements is None:
+            text_elements = self.text_elements
+        if node_capacity is None:
+            node_capacity = self.direct_node_capacity
+        if excluded_statuses is None:
+            excluded_statuses = self.direct_excluded_statuses
+        if node_capacity < 1:
+            raise ValueError(f"Ungültige Knotenkapazität: {node_capacity}")
+        self.text_assignment_table = pd.DataFrame()
+        if text_elements is None or text_elements.empty:
+            return df_processed
+
+        # Höhentexte mit Position; derselbe Text an mehreren Geometrien zählt einmal
+        texts = text_elements[text_elements['Height'].notna() & text_elements['TextX'].notna() & text_elements['TextY'].notna()]
+        texts = texts.drop_duplicates(['Text', 'TextX', 'TextY']).reset_index(drop=True)
+        if texts.empty:
+            text_log.warning("⚠️ Direkt-Zuordnung: keine Höhentexte mit Position gefunden")
+            return df_processed
+        text_xy = texts[['TextX', 'TextY']].to_numpy(dtype=float)
+
+        # Knoten je Punkt: Start/End von Linien und Bögen aus der Topologie, Kreismittelpunkte dazu
+        topology = self.get_topology(df_processed, tolerance)
+        start_nodes, end_nodes = topology.row_nodes(df_processed.index)
+        center_xy = df_processed[['CenterX', 'CenterY']].to_numpy(dtype=float) \
+            if {'CenterX', 'CenterY'} <= set(df_processed.columns) else np.full((len(df_processed), 2), np.nan)
+        circle_rows = np.flatnonzero((df_processed['EntityType'].to_numpy() == 'CIRCLE') & ~np.isnan(center_xy).any(axis=1))
+        center_nodes = np.full(len(df_processed), -1, dtype=np.int64)
+        center_nodes[circle_rows] = self._circle_nodes(topology, center_xy[circle_rows], tolerance)
+        topology_xy = topology.nodes[['X', 'Y']].to_numpy(dtype=float)
+
+        point_rows, point_slots, point_nodes = [], [], []
+        for z_col, nodes in (('StartZ', start_nodes), ('EndZ', end_nodes), ('CenterZ', center_nodes)):
+            status = df_processed[f'{z_col}_Status'].to_numpy() if f'{z_col}_Status' in df_processed.columns \
+                else np.full(len(df_processed), '', dtype=object)
+            rows = np.flatnonzero((nodes >= 0) & ~np.isin(status, list(excluded_statuses)))
+            point_rows.append(rows)
+            point_slots.append(np.full(len(rows), z_col, dtype=object))
+            point_nodes.append(nodes[rows])
+        point_rows = np.concatenate(point_rows)
+        point_slots = np.concatenate(point_slots)
+        if len(point_rows) == 0:
+            return df_processed
+
+        # Nur Knoten mit mindestens einem beschreibbaren Punkt; Lage aus Topologie bzw. Kreismittelpunkt
+        used_nodes, node_of_point = np.unique(np.concatenate(point_nodes), return_inverse=True)
+        node_of_point = node_of_point.ravel()
+        node_count = len(used_nodes)
+        circle_node = center_nodes[circle_rows] - len(topology_xy)
+        own = circle_node >= 0
+        circle_count = np.bincount(circle_node[own], minlength=1)
+        circle_xy = np.column_stack([np.bincount(circle_node[own], weights=center_xy[circle_rows][own, axis], minlength=1)
+                                     for axis in (0, 1)]) / np.maximum(circle_count, 1)[:, None]
+        node_xy = np.vstack([topology_xy, circle_xy])[used_nodes]
+        point_xy = node_xy[node_of_point]
+
+        # Kandidaten: die nächsten Knoten je Text in einer Abfrage
+        k = min(DIRECT_CANDIDATES, node_count)
+        dist, nodes = cKDTree(node_xy).query(
+            text_xy, k=k, distance_upper_bound=max_distance if max_distance is not None else np.inf
+        )
+        dist = dist.reshape(len(text_xy), k)
+        nodes = nodes.reshape(len(text_xy), k)
+        found = np.isfinite(dist)
+        pair_text = np.repeat(np.arange(len(text_xy)), k)[found.ravel()]
+        pair_node = nodes[found]
+        pair_dist = dist[found]
+
+        text_of_node, node_of_text = self._assign_texts_to_nodes(pair_text, pair_node, pair_dist, node_count,
+                                                                 node_capacity)
+
+        # Höhen in die Punkte schreiben
+        point_text = text_of_node[node_of_point]
+        assigned = point_text >= 0
+        heights = texts['Height'].to_numpy(dtype=float)
+        for z_col in ('StartZ', 'EndZ', 'CenterZ'):
+            slot = assigned & (point_slots == z_col)
+            if not slot.any():
+                continue
+            rows = point_rows[slot]
+            values = df_processed[z_col].to_numpy(dtype=float, copy=True)
+            values[rows] = heights[point_text[slot]]
+            df_processed[z_col] = values
+            status = df_processed[f'{z_col}_Status'].to_numpy(dtype=object, copy=True)
+            status[rows] = 'Text'
+            df_processed[f'{z_col}_Status'] = status
+
+        text_idx = point_text[assigned]
+        point_dist = np.hypot(*(point_xy[assigned] - text_xy[text_idx]).T)
+        self.text_assignment_table = pd.DataFrame({
+            'TextID': 'T' + pd.Series(text_idx + 1).astype(str),
+            'Text': texts['Text'].to_numpy()[text_idx],
+            'Height': heights[text_idx],
+            'TextX': text_xy[text_idx, 0],
+            'TextY': text_xy[text_idx, 1],
+            'AssignedEntityID': df_processed['ID'].to_numpy()[point_rows[assigned]],
+            'AssignedTo': point_slots[assigned],
+            'Distance': point_dist
+        })
+
+        text_log.info("🎯 Direkt-Zuordnung: %d von %d Höhentexten auf %d Knoten, %d Punkte geschrieben",
+                      int((node_of_text >= 0).sum()), len(texts), int((text_of_node >= 0).sum()), int(assigned.sum()))
+        return df_processed
+
+    def _circle_nodes(self, topology, center_xy, tolerance):
+        """
+        Knotennummern der Kreismittelpunkte: der Topologie-Knoten innerhalb der Toleranz,
+        sonst fortlaufende Nummern ab len(topology.nodes); Mittelpunkte innerhalb der
+        Toleranz (transitiv) teilen sich einen Knoten.
+        """
+        node_count = len(topology.nodes)
+        nodes = np.full(len(center_xy), -1, dtype=np.int64)
+        if len(center_xy) == 0:
+            return nodes
+        if node_count:
+            dist, nearest = cKDTree(topology.nodes[['X', 'Y']].to_numpy(dtype=float)).query(
+                center_xy, distance_upper_bound=tolerance)
+            on_topology = np.isfinite(dist)
+            nodes[on_topology] = nearest[on_topology]
+        free = np.flatnonzero(nodes < 0)
+        if len(free):
+            pairs = cKDTree(center_xy[free]).query_pairs(tolerance, output_type='ndarray')
+            graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(free), len(free)))
+            nodes[free] = node_count + connected_components(graph, directed=False)[1]
+        return nodes
+
+    def _assign_texts_to_nodes(self, pair_text, pair_node, pair_dist, node_count, capacity=1):
+        """
+        Ordnet Kandidatenpaare (Text, Knoten, Abstand) zu: in jeder Runde schlägt jeder offene
+        Text seinen nächsten Knoten mit freier Kapazität vor, jeder Knoten nimmt die
+        nächstgelegenen Vorschläge bis zu seiner Kapazität an.
+        Rückgabe: (nächstgelegener Text je Knoten, Knoten je Text; -1 = frei bzw. ohne Knoten).
+        """
+        text_count = pair_text.max() + 1 if len(pair_text) else 0
+        node_of_text = np.full(text_count, -1)
+        text_of_node = np.full(node_count, -1)
+        best_dist = np.full(node_count, np.inf)
+        load = np.zeros(node_count, dtype=np.int64)
+        open_pairs = np.lexsort((pair_dist, pair_text))
+        while len(open_pairs):
+            first = np.unique(pair_text[open_pairs], return_index=True)[1]
+            proposals = open_pairs[first]
+            # Je Knoten gewinnen die nächstgelegenen Vorschläge bis zur freien Kapazität
+            proposals = proposals[np.lexsort((pair_dist[proposals], pair_node[proposals]))]
+            proposal_nodes = pair_node[proposals]
+            group_start = np.unique(proposal_nodes, return_index=True)[1]
+            rank = np.arange(len(proposals)) - np.repeat(group_start, np.diff(np.append(group_start, len(proposals))))
+            winners = proposals[rank < capacity - load[proposal_nodes]]
+            node_of_text[pair_text[winners]] = pair_node[winners]
+            np.add.at(load, pair_node[winners], 1)
+            # Die Höhe eines Knotens bestimmt der nächstgelegene angenommene Text
+            nearest = winners[np.unique(pair_node[winners], return_index=True)[1]]
+            nearest = nearest[pair_dist[nearest] < best_dist[pair_node[nearest]]]
+            text_of_node[pair_node[nearest]] = pair_text[nearest]
+            best_dist[pair_node[nearest]] = pair_dist[nearest]
+
+            open_pairs = open_pairs[(node_of_text[pair_text[open_pairs]] < 0) & (load[pair_node[open_pairs]] < capacity)]
+        return text_of_node, node_of_text
+
+    def _assign_text_heights(self, lines):
+        """Erste Phase der Propagation: Text-Höhen auf Start-/Endpunkte der Linien verteilen."""
+        nearer_to_start, has_coords = self.text_nearer_to_start(lines)
         for i, line in enumerate(lines):
             if pd.notna(line['direct_height']):
-                # Debug: Zeige Associated_Text für alle Linien
-                if line['id'] in ['7F14', '7F0D', 'AB8']:  # Erweitere Debug
-                    print(f"        🐛 DEBUG ID {line['id']}: Associated_Text = '{line.get('associated_text', 'NONE')}'")
-                    print(f"        🐛 DEBUG ID {line['id']}: direct_height = {line['direct_height']}")
-                    print(f"        🐛 DEBUG ID {line['id']}: text_coords = {line['text_coords']}")
+                propagation_log.debug("        🐛 ID %s: Associated_Text = '%s', direct_height = %s, text_coords = %s",
+                                      line['id'], line.get('associated_text', 'NONE'), line['direct_height'],
+                                      line['text_coords'])
                 
-                # Prüfe zuerst, ob mehrere Textelemente im Associated_Text vorhanden sind
-                associated_text = line.get('associated_text', '')
-                if ';' in str(associated_text) and associated_text:
-                    # Mehrere Texte vorhanden - parse sie direkt
-                    start_z, end_z = self.parse_text_elements_for_line_arc(
-                        associated_text, 
-                        line['start'][0], line['start'][1], 
-                        line['end'][0], line['end'][1]
+                # Prüfe zuerst, ob mehrere Höhentexte zugeordnet sind
+                text_elements = line['text_elements']
+                if len(text_elements) > 1:
+                    # Mehrere Texte vorhanden - nach Distanz auf Start/End verteilen
+                    start_z, end_z = self.assign_text_elements_to_endpoints(
+                        text_elements, line['start'], line['end']
                     )
-                    print(f"        📝 Mehrere Texte erkannt für ID {line['id']}: '{associated_text}'")
-                    print(f"        📝 Zugewiesene Höhen: StartZ={start_z}, EndZ={end_z}")
+                    propagation_log.debug("        📝 %d Höhentexte für ID %s: StartZ=%s, EndZ=%s",
+                                          len(text_elements), line['id'], start_z, end_z)
+                elif not has_coords[i]:
+                    # Nur ein Text ohne Koordinaten - beide Endpunkte gleich setzen
+                    start_z, end_z = line['direct_height'], line['direct_height']
+                elif nearer_to_start[i]:
+                    # Nur ein Text - an den näheren Endpunkt
+                    start_z, end_z = line['direct_height'], np.nan
                 else:
-                    # Nur ein Text - verwende intelligente Einzelzuweisung
-                    start_z, end_z = self.assign_height_to_line_endpoints(
-                        line, line['direct_height'], line['text_coords']
-                    )
+                    start_z, end_z = np.nan, line['direct_height']
                 
                 if pd.notna(start_z):
                     line['start_z'] = start_z
-                    print(f"        Text-Höhe: ID {line['id']} StartZ = {start_z}")
+                    propagation_log.debug("        Text-Höhe: ID %s StartZ = %s", line['id'], start_z)
                 
                 if pd.notna(end_z):
                     line['end_z'] = end_z
-                    print(f"        Text-Höhe: ID {line['id']} EndZ = {end_z}")
+                    propagation_log.debug("        Text-Höhe: ID %s EndZ = %s", line['id'], end_z)
                     
                 # Wenn beide NaN sind (sollte nicht passieren), setze beide auf direct_height
                 if pd.isna(start_z) and pd.isna(end_z):
                     line['start_z'] = line['direct_height']
                     line['end_z'] = line['direct_height']
-                    print(f"        Text-Höhe: ID {line['id']} StartZ = EndZ = {line['direct_height']}")
+                    propagation_log.debug("        Text-Höhe: ID %s StartZ = EndZ = %s", line['id'], line['direct_height'])
+
+    def propagate_heights_along_network(self, lines, connections):
+        """
+        Propagiert Höhen entlang des Liniennetzwerks in einem Durchlauf:
+        1. Text-Höhen auf die Endpunkte verteilen (_assign_text_heights).
+        2. Je Topologie-Knoten einmal: offene Endpunkte übernehmen die Höhe der Linie mit dem
+           kleinsten Index, die an diesem Knoten bereits eine Höhe hat. Vorhandene Höhen werden
+           nicht überschrieben.
+        Das entspricht dem Ergebnis der ursprünglichen iterativen Durchläufe in Linienreihenfolge
+        (Referenz: benchmarks/baseline_propagation.py), in O(V+E) statt bis zu 20 Durchläufen.
+        Die Knoten stammen aus find_connected_lines_and_arcs ('start_node'/'end_node');
+        connections wird nur noch vom Referenzverfahren benötigt.
+        """
+        if not lines:
+            return lines
         
-        # Zweite Phase: Iterative Netzwerk-Propagation
-        for iteration in range(max_iterations):
-            changes_made = False
-            changes_this_iteration = 0
-            
-            for i, line in enumerate(lines):
-                # Propagiere Höhen zu verbundenen Linien
-                for connected_idx in connections.get(i, []):
-                    if connected_idx >= len(lines):
-                        continue
-                        
-                    connected_line = lines[connected_idx]
-                    
-                    # Finde gemeinsame Punkte und übertrage Höhen
-                    # Start-Start Verbindung
-                    if self.point_distance(line['start'], connected_line['start']) <= tolerance:
-                        if pd.notna(line['start_z']) and pd.isna(connected_line['start_z']):
-                            connected_line['start_z'] = line['start_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 Start→Start: ID {connected_line['id']} erhält StartZ = {line['start_z']} von ID {line['id']}")
-                        elif pd.notna(connected_line['start_z']) and pd.isna(line['start_z']):
-                            line['start_z'] = connected_line['start_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 Start←Start: ID {line['id']} erhält StartZ = {connected_line['start_z']} von ID {connected_line['id']}")
-                    
-                    # Start-End Verbindung
-                    elif self.point_distance(line['start'], connected_line['end']) <= tolerance:
-                        if pd.notna(line['start_z']) and pd.isna(connected_line['end_z']):
-                            connected_line['end_z'] = line['start_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 Start→End: ID {connected_line['id']} erhält EndZ = {line['start_z']} von ID {line['id']}")
-                        elif pd.notna(connected_line['end_z']) and pd.isna(line['start_z']):
-                            line['start_z'] = connected_line['end_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 Start←End: ID {line['id']} erhält StartZ = {connected_line['end_z']} von ID {connected_line['id']}")
-                    
-                    # End-Start Verbindung
-                    elif self.point_distance(line['end'], connected_line['start']) <= tolerance:
-                        if pd.notna(line['end_z']) and pd.isna(connected_line['start_z']):
-                            connected_line['start_z'] = line['end_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 End→Start: ID {connected_line['id']} erhält StartZ = {line['end_z']} von ID {line['id']}")
-                        elif pd.notna(connected_line['start_z']) and pd.isna(line['end_z']):
-                            line['end_z'] = connected_line['start_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 End←Start: ID {line['id']} erhält EndZ = {connected_line['start_z']} von ID {connected_line['id']}")
-                    
-                    # End-End Verbindung
-                    elif self.point_distance(line['end'], connected_line['end']) <= tolerance:
-                        if pd.notna(line['end_z']) and pd.isna(connected_line['end_z']):
-                            connected_line['end_z'] = line['end_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 End→End: ID {connected_line['id']} erhält EndZ = {line['end_z']} von ID {line['id']}")
-                        elif pd.notna(connected_line['end_z']) and pd.isna(line['end_z']):
-                            line['end_z'] = connected_line['end_z']
-                            changes_made = True
-                            changes_this_iteration += 1
-                            print(f"        📍 End←End: ID {line['id']} erhält EndZ = {connected_line['end_z']} von ID {connected_line['id']}")
-            
-            print(f"      Iteration {iteration + 1}: {changes_this_iteration} Änderungen")
-            
-            if not changes_made:
-                print(f"   Konvergiert nach {iteration + 1} Iterationen")
-                break
+        propagation_log.debug("    Starte Höhenpropagation (%d Linien)...", len(lines))
+        self._assign_text_heights(lines)
         
-        # Dritte Phase: Lineare Interpolation für noch offene Endpunkte
-        for iteration in range(3):  # Maximal 3 Iterationen für Interpolation
-            changes_made = False
-            
-            for line in lines:
-                if pd.notna(line['start_z']) and pd.isna(line['end_z']):
-                    # Suche nach einer verbundenen Linie, die eine Höhe für den Endpunkt liefern kann
-                    for connected_idx in connections.get(line['row_idx'], []):
-                        if connected_idx >= len(lines):
-                            continue
-                        connected_line = lines[connected_idx]
-                        
-                        # Prüfe, ob eine Interpolation möglich ist
-                        if (pd.notna(connected_line['start_z']) and pd.notna(connected_line['end_z'])):
-                            # Bestimme, welcher Punkt der verbundenen Linie der Endpunkt unserer Linie ist
-                            end_point = line['end']
-                            if self.point_distance(end_point, connected_line['start']) <= tolerance:
-                                line['end_z'] = connected_line['start_z']
-                                changes_made = True
-                                print(f"        🔗 Interpolation: ID {line['id']} EndZ = {connected_line['start_z']} (von verbundener Linie)")
-                                break
-                            elif self.point_distance(end_point, connected_line['end']) <= tolerance:
-                                line['end_z'] = connected_line['end_z']
-                                changes_made = True
-                                print(f"        🔗 Interpolation: ID {line['id']} EndZ = {connected_line['end_z']} (von verbundener Linie)")
-                                break
-                
-                elif pd.isna(line['start_z']) and pd.notna(line['end_z']):
-                    # Suche nach einer verbundenen Linie, die eine Höhe für den Startpunkt liefern kann
-                    for connected_idx in connections.get(line['row_idx'], []):
-                        if connected_idx >= len(lines):
-                            continue
-                        connected_line = lines[connected_idx]
-                        
-                        # Prüfe, ob eine Interpolation möglich ist
-                        if (pd.notna(connected_line['start_z']) and pd.notna(connected_line['end_z'])):
-                            # Bestimme, welcher Punkt der verbundenen Linie der Startpunkt unserer Linie ist
-                            start_point = line['start']
-                            if self.point_distance(start_point, connected_line['start']) <= tolerance:
-                                line['start_z'] = connected_line['start_z']
-                                changes_made = True
-                                print(f"        🔗 Interpolation: ID {line['id']} StartZ = {connected_line['start_z']} (von verbundener Linie)")
-                                break
-                            elif self.point_distance(start_point, connected_line['end']) <= tolerance:
-                                line['start_z'] = connected_line['end_z']
-                                changes_made = True
-                                print(f"        🔗 Interpolation: ID {line['id']} StartZ = {connected_line['end_z']} (von verbundener Linie)")
-                                break
-            
-            if not changes_made:
-                break
+        # Endpunkte als Tabelle: je Linie Start und Ende, in Linienreihenfolge
+        nodes = np.array([(line['start_node'], line['end_node']) for line in lines], dtype=np.int64).ravel()
+        heights = np.array([(line['start_z'], line['end_z']) for line in lines], dtype=float).ravel()
+        
+        open_points, source_count = self._fill_from_nodes(nodes, heights, np.isnan(heights))
+        
+        for point in open_points.tolist():
+            lines[point // 2]['start_z' if point % 2 == 0 else 'end_z'] = heights[point]
+        propagation_log.debug("    🔁 %d Endpunkt-Höhen über %d Knoten propagiert", len(open_points), source_count)
         
         # Zähle finale Ergebnisse
-        assigned_heights = sum(1 for line in lines if pd.notna(line['start_z']) or pd.notna(line['end_z']))
-        print(f"    📊 {assigned_heights} von {len(lines)} Linien haben Höhen erhalten")
+        if propagation_log.isEnabledFor(logging.DEBUG):
+            assigned_heights = int((~np.isnan(heights.reshape(-1, 2))).any(axis=1).sum())
+            propagation_log.debug("    📊 %d von %d Linien haben Höhen erhalten", assigned_heights, len(lines))
         
         return lines
 
+    def _fill_from_nodes(self, nodes, heights, fillable):
+        """
+        Kern der Propagation auf verschränkten Endpunkt-Arrays (Start, Ende, Start, ...):
+        Endpunkte mit fillable übernehmen an ihrem Knoten die erste bekannte Höhe
+        (kleinster Index, Start vor Ende). heights wird direkt geändert.
+        Rückgabe: (gefüllte Positionen, Anzahl Knoten mit bekannter Höhe).
+        """
+        # Erste bekannte Höhe je Knoten (kleinster Linienindex, Start vor Ende)
+        known = np.flatnonzero(~np.isnan(heights) & (nodes >= 0))
+        known = known[np.argsort(nodes[known], kind='stable')]
+        known_nodes, first = np.unique(nodes[known], return_index=True)
+        
+        # Offene Endpunkte an Knoten mit bekannter Höhe füllen
+        open_points = np.flatnonzero(fillable & np.isin(nodes, known_nodes))
+        heights[open_points] = heights[known[first][np.searchsorted(known_nodes, nodes[open_points])]]
+        return open_points, len(known_nodes)
+    
+    def propagate_arrays(self, arrays):
+        """
+        Verbindungssuche und Propagation auf den Arrays eines Layers (layer_arrays).
+        Rückgabe: (start_z, end_z) je Linie in Reihenfolge der Arrays.
+        """
+        lines, connections = self.lines_from_arrays(arrays)
+        lines = self.propagate_heights_along_network(lines, connections)
+        return (np.array([line['start_z'] for line in lines], dtype=float),
+                np.array([line['end_z'] for line in lines], dtype=float))
 
-    def prepare_data_for_line_interpolation(self, df_original):
+    def prepare_data_for_line_interpolation(self, df_original, text_matches=None, assignment_engine='network',
+                                            interpolation_mode='copy', consensus_mode='mean', execution_mode='serial',
+                                            max_workers=None):
         """
         Überarbeitete Methode mit intelligenter Text-Zuordnung.
+        text_matches: Langformat-Treffertabelle aus der Geometrie-Text-Analyse (optional).
+        assignment_engine: 'network' (Standard) oder 'direct' (siehe assign_heights_direct).
+        interpolation_mode: 'copy' (Standard) oder 'gradient' (siehe interpolate_gradient).
+        consensus_mode: 'mean' (Standard), 'median' oder 'flag' (siehe ensure_coordinate_consistency).
+        execution_mode: 'serial' (Standard) oder 'process' (Layer parallel, max_workers Prozesse,
+        ohne Angabe einer je CPU-Kern; siehe propagate_layers).
+        Laufzeit und Zähler je Stufe stehen anschließend in self.stage_stats.
         """
+        if assignment_engine not in ASSIGNMENT_ENGINES:
+            raise ValueError(f"Unbekanntes Zuordnungsverfahren: {assignment_engine}")
+        if interpolation_mode not in INTERPOLATION_MODES:
+            raise ValueError(f"Unbekannter Interpolationsmodus: {interpolation_mode}")
+        if consensus_mode not in CONSENSUS_MODES:
+            raise ValueError(f"Unbekannter Konsensmodus: {consensus_mode}")
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unbekannter Ausführungsmodus: {execution_mode}")
         df_processed = df_original.copy()
+        self.stage_stats = {}
+        total = PipelineStage(pipeline_log, 'Z-Pipeline gesamt', self.stage_stats).start()
 
         # Basis-Setup (wie vorher)
         for col in ['StartZ', 'EndZ', 'CenterZ']:
@@ -433,19 +854,21 @@ class HeightAnalysisLogic:
             else:
                 df_processed[col] = pd.to_numeric(df_processed[col], errors='coerce')
 
-        # HINZUFÜGEN: Erstelle Direct_Height-Spalte aus Associated_Text
-        print("📝 Extrahiere Höhen aus Associated_Text...")
-        df_processed['Direct_Height'] = df_processed['Associated_Text'].apply(self.extract_height_from_text)
-        df_processed['TextX'] = np.nan
-        df_processed['TextY'] = np.nan
+        # Textelemente als Langformat-Tabelle (ein Eintrag pro Geometrie-Text-Treffer)
+        with PipelineStage(text_log, 'Textextraktion', self.stage_stats) as stage:
+            self.text_elements = self.build_text_elements(df_processed, text_matches)
+            text_elements_by_id = self.group_text_elements(self.text_elements)
 
-        # Extrahiere auch Text-Koordinaten
-        for idx, row in df_processed.iterrows():
-            if pd.notna(row['Associated_Text']):
-                text_x, text_y = self.extract_text_coordinates(row['Associated_Text'])
-                if text_x is not None and text_y is not None:
-                    df_processed.loc[idx, 'TextX'] = text_x
-                    df_processed.loc[idx, 'TextY'] = text_y
+            # Direct_Height und TextX/TextY vom nächstgelegenen Höhentext je Geometrie
+            nearest = self.text_elements[self.text_elements['Height'].notna()].drop_duplicates('GeometryID') \
+                if not self.text_elements.empty else pd.DataFrame(columns=['GeometryID', 'Height', 'TextX', 'TextY'])
+            nearest = nearest.set_index('GeometryID')
+            entity_ids = df_processed['ID'].astype(str)
+            df_processed['Direct_Height'] = entity_ids.map(nearest['Height']).astype(float)
+            df_processed['TextX'] = entity_ids.map(nearest['TextX']).astype(float)
+            df_processed['TextY'] = entity_ids.map(nearest['TextY']).astype(float)
+            stage.count('Textelemente', len(self.text_elements))
+            stage.count('Geometrien mit Höhe', len(nearest))
 
 
         # Erstelle Statusspalten
@@ -474,157 +897,374 @@ class HeightAnalysisLogic:
         unrealistic_center = df_processed['CenterZ'].notna() & (df_processed['CenterZ'] != 0) & (~center_original)
         
         if unrealistic_start.any():
-            print(f"⚠️ {unrealistic_start.sum()} unrealistische StartZ-Werte werden ignoriert")
+            pipeline_log.warning("⚠️ %d unrealistische StartZ-Werte werden ignoriert", unrealistic_start.sum())
             df_processed.loc[unrealistic_start, 'StartZ'] = np.nan
         if unrealistic_end.any():
-            print(f"⚠️ {unrealistic_end.sum()} unrealistische EndZ-Werte werden ignoriert")
+            pipeline_log.warning("⚠️ %d unrealistische EndZ-Werte werden ignoriert", unrealistic_end.sum())
             df_processed.loc[unrealistic_end, 'EndZ'] = np.nan
         if unrealistic_center.any():
-            print(f"⚠️ {unrealistic_center.sum()} unrealistische CenterZ-Werte werden ignoriert")
+            pipeline_log.warning("⚠️ %d unrealistische CenterZ-Werte werden ignoriert", unrealistic_center.sum())
             df_processed.loc[unrealistic_center, 'CenterZ'] = np.nan
 
-        # Behandle Kreise separat - sie bekommen nur Text-Höhen für Center
-        circle_mask = df_processed['EntityType'] == 'CIRCLE'
-        circle_text_mask = circle_mask & df_processed['Direct_Height'].notna()
-        df_processed.loc[circle_text_mask, 'CenterZ'] = df_processed.loc[circle_text_mask, 'Direct_Height']
-        df_processed.loc[circle_text_mask, 'CenterZ_Status'] = 'Text'
-        print(f"🔵 {circle_text_mask.sum()} Kreise mit Text-Höhen verarbeitet")
-
-        # Behandle Text-Höhen für Linien und Bögen INTELLIGENT (nicht pauschal)
-        line_arc_mask = df_processed['EntityType'].isin(['LINE', 'ARC'])
-        line_arc_text_mask = line_arc_mask & df_processed['Direct_Height'].notna()
-        
-        print(f"📏 {line_arc_text_mask.sum()} Linien/Bögen mit Text-Höhen gefunden")
-        
-        # WICHTIG: Hier NICHT mehr die Höhen setzen - das passiert intelligent in der Propagation!
-        # Wir setzen nur Debug-Ausgaben für betroffene Linien
-        for idx in df_processed[line_arc_text_mask].index:
-            entity_id = df_processed.loc[idx, 'ID']
-            associated_text = df_processed.loc[idx, 'Associated_Text']
-            if ';' in str(associated_text):
-                print(f"    🎯 ID {entity_id}: Mehrere Textelemente erkannt - wird intelligent zugewiesen")
+        direct = assignment_engine == 'direct'
+        with PipelineStage(text_log, 'Textzuordnung', self.stage_stats) as stage:
+            if direct:
+                # Höhentexte direkt an Endpunkte und Kreismittelpunkte schreiben
+                df_processed = self.assign_heights_direct(df_processed)
             else:
-                print(f"    📍 ID {entity_id}: Einzelner Text - wird basierend auf Position zugewiesen")
+                # Behandle Kreise separat - sie bekommen nur Text-Höhen für Center
+                circle_mask = df_processed['EntityType'] == 'CIRCLE'
+                circle_text_mask = circle_mask & df_processed['Direct_Height'].notna()
+                df_processed.loc[circle_text_mask, 'CenterZ'] = df_processed.loc[circle_text_mask, 'Direct_Height']
+                df_processed.loc[circle_text_mask, 'CenterZ_Status'] = 'Text'
+                stage.count('Kreise mit Texthöhe', circle_text_mask.sum())
+
+            # Behandle Text-Höhen für Linien und Bögen INTELLIGENT (nicht pauschal)
+            line_arc_mask = df_processed['EntityType'].isin(['LINE', 'ARC'])
+            line_arc_text_mask = line_arc_mask & df_processed['Direct_Height'].notna()
+            stage.count('Linien/Bögen mit Texthöhe', line_arc_text_mask.sum())
+            
+            # WICHTIG: Hier NICHT mehr die Höhen setzen - das passiert intelligent in der Propagation!
+            # Mehrere Textelemente werden nach Distanz auf Start/Ende verteilt, ein einzelner nach Position
+            if not direct:
+                text_counts = entity_ids[line_arc_text_mask].map(
+                    lambda entity_id: len(text_elements_by_id.get(entity_id, ())))
+                stage.count('davon mit mehreren Texten', (text_counts > 1).sum())
 
         # Behandle Linien und Bögen pro Layer für Interpolation
         df_lines_arcs = df_processed[line_arc_mask].copy()
+        topology = self.get_topology(df_processed)
         
-        if not df_lines_arcs.empty:
-            # Gruppiere Linien/Bögen nach Layer
-            unique_layers = df_lines_arcs['Layer'].unique()
-            print(f"🔍 Verarbeite {len(unique_layers)} Layer: {list(unique_layers)}")
-            
-            for layer in unique_layers:
+        with PipelineStage(propagation_log, 'Propagation', self.stage_stats) as stage:
+            # Kompakte Arrays je Layer; Zeilenpositionen in df_processed für das Zurückschreiben
+            layer_tasks = []
+            for layer in df_lines_arcs['Layer'].unique():
                 layer_mask = df_processed['Layer'] == layer
                 layer_line_arc_mask = layer_mask & line_arc_mask
-                df_layer_lines = df_processed[layer_line_arc_mask].copy()
+                df_layer_lines = df_processed[layer_line_arc_mask]
                 
                 if len(df_layer_lines) > 0:
-                    print(f"  📋 Layer '{layer}': {len(df_layer_lines)} Linien/Bögen")
-                    
-                    # Führe Linienverfolgung für diesen Layer durch
-                    lines, connections = self.find_connected_lines_and_arcs(df_layer_lines)
-                    lines = self.propagate_heights_along_network(lines, connections)
-                    
-                    # Schreibe Ergebnisse für diesen Layer zurück
-                    for line in lines:
-                        row_idx = line['row_idx']
-                        original_idx = df_layer_lines.index[row_idx]
-                        
-                        print(f"    🔄 Schreibe Ergebnisse für ID {line['id']}: start_z={line['start_z']}, end_z={line['end_z']}")
-                        
-                        # Start-Z - Verbesserte Logik mit intelligenter Überschreibung
-                        if pd.notna(line['start_z']):
-                            current_start_z = df_processed.loc[original_idx, 'StartZ']
-                            current_start_status = df_processed.loc[original_idx, 'StartZ_Status']
-                            
-                            # Prüfe ob dies eine intelligente Text-Zuweisung ist (unterschiedliche Start/End-Höhen)
-                            is_intelligent_assignment = (
-                                pd.notna(line['start_z']) and 
-                                pd.notna(line['end_z']) and 
-                                line['start_z'] != line['end_z'] and
-                                pd.notna(line['direct_height'])
-                            )
-                            
-                            # Überschreibe wenn leer, 0.0, oder intelligente Zuweisung
-                            should_overwrite = (
-                                pd.isna(current_start_z) or 
-                                current_start_z == 0.0 or 
-                                current_start_status == '' or
-                                is_intelligent_assignment
-                            )
-                            
-                            if should_overwrite:
-                                df_processed.loc[original_idx, 'StartZ'] = float(line['start_z'])
-                                
-                                # Bestimme Status basierend auf Herkunft
-                                if is_intelligent_assignment:
-                                    df_processed.loc[original_idx, 'StartZ_Status'] = 'Text-Intelligent'
-                                elif pd.notna(line['direct_height']):
-                                    df_processed.loc[original_idx, 'StartZ_Status'] = 'Text'
-                                elif current_start_status == 'Original':
-                                    # Behalte Original-Status
-                                    pass
-                                else:
-                                    df_processed.loc[original_idx, 'StartZ_Status'] = 'Interpoliert'
-                                
-                                print(f"      ✅ StartZ gesetzt: {float(line['start_z'])} (Status: {df_processed.loc[original_idx, 'StartZ_Status']})")
-                            else:
-                                print(f"      ⏭️ StartZ bereits gesetzt: {current_start_z} (Status: {current_start_status})")
-                        
-                        # End-Z - Verbesserte Logik mit intelligenter Überschreibung
-                        if pd.notna(line['end_z']):
-                            current_end_z = df_processed.loc[original_idx, 'EndZ']
-                            current_end_status = df_processed.loc[original_idx, 'EndZ_Status']
-                            
-                            # Prüfe ob dies eine intelligente Text-Zuweisung ist (unterschiedliche Start/End-Höhen)
-                            is_intelligent_assignment = (
-                                pd.notna(line['start_z']) and 
-                                pd.notna(line['end_z']) and 
-                                line['start_z'] != line['end_z'] and
-                                pd.notna(line['direct_height'])
-                            )
-                            
-                            # Überschreibe wenn leer, 0.0, oder intelligente Zuweisung
-                            should_overwrite = (
-                                pd.isna(current_end_z) or 
-                                current_end_z == 0.0 or 
-                                current_end_status == '' or
-                                is_intelligent_assignment
-                            )
-                            
-                            if should_overwrite:
-                                df_processed.loc[original_idx, 'EndZ'] = float(line['end_z'])
-                                
-                                # Bestimme Status basierend auf Herkunft
-                                if is_intelligent_assignment:
-                                    df_processed.loc[original_idx, 'EndZ_Status'] = 'Text-Intelligent'
-                                elif pd.notna(line['direct_height']):
-                                    df_processed.loc[original_idx, 'EndZ_Status'] = 'Text'
-                                elif current_end_status == 'Original':
-                                    # Behalte Original-Status
-                                    pass
-                                else:
-                                    df_processed.loc[original_idx, 'EndZ_Status'] = 'Interpoliert'
-                                
-                                print(f"      ✅ EndZ gesetzt: {float(line['end_z'])} (Status: {df_processed.loc[original_idx, 'EndZ_Status']})")
-                            else:
-                                print(f"      ⏭️ EndZ bereits gesetzt: {current_end_z} (Status: {current_end_status})")
-                        
-                        # Für Bögen: Geometrie neu berechnen
-                        if df_processed.loc[original_idx, 'EntityType'] == 'ARC':
-                            self.recalculate_arc_geometry(df_processed, original_idx)
+                    arrays = self.layer_arrays(df_layer_lines, text_elements_by_id=text_elements_by_id,
+                                               include_text=not direct, topology=topology)
+                    positions = np.flatnonzero(layer_line_arc_mask.to_numpy())[arrays['rows']]
+                    layer_tasks.append((layer, len(df_layer_lines), positions, arrays))
+            
+            # Verbindungssuche und Propagation je Layer, Ergebnisse in Layer-Reihenfolge
+            results = self.propagate_layers([arrays for _, _, _, arrays in layer_tasks], execution_mode, max_workers)
+            
+            for layer, line_count, positions, arrays in layer_tasks:
+                propagation_log.debug("  📋 Layer '%s': %d Linien/Bögen", layer, line_count)
+                messages, start_z, end_z = next(results)
+                for level, message in messages:
+                    propagation_log.log(level, '%s', message)
+                
+                # Schreibe Ergebnisse für diesen Layer gesammelt zurück
+                written = self.write_back_line_heights(df_processed, positions, start_z, end_z, arrays['direct_height'])
+                stage.count('Layer')
+                stage.count('Linien/Bögen', line_count)
+                stage.count('Endpunkthöhen geschrieben', written)
+                
+                # Für Bögen: Geometrie neu berechnen
+                arc_positions = positions[df_processed['EntityType'].to_numpy()[positions] == 'ARC']
+                if len(arc_positions):
+                    self.recalculate_arc_geometries(df_processed, df_processed.index[arc_positions])
+                    stage.count('Bögen neu berechnet', len(arc_positions))
         
         # Nach der Layer-basierten Interpolation: Koordinaten-Konsistenz sicherstellen
-        df_processed = self.ensure_coordinate_consistency(df_processed)
+        with PipelineStage(consistency_log, 'Koordinaten-Konsistenz', self.stage_stats):
+            df_processed = self.ensure_coordinate_consistency(df_processed, topology=topology,
+                                                              consensus_mode=consensus_mode)
+        
+        if interpolation_mode == 'gradient':
+            with PipelineStage(gradient_log, 'Gefälle-Interpolation', self.stage_stats):
+                df_processed = self.interpolate_gradient(df_processed, topology)
+        
+        # Topologie und Komponenten für die Neupropagation nach manuellen Änderungen merken
+        self.row_nodes = topology.row_nodes(df_processed.index)
+        self.row_components = self.network_components(df_processed, topology, *self.row_nodes)
+        self.last_interpolation_mode = interpolation_mode
+        self.last_consensus_mode = consensus_mode
         
         self.df_processed = df_processed
+        total.count('Zeilen', len(df_processed))
+        total.finish()
+    
+        return df_processed
+
+    def propagate_layers(self, layer_arrays, execution_mode='serial', max_workers=None):
+        """
+        Verbindungssuche und Höhenpropagation für mehrere Layer (Arrays aus layer_arrays).
+        Bei execution_mode='process' läuft jeder Layer in einem eigenen Worker-Prozess
+        (größte Layer zuerst; 'spawn', damit keine Qt-Threads in die Worker geforkt werden),
+        sofern es mehrere Layer und insgesamt mindestens PROCESS_MIN_LINES Linien/Bögen gibt.
+        Rückgabe: Iterator über (Meldungen, start_z, end_z) in der Reihenfolge von layer_arrays,
+        unabhängig davon, in welcher Reihenfolge die Worker fertig werden. Meldungen sind die
+        gesammelten (Stufe, Meldung) eines Workers; seriell protokolliert jeder Layer direkt
+        (Meldungen leer) und wird erst beim Abruf seines Ergebnisses propagiert.
+        Hinweis: Eine annähernd lineare Skalierung mit der Kernzahl ist nicht nachgewiesen;
+        auf einer Maschine mit einem Kern war der Prozessmodus im layer_parallel_benchmark
+        langsamer als seriell. Der Modus ist deshalb nur optional (Z-Tool: "Parallel layers").
+        """
+        line_count = sum(len(arrays['id']) for arrays in layer_arrays)
+        if execution_mode == 'process' and (len(layer_arrays) < 2 or line_count < PROCESS_MIN_LINES):
+            propagation_log.info("ℹ️ Prozessmodus übersprungen (%d Layer, %d Linien/Bögen; nötig: ≥2 Layer, ≥%d) – Propagation läuft seriell",
+                                 len(layer_arrays), line_count, PROCESS_MIN_LINES)
+        elif execution_mode == 'process':
+            workers = min(max_workers or os.cpu_count() or 1, len(layer_arrays))
+            propagation_log.info("⚙️ Propagation von %d Layern in %d Prozessen", len(layer_arrays), workers)
+            order = sorted(range(len(layer_arrays)), key=lambda i: len(layer_arrays[i]['id']), reverse=True)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = {i: executor.submit(propagate_layer_arrays, layer_arrays[i]) for i in order}
+                return iter([futures[i].result() for i in range(len(layer_arrays))])
+        return (((),) + self.propagate_arrays(arrays) for arrays in layer_arrays)
+    
+    def write_back_line_heights(self, df_processed, positions, start_z, end_z, direct_height):
+        """
+        Schreibt die propagierten Start-/Endhöhen der Linien eines Layers zurück
+        (eine maskierte Zuweisung je Spalte; positions = Zeilenpositionen in df_processed,
+        start_z/end_z/direct_height = Arrays in derselben Reihenfolge).
+        Überschrieben wird, wenn der Wert leer oder 0.0 ist, noch kein Status gesetzt ist
+        oder eine intelligente Text-Zuweisung vorliegt (Text mit unterschiedlichen Start-/Endhöhen).
+        Status: 'Text-Intelligent', 'Text' (Linie mit Text-Höhe), 'Original' bleibt erhalten,
+        sonst 'Interpoliert'.
+        Rückgabe: Anzahl geschriebener Start-/Endhöhen.
+        """
+        if len(positions) == 0:
+            return 0
+        
+        start_z = np.asarray(start_z, dtype=float)
+        end_z = np.asarray(end_z, dtype=float)
+        has_text = ~np.isnan(np.asarray(direct_height, dtype=float))
+        
+        # Intelligente Text-Zuweisung: unterschiedliche Start-/Endhöhen aus Textelementen
+        is_intelligent_assignment = ~np.isnan(start_z) & ~np.isnan(end_z) & (start_z != end_z) & has_text
+        
+        written = 0
+        for column, values in (('StartZ', start_z), ('EndZ', end_z)):
+            status_column = f'{column}_Status'
+            current_z = df_processed[column].to_numpy(dtype=float)[positions]
+            current_status = df_processed[status_column].to_numpy(dtype=object)[positions]
+            
+            # Überschreibe wenn leer, 0.0, oder intelligente Zuweisung
+            should_overwrite = ~np.isnan(values) & (
+                np.isnan(current_z) | (current_z == 0.0) | (current_status == '') | is_intelligent_assignment
+            )
+            status = np.select(
+                [is_intelligent_assignment, has_text, current_status == 'Original'],
+                ['Text-Intelligent', 'Text', 'Original'],
+                default='Interpoliert'
+            )
+            
+            rows = positions[should_overwrite]
+            df_processed.iloc[rows, df_processed.columns.get_loc(column)] = values[should_overwrite]
+            df_processed.iloc[rows, df_processed.columns.get_loc(status_column)] = status[should_overwrite]
+            written += int(should_overwrite.sum())
+        
+        propagation_log.debug("    ✅ %d Start-/Endhöhen von %d Linien/Bögen geschrieben", written, len(positions))
+        return written
+
+    def network_components(self, df_processed, topology, start_nodes, end_nodes):
+        """
+        Zusammenhangskomponente je Zeile: Linien/Bögen desselben Layers, die über gemeinsame
+        Knoten verbunden sind (wie in der Propagation je Layer). -1 für Zeilen ohne Kante.
+        """
+        layer_codes = pd.factorize(df_processed['Layer'])[0] if 'Layer' in df_processed.columns else np.zeros(len(df_processed), dtype=np.int64)
+        components = np.full(len(df_processed), -1, dtype=np.int64)
+        on_network = (start_nodes >= 0) & (end_nodes >= 0) & (layer_codes >= 0)
+        edge_count = int(on_network.sum())
+        if edge_count == 0:
+            return components
+        
+        # Graph-Knoten = (Layer, Topologie-Knoten); Knoten verschiedener Layer sind getrennt
+        node_count = max(len(topology.nodes), 1)
+        keys = np.concatenate([layer_codes[on_network] * node_count + start_nodes[on_network],
+                               layer_codes[on_network] * node_count + end_nodes[on_network]])
+        graph_nodes, local = np.unique(keys, return_inverse=True)
+        graph = coo_matrix((np.ones(edge_count), (local[:edge_count], local[edge_count:])),
+                           shape=(len(graph_nodes), len(graph_nodes)))
+        labels = connected_components(graph, directed=False)[1]
+        components[on_network] = labels[local[:edge_count]]
+        return components
     
+    def repropagate_component(self, df_processed, record_index):
+        """
+        Propagiert nach einer manuellen Änderung an der Zeile record_index nur innerhalb ihrer
+        Zusammenhangskomponente neu (Topologie und Komponenten aus dem letzten
+        prepare_data_for_line_interpolation, kein erneuter Aufbau).
+        Abgeleitete Höhen der Komponente (DERIVED_STATUSES) werden verworfen und wie in der
+        vollständigen Analyse neu bestimmt: Übernahme über gemeinsame Knoten, Knoten-Konsens
+        (mit den Endpunkten aller Layer an diesen Knoten) und bei 'gradient' die Gefälle-Interpolation.
+        Manuelle, Text- und Originalhöhen bleiben erhalten; andere Komponenten bleiben unverändert.
+        Rückgabe: Index der geänderten Zeilen (inklusive record_index).
+        """
+        edited = pd.Index([record_index])
+        if self.row_components is None or len(self.row_components) != len(df_processed):
+            return edited
+        component = self.row_components[df_processed.index.get_loc(record_index)]
+        if component < 0:
+            return edited
+        
+        positions = np.flatnonzero(self.row_components == component)
+        columns = ['StartZ', 'EndZ', 'StartZ_Status', 'EndZ_Status', 'CenterZ', 'CenterZ_Status', 'Radius']
+        before = df_processed.iloc[positions].reindex(columns=columns)
+        
+        # Endpunkte der Komponente verschränkt (Start, Ende, Start, ...)
+        start_nodes, end_nodes = self.row_nodes
+        nodes = np.column_stack([start_nodes[positions], end_nodes[positions]]).ravel()
+        heights = before[['StartZ', 'EndZ']].to_numpy(dtype=float).ravel()
+        status = before[['StartZ_Status', 'EndZ_Status']].to_numpy(dtype=object).ravel()
+        
+        # Abgeleitete Höhen verwerfen; offen = leer oder 0 und nicht manuell gesetzt
+        derived = np.isin(status, DERIVED_STATUSES)
+        heights[derived] = np.nan
+        status[derived] = ''
+        new_heights = np.where(heights == 0.0, np.nan, heights)
+        fillable = np.isnan(new_heights) & (status != 'Manuell')
+        filled = self._fill_from_nodes(nodes, new_heights, fillable)[0]
+        status[filled] = 'Interpoliert'
+        fillable[filled] = False
+        
+        # Knoten-Konsens für die noch offenen Endpunkte (wie ensure_coordinate_consistency)
+        if fillable.any():
+            all_nodes = np.column_stack(self.row_nodes).ravel()
+            all_heights = df_processed[['StartZ', 'EndZ']].to_numpy(dtype=float).ravel()
+            all_heights[np.column_stack([positions * 2, positions * 2 + 1]).ravel()] = new_heights
+            open_points = np.flatnonzero(fillable & (nodes >= 0))
+            open_nodes = np.unique(nodes[open_points])
+            at_open_nodes = np.isin(all_nodes, open_nodes) & ~np.isnan(all_heights) & (all_heights != 0.0)
+            # Konsens auf lokal durchnummerierten Knoten (nur die offenen Knoten der Komponente)
+            consensus, conflict = self._node_consensus(np.searchsorted(open_nodes, all_nodes[at_open_nodes]),
+                                                       all_heights[at_open_nodes], len(open_nodes),
+                                                       self.last_consensus_mode)[:2]
+            local = np.searchsorted(open_nodes, nodes[open_points])
+            new_heights[open_points] = consensus[local]
+            status[open_points[~np.isnan(consensus[local])]] = 'Interpoliert'
+            if self.last_consensus_mode == 'flag':
+                status[open_points[conflict[local]]] = 'Konflikt'
+        
+        new_heights = np.where(np.isnan(new_heights), heights, new_heights)
+        for offset, column in enumerate(('StartZ', 'EndZ')):
+            df_processed.iloc[positions, df_processed.columns.get_loc(column)] = new_heights[offset::2]
+            df_processed.iloc[positions, df_processed.columns.get_loc(f'{column}_Status')] = status[offset::2]
+        
+        if self.last_interpolation_mode == 'gradient':
+            self.interpolate_gradient(df_processed, self.topology, index=df_processed.index[positions])
+        
+        # Bögen mit geänderten Endpunkt-Höhen: Geometrie neu berechnen
+        after = df_processed.iloc[positions].reindex(columns=columns)
+        z_changed = ~(after[['StartZ', 'EndZ']].eq(before[['StartZ', 'EndZ']]) |
+                      (after[['StartZ', 'EndZ']].isna() & before[['StartZ', 'EndZ']].isna())).all(axis=1).to_numpy()
+        arcs = z_changed & (df_processed['EntityType'].to_numpy()[positions] == 'ARC')
+        if arcs.any():
+            self.recalculate_arc_geometries(df_processed, df_processed.index[positions[arcs]])
+        
+        after = df_processed.iloc[positions].reindex(columns=columns)
+        changed = ~(after.eq(before) | (after.isna() & before.isna())).all(axis=1).to_numpy()
+        propagation_log.info("🔁 Komponente %s: %d Linien/Bögen neu propagiert, %d geändert",
+                             component, len(positions), int(changed.sum()))
+        return edited.union(df_processed.index[positions[changed]], sort=False)
+
+    def interpolate_gradient(self, df_processed, topology=None, index=None):
+        """
+        Füllt offene Endpunkt-Höhen mit einem Gefälle zwischen bekannten Knoten.
+        Je Layer wird über die Topologie-Knoten ein längengewichtetes Laplace-System gelöst
+        (Kantengewicht 1/Länge, bekannte Knoten als feste Randwerte): zwischen zwei bekannten
+        Schächten verläuft die Höhe linear über die Leitungslänge, an Verzweigungen als
+        gewichtetes Mittel. Alle Zusammenhangskomponenten mit mindestens einem bekannten Knoten
+        bilden je einen Block desselben dünnbesetzten Systems und werden in einem direkten
+        Lösungsschritt berechnet; Komponenten ohne bekannte Höhe bleiben offen.
+        Gesetzte Werte erhalten den Status 'Gradient'.
+        index: nur diese Zeilen berücksichtigen (z.B. eine Komponente in repropagate_component).
+        """
+        if topology is None:
+            topology = self.get_topology(df_processed)
+        edges = topology.edges
+        if index is not None:
+            edges = edges[edges.index.isin(index)]
+        if edges.empty:
+            return df_processed
+        
+        z_values = df_processed.loc[edges.index, ['StartZ', 'EndZ']].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        z_values = np.where(z_values == 0.0, np.nan, z_values)
+        filled_rows = {'StartZ': [], 'EndZ': []}
+        filled_values = {'StartZ': [], 'EndZ': []}
+        solved_nodes = 0
+        
+        for layer, layer_positions in edges.groupby('Layer', sort=False).indices.items():
+            layer_edges = edges.iloc[layer_positions]
+            endpoint_nodes = np.concatenate([layer_edges['StartNode'].to_numpy(), layer_edges['EndNode'].to_numpy()])
+            endpoint_z = np.concatenate([z_values[layer_positions, 0], z_values[layer_positions, 1]])
+            node_ids, local = np.unique(endpoint_nodes, return_inverse=True)
+            node_count = len(node_ids)
+            
+            # Bekannte Knotenhöhe: Mittel der bekannten Endpunkt-Höhen am Knoten
+            known_points = ~np.isnan(endpoint_z)
+            known_count = np.bincount(local[known_points], minlength=node_count)
+            known_sum = np.bincount(local[known_points], weights=endpoint_z[known_points], minlength=node_count)
+            known = known_count > 0
+            if known.all() or not known.any():
+                continue
+            
+            # Laplace-Matrix L = D - W mit W_ij = 1 / Länge
+            start_local, end_local = local[:len(layer_edges)], local[len(layer_edges):]
+            weights = 1.0 / np.maximum(layer_edges['Length'].to_numpy(dtype=float), MIN_EDGE_LENGTH)
+            adjacency = coo_matrix((np.concatenate([weights, weights]),
+                                    (np.concatenate([start_local, end_local]), np.concatenate([end_local, start_local]))),
+                                   shape=(node_count, node_count)).tocsr()
+            laplacian = (coo_matrix((np.asarray(adjacency.sum(axis=1)).ravel(), (np.arange(node_count), np.arange(node_count))),
+                                    shape=(node_count, node_count)).tocsr() - adjacency)
+            
+            # Nur offene Knoten in Komponenten mit mindestens einem bekannten Knoten sind lösbar
+            component_count, component = connected_components(adjacency, directed=False)
+            has_known = np.bincount(component[known], minlength=component_count) > 0
+            unknown = np.flatnonzero(~known & has_known[component])
+            if len(unknown) == 0:
+                continue
+            known_nodes = np.flatnonzero(known)
+            
+            # L_UU x_U = -L_UK x_K
+            rows = laplacian[unknown]
+            rhs = -(rows[:, known_nodes] @ (known_sum[known_nodes] / known_count[known_nodes]))
+            solution = spsolve(rows[:, unknown].tocsc(), rhs)
+            node_height = np.full(node_count, np.nan)
+            node_height[unknown] = np.atleast_1d(solution)
+            solved_nodes += len(unknown)
+            
+            # Offene Endpunkte dieses Layers mit den Knotenhöhen füllen
+            for column, column_local, offset in (('StartZ', start_local, 0), ('EndZ', end_local, 1)):
+                target = np.isnan(z_values[layer_positions, offset]) & ~np.isnan(node_height[column_local])
+                filled_rows[column].append(layer_edges.index.to_numpy()[target])
+                filled_values[column].append(node_height[column_local][target])
+            gradient_log.debug("  📐 Layer '%s': %d Knotenhöhen als Gefälle interpoliert (%d Komponenten)",
+                               layer, len(unknown), component_count)
+        
+        filled_count = 0
+        changed = []
+        for column in ('StartZ', 'EndZ'):
+            if not filled_rows[column]:
+                continue
+            rows = np.concatenate(filled_rows[column])
+            df_processed.loc[rows, column] = np.concatenate(filled_values[column])
+            df_processed.loc[rows, f'{column}_Status'] = 'Gradient'
+            filled_count += len(rows)
+            changed.append(rows)
+        
+        # Bögen mit neuen Endpunkt-Höhen: Geometrie neu berechnen
+        if changed:
+            changed = pd.unique(np.concatenate(changed))
+            arcs = changed[df_processed.loc[changed, 'EntityType'].to_numpy() == 'ARC']
+            if len(arcs):
+                self.recalculate_arc_geometries(df_processed, arcs)
+        
+        gradient_log.info("📐 Gefälle-Interpolation: %d Knoten, %d Endpunkte gesetzt", solved_nodes, filled_count)
         return df_processed
 
-    def train_and_predict(self, known_df, unknown_df):
+    def train_and_predict(self, known_df, unknown_df, max_workers=None):
         """
         Trainiert ein Modell und macht Vorhersagen.
+        Das trainierte Modell bleibt mit einem Fingerprint der Trainingsdaten erhalten; bei
+        unveränderten Trainingsdaten (auch nach load_model) wird nicht neu trainiert.
+        Laufzeiten stehen in self.model_timings ('KNN-Training', 'KNN-Vorhersage').
         """
         # Sicherstellen, dass nur Features verwendet werden, die auch in known_df vorhanden sind
         current_features = [f for f in self.features if f in known_df.columns]
@@ -634,28 +1274,112 @@ class HeightAnalysisLogic:
             # kann das Modell nicht sinnvoll trainiert werden.
             unknown_df['Predicted_Height'] = np.nan
             self.model = None # Setze Modell auf None, um anzuzeigen, dass nicht trainiert wurde
+            self.model_training = None
+            self.model_fingerprint = None
             return unknown_df
 
         X_train = known_df[current_features]
         y_train = known_df['Direct_Height']
 
-        self.model = KNeighborsRegressor(n_neighbors=5)
-        self.model.fit(X_train, y_train)
+        fingerprint = self.training_fingerprint(X_train, y_train)
+        with PipelineStage(model_log, 'KNN-Training', self.model_timings) as stage:
+            if self.model is not None and fingerprint == self.model_fingerprint:
+                stage.count('wiederverwendet')
+            else:
+                self.fit_model(X_train, y_train, fingerprint)
+                stage.count('Trainingszeilen', len(X_train))
 
         if not unknown_df.empty:
-            X_predict = unknown_df[current_features]
-            # Sicherstellen, dass X_predict die gleichen Spalten wie X_train hat
-            # und fehlende Spalten (falls durch Filterung entstanden) mit 0 oder Median füllen
-            for col in current_features:
-                if col not in X_predict.columns:
-                    X_predict[col] = 0 # Oder füllen mit dem Median von X_train[col]
-            
-            predictions = self.model.predict(X_predict)
-            unknown_df['Predicted_Height'] = predictions
+            unknown_df['Predicted_Height'] = self.predict_heights(unknown_df, max_workers)
         else:
             unknown_df['Predicted_Height'] = np.nan # Falls unknown_df leer ist
 
         return unknown_df
+
+    def fit_model(self, X_train, y_train, fingerprint=None):
+        """Trainiert das KNN-Modell und merkt sich Features, Trainingsdaten und Fingerprint."""
+        self.model = KNeighborsRegressor(n_neighbors=KNN_NEIGHBORS)
+        self.model.fit(X_train, y_train)
+        self.model_features = list(X_train.columns)
+        self.model_training = (X_train.to_numpy(dtype=float), y_train.to_numpy(dtype=float))
+        self.model_fingerprint = fingerprint or self.training_fingerprint(X_train, y_train)
+
+    def training_fingerprint(self, X_train, y_train):
+        """Fingerprint über Features, Trainingswerte (als float) und Modellparameter."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((list(X_train.columns), KNN_NEIGHBORS)).encode())
+        digest.update(pd.util.hash_pandas_object(X_train.astype(float), index=False).to_numpy().tobytes())
+        digest.update(pd.util.hash_pandas_object(y_train.astype(float), index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def predict_heights(self, unknown_df, max_workers=None):
+        """
+        Höhen-Vorhersage des trainierten Modells für unknown_df (fehlende Feature-Spalten = 0),
+        in Blöcken zu PREDICT_BATCH_SIZE Zeilen; ab PREDICT_THREAD_MIN_ROWS Zeilen laufen die
+        Blöcke parallel in einem Thread-Pool (max_workers, ohne Angabe einer je CPU-Kern).
+        Rückgabe: Array in Zeilenreihenfolge von unknown_df.
+        """
+        if self.model is None:
+            return np.full(len(unknown_df), np.nan)
+        
+        with PipelineStage(model_log, 'KNN-Vorhersage', self.model_timings) as stage:
+            X_predict = unknown_df.reindex(columns=self.model_features, fill_value=0)
+            batches = [X_predict.iloc[start:start + PREDICT_BATCH_SIZE]
+                       for start in range(0, len(X_predict), PREDICT_BATCH_SIZE)]
+            if len(X_predict) >= PREDICT_THREAD_MIN_ROWS and len(batches) > 1:
+                workers = min(max_workers or os.cpu_count() or 1, len(batches))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    parts = list(executor.map(self.model.predict, batches))
+                stage.count('Threads', workers)
+            else:
+                parts = [self.model.predict(batch) for batch in batches]
+            stage.count('Zeilen', len(X_predict))
+            stage.count('Blöcke', len(batches))
+        return np.concatenate(parts) if parts else np.full(0, np.nan)
+
+    def save_model(self, path):
+        """
+        Speichert das trainierte KNN-Modell als .npz: Trainingsdaten und Features, kein
+        Pickle. Ein KNN-Modell ist durch seine Trainingsdaten vollständig bestimmt.
+        """
+        if self.model is None:
+            model_log.warning("⚠️ Kein trainiertes Modell zum Speichern")
+            return False
+        X_train, y_train = self.model_training
+        try:
+            with open(path, 'wb') as f:
+                np.savez(f, version=MODEL_FORMAT_VERSION, features=np.array(self.model_features, dtype=str),
+                         X=X_train, y=y_train)
+            model_log.info("💾 KNN-Modell gespeichert: %s", path)
+            return True
+        except Exception as e:
+            model_log.warning("⚠️ KNN-Modell konnte nicht gespeichert werden: %s", e)
+            return False
+
+    def load_model(self, path):
+        """
+        Lädt ein mit save_model gespeichertes KNN-Modell; Rückgabe: True bei Erfolg.
+        Gelesen werden nur Zahlen- und Text-Arrays (allow_pickle=False, beim Laden läuft kein
+        Code); das Modell wird daraus neu aufgebaut, der Fingerprint aus den Daten berechnet.
+        """
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                if int(stored['version']) != MODEL_FORMAT_VERSION:
+                    raise ValueError(f"Formatversion {int(stored['version'])} statt {MODEL_FORMAT_VERSION}")
+                features = [str(feature) for feature in stored['features']]
+                X = np.asarray(stored['X'], dtype=float)
+                y = np.asarray(stored['y'], dtype=float)
+            if X.ndim != 2 or X.shape[1] != len(features) or y.shape != (len(X),) or len(X) < KNN_NEIGHBORS:
+                raise ValueError(f"Ungültige Trainingsdaten {X.shape} / {y.shape} für {len(features)} Features")
+            self.fit_model(pd.DataFrame(X, columns=features), pd.Series(y, name='Direct_Height'))
+            model_log.info("📦 KNN-Modell geladen: %s (%d Features)", path, len(self.model_features))
+            return True
+        except Exception as e:
+            model_log.warning("⚠️ KNN-Modell konnte nicht geladen werden: %s", e)
+            return False
+
     def apply_text_assignments(self, df_processed, assignment_table):
         """
         Wendet die Text-Zuordnungen auf den DataFrame an.
@@ -675,13 +1399,13 @@ class HeightAnalysisLogic:
             # Setze Z-Wert basierend auf Zuordnungstyp
             if assignment_type == 'StartZ':
                 df_processed.loc[idx, 'StartZ'] = height
-                print(f"   📍 ID {entity_id}: StartZ = {height} (Text: {assignment['TextID']})")
+                text_log.debug("   📍 ID %s: StartZ = %s (Text: %s)", entity_id, height, assignment['TextID'])
             elif assignment_type == 'EndZ':
                 df_processed.loc[idx, 'EndZ'] = height
-                print(f"   📍 ID {entity_id}: EndZ = {height} (Text: {assignment['TextID']})")
+                text_log.debug("   📍 ID %s: EndZ = %s (Text: %s)", entity_id, height, assignment['TextID'])
             elif assignment_type == 'CenterZ':
                 df_processed.loc[idx, 'CenterZ'] = height
-                print(f"   📍 ID {entity_id}: CenterZ = {height} (Text: {assignment['TextID']})")
+                text_log.debug("   📍 ID %s: CenterZ = %s (Text: %s)", entity_id, height, assignment['TextID'])
         
         return df_processed
     
@@ -748,354 +1472,323 @@ class HeightAnalysisLogic:
         
         return df_final
     
-    def ensure_coordinate_consistency(self, df_processed, tolerance=0.01):
+    def ensure_coordinate_consistency(self, df_processed, tolerance=0.01, topology=None, consensus_mode='mean'):
         """
         Stellt sicher, dass identische Koordinaten gleiche Höhen bekommen.
+        Identisch = derselbe Knoten im Topologie-Modell (Endpunkte innerhalb der Toleranz).
+        Offene Endpunkte (NaN oder 0) erhalten die Konsenshöhe ihres Knotens (consensus_mode,
+        siehe CONSENSUS_MODES); Knoten mit unterschiedlichen Höhen stehen danach in
+        self.coordinate_conflicts.
         """
-        print(f"🔄 Stelle Koordinaten-Konsistenz sicher (Toleranz: {tolerance})...")
+        if consensus_mode not in CONSENSUS_MODES:
+            raise ValueError(f"Unbekannter Konsensmodus: {consensus_mode}")
+        if topology is None:
+            topology = self.get_topology(df_processed, tolerance)
         
-        # Sammle alle eindeutigen Koordinaten mit ihren Höhen
-        coord_heights = {}  # (x, y) -> [list of heights]
-        coord_to_indices = {}  # (x, y) -> [list of (idx, coord_type)]
+        # Endpunkte zeilenweise verschränkt (Start, Ende, Start, ...) - Reihenfolge der Mittelwert-Summe wie bisher
+        start_nodes, end_nodes = topology.row_nodes(df_processed.index)
+        nodes = np.column_stack([start_nodes, end_nodes]).ravel()
+        z_values = np.column_stack([
+            df_processed[column].to_numpy(dtype=float) if column in df_processed.columns else np.full(len(df_processed), np.nan)
+            for column in ('StartZ', 'EndZ')
+        ]).ravel()
+        on_node = nodes >= 0
+        known = on_node & ~np.isnan(z_values) & (z_values != 0.0)
+        consensus, conflict, count, min_z, max_z = self._node_consensus(nodes[known], z_values[known],
+                                                                        len(topology.nodes), consensus_mode)
         
-        for idx, row in df_processed.iterrows():
-            # Sammle Start-Koordinaten
-            start_x, start_y, start_z = row.get('StartX'), row.get('StartY'), row.get('StartZ')
-            if pd.notna(start_x) and pd.notna(start_y):
-                coord_key = self.round_coordinate(start_x, start_y, tolerance)
-                if coord_key not in coord_heights:
-                    coord_heights[coord_key] = []
-                    coord_to_indices[coord_key] = []
-                
-                if pd.notna(start_z) and start_z != 0.0:
-                    coord_heights[coord_key].append(start_z)
-                coord_to_indices[coord_key].append((idx, 'start'))
-            
-            # Sammle End-Koordinaten
-            end_x, end_y, end_z = row.get('EndX'), row.get('EndY'), row.get('EndZ')
-            if pd.notna(end_x) and pd.notna(end_y):
-                coord_key = self.round_coordinate(end_x, end_y, tolerance)
-                if coord_key not in coord_heights:
-                    coord_heights[coord_key] = []
-                    coord_to_indices[coord_key] = []
-                
-                if pd.notna(end_z) and end_z != 0.0:
-                    coord_heights[coord_key].append(end_z)
-                coord_to_indices[coord_key].append((idx, 'end'))
+        self.coordinate_conflicts = pd.DataFrame({
+            'X': topology.nodes['X'].to_numpy()[conflict],
+            'Y': topology.nodes['Y'].to_numpy()[conflict],
+            'Count': count[conflict],
+            'MinZ': min_z[conflict],
+            'MaxZ': max_z[conflict]
+        }, index=pd.Index(np.flatnonzero(conflict), name='NodeID'))
+        
+        # Offene Endpunkte auf Knoten mit Konsenshöhe füllen (bzw. Konflikt markieren)
+        open_points = on_node & ~known
+        fill = np.zeros(len(nodes), dtype=bool)
+        fill[open_points] = ~np.isnan(consensus[nodes[open_points]])
+        flagged = np.zeros(len(nodes), dtype=bool)
+        if consensus_mode == 'flag':
+            flagged[open_points] = conflict[nodes[open_points]]
         
-        # Konsistenz anwenden
         consistency_applied = 0
-        for coord_key, heights in coord_heights.items():
-            if len(heights) > 0:
-                # Verwende die häufigste Höhe oder den Durchschnitt
-                if len(set(heights)) == 1:
-                    consensus_height = heights[0]
-                else:
-                    consensus_height = np.mean(heights)  # Durchschnitt bei unterschiedlichen Höhen
-                
-                # Wende Konsistenz auf alle Koordinaten mit dieser Position an
-                indices_list = coord_to_indices[coord_key]
-                for idx, coord_type in indices_list:
-                    if coord_type == 'start':
-                        current_z = df_processed.loc[idx, 'StartZ']
-                        if pd.isna(current_z) or current_z == 0.0:
-                            df_processed.loc[idx, 'StartZ'] = consensus_height
-                            df_processed.loc[idx, 'StartZ_Status'] = 'Interpoliert'
-                            consistency_applied += 1
-                    elif coord_type == 'end':
-                        current_z = df_processed.loc[idx, 'EndZ']
-                        if pd.isna(current_z) or current_z == 0.0:
-                            df_processed.loc[idx, 'EndZ'] = consensus_height
-                            df_processed.loc[idx, 'EndZ_Status'] = 'Interpoliert'
-                            consistency_applied += 1
-        
-        print(f"    ✅ {consistency_applied} Koordinaten-Konsistenzen angewendet")
+        for offset, column in enumerate(('StartZ', 'EndZ')):
+            rows = np.flatnonzero(fill[offset::2])
+            if len(rows):
+                df_processed.iloc[rows, df_processed.columns.get_loc(column)] = consensus[nodes[offset::2][rows]]
+                if f'{column}_Status' not in df_processed.columns:
+                    df_processed[f'{column}_Status'] = np.nan
+                df_processed.iloc[rows, df_processed.columns.get_loc(f'{column}_Status')] = 'Interpoliert'
+                consistency_applied += len(rows)
+            rows = np.flatnonzero(flagged[offset::2])
+            if len(rows):
+                if f'{column}_Status' not in df_processed.columns:
+                    df_processed[f'{column}_Status'] = np.nan
+                df_processed.iloc[rows, df_processed.columns.get_loc(f'{column}_Status')] = 'Konflikt'
+        
+        consistency_log.info("🔄 Koordinaten-Konsistenz (Toleranz: %s): %d Endpunkte angewendet",
+                             tolerance, consistency_applied)
+        if conflict.any():
+            action = 'nicht gesetzt, als Konflikt markiert' if consensus_mode == 'flag' else f'Konsens: {consensus_mode}'
+            consistency_log.warning("    ⚠️ %d Knoten mit widersprüchlichen Höhen (%s)", int(conflict.sum()), action)
         return df_processed
     
-    def round_coordinate(self, x, y, tolerance):
-        """Rundet Koordinaten für Konsistenz-Prüfung."""
-        factor = 1.0 / tolerance
-        return (round(x * factor) / factor, round(y * factor) / factor)
+    def _node_consensus(self, nodes, z_values, node_count, consensus_mode='mean'):
+        """
+        Konsenshöhe je Knoten aus bekannten Endpunkt-Höhen (nodes/z_values gleich lang, ohne NaN/0).
+        Rückgabe: (consensus, conflict, count, min_z, max_z) als Arrays der Länge node_count;
+        consensus ist NaN ohne bekannte Höhe und bei 'flag' an widersprüchlichen Knoten.
+        """
+        count = np.bincount(nodes, minlength=node_count)
+        grouped = pd.Series(z_values).groupby(nodes)
+        min_z = grouped.min().reindex(range(node_count)).to_numpy()
+        max_z = grouped.max().reindex(range(node_count)).to_numpy()
+        conflict = count > 1
+        conflict[conflict] = min_z[conflict] != max_z[conflict]
+        if consensus_mode == 'median':
+            consensus = grouped.median().reindex(range(node_count)).to_numpy()
+        else:
+            consensus = np.bincount(nodes, weights=z_values, minlength=node_count) / np.maximum(count, 1)
+            consensus[count == 0] = np.nan
+        # Einheitliche Höhe exakt übernehmen; bei 'flag' widersprüchliche Knoten offen lassen
+        consensus = np.where(conflict, consensus, min_z)
+        if consensus_mode == 'flag':
+            consensus[conflict] = np.nan
+        return consensus, conflict, count, min_z, max_z
     
-    def parse_associated_text_elements(self, df):
+    def check_plausibility(self, df_processed, limits=None, topology=None):
         """
-        Parst Associated_Text und erstellt eine Tabelle mit allen Textelementen.
-        Gibt einen DataFrame mit separaten Texteinträgen zurück.
+        Prüft die Z-Ergebnisse aller Linien/Bögen auf einmal (Arrays über die Topologie-Kanten):
+        - 'Gefälle':      |ΔZ| / Länge über max_gradient
+        - 'Gegengefälle': Gefälle entgegen der vorherrschenden (längengewichteten) Fließrichtung
+                          der Zusammenhangskomponente, nur für Gefälle über min_gradient
+        - 'Höhensprung':  Endpunkt-Höhe weicht mehr als max_height_jump vom Median aller
+                          Endpunkt-Höhen am selben Knoten ab
+        - 'Ausreißer':    Höhe (Mittel der Endpunkte, bei Kreisen CenterZ) liegt mehr als
+                          outlier_score MAD (mindestens min_outlier_spread Meter) vom
+                          Median ihres Layers entfernt
+        Fehlende Höhen (NaN oder 0) werden nicht bewertet.
+        limits: Dict mit einzelnen Grenzwerten aus PLAUSIBILITY_LIMITS (sonst self.plausibility_limits).
+        Rückgabe: DataFrame je LINE/ARC/CIRCLE-Zeile (Index wie df_processed) mit Length, Gradient,
+        HeightJump, OutlierScore, den Prüfungen Steep, Reversed, Jump, Outlier, Flagged und Issues
+        (Befunde als Text); auch in self.plausibility_results.
         """
-        text_assignments = []
-
-        for idx, row in df.iterrows():
-            associated_text = row.get('Associated_Text', '')
-            if pd.isna(associated_text) or associated_text == '':
-                continue
-
-            # Parse mehrere Textelemente aus einem Associated_Text
-            text_elements = self.extract_multiple_text_elements(str(associated_text))
-
-            for i, text_element in enumerate(text_elements):
-                if text_element['height'] is not None:
-                    text_assignments.append({
-                        'TextID': f"{row['ID']}_T{i+1}",
-                        'Text': text_element['text'],
-                        'Height': text_element['height'],
-                        'TextX': text_element['x'],
-                        'TextY': text_element['y'],
-                        'SourceEntityID': row['ID'],
-                        'SourceEntityType': row['EntityType'],
-                        'AssignedTo': None,  # Wird später gesetzt
-                        'AssignedEntityID': None,  # Wird später gesetzt
-                        'Distance': None  # Wird später berechnet
-                    })
-
-        return pd.DataFrame(text_assignments)
-
-    def extract_multiple_text_elements(self, text_str):
+        limits = dict(self.plausibility_limits, **(limits or {}))
+        unknown_limits = set(limits) - set(PLAUSIBILITY_LIMITS)
+        if unknown_limits:
+            raise ValueError(f"Unbekannte Grenzwerte: {', '.join(sorted(unknown_limits))}")
+        if topology is None:
+            topology = self.get_topology(df_processed)
+        
+        stage = PipelineStage(plausibility_log, 'Plausibilitätsprüfung', self.stage_stats).start()
+        
+        def height(column):
+            if column not in df_processed.columns:
+                return np.full(len(df_processed), np.nan)
+            values = pd.to_numeric(df_processed[column], errors='coerce').to_numpy(dtype=float)
+            return np.where(values == 0.0, np.nan, values)
+        
+        start_z, end_z, center_z = height('StartZ'), height('EndZ'), height('CenterZ')
+        start_nodes, end_nodes = topology.row_nodes(df_processed.index)
+        length = topology.row_lengths(df_processed.index)
+        
+        # Gefälle je Kante (positiv = fallend von Start nach Ende)
+        fall = start_z - end_z
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gradient = np.where(length > MIN_EDGE_LENGTH, fall / length, np.nan)
+        steep = np.abs(gradient) > limits['max_gradient']
+        
+        # Gegengefälle: Vorzeichen gegen die längengewichtete Richtung der Komponente
+        components = self.network_components(df_processed, topology, start_nodes, end_nodes)
+        sloped = (np.abs(gradient) > limits['min_gradient']) & (components >= 0)
+        direction = np.bincount(components[sloped], weights=np.sign(fall[sloped]) * length[sloped],
+                                minlength=int(components.max(initial=-1)) + 1)
+        reversed_slope = np.zeros(len(df_processed), dtype=bool)
+        reversed_slope[sloped] = np.sign(fall[sloped]) * np.sign(direction[components[sloped]]) < 0
+        
+        # Höhensprung: größte Abweichung eines Endpunkts vom Knoten-Median (verschränkt Start, Ende)
+        nodes = np.column_stack([start_nodes, end_nodes]).ravel()
+        z_values = np.column_stack([start_z, end_z]).ravel()
+        known = (nodes >= 0) & ~np.isnan(z_values)
+        node_median = self._node_consensus(nodes[known], z_values[known], len(topology.nodes), 'median')[0]
+        deviation = np.full(len(nodes), np.nan)
+        deviation[known] = np.abs(z_values[known] - node_median[nodes[known]])
+        height_jump = np.fmax(deviation[0::2], deviation[1::2])
+        jump = height_jump > limits['max_height_jump']
+        
+        # Ausreißer: robuster z-Wert gegen den Median des Layers
+        entity_types = df_processed['EntityType'].to_numpy()
+        row_height = np.where(entity_types == 'CIRCLE', center_z, center_heights(start_z, end_z))
+        layers = df_processed['Layer'] if 'Layer' in df_processed.columns else pd.Series('0', index=df_processed.index)
+        layer_codes = pd.factorize(layers)[0]
+        offset = np.abs(row_height - pd.Series(row_height).groupby(layer_codes).transform('median').to_numpy())
+        spread = MAD_SCALE * pd.Series(offset).groupby(layer_codes).transform('median').to_numpy()
+        outlier_score = offset / np.maximum(spread, limits['min_outlier_spread'])
+        outlier = outlier_score > limits['outlier_score']
+        
+        checked = np.isin(entity_types, ['LINE', 'ARC', 'CIRCLE'])
+        checks = {'Steep': steep, 'Reversed': reversed_slope, 'Jump': jump, 'Outlier': outlier}
+        labels = {'Steep': 'Gefälle', 'Reversed': 'Gegengefälle', 'Jump': 'Höhensprung', 'Outlier': 'Ausreißer'}
+        results = pd.DataFrame({
+            'Length': length,
+            'Gradient': gradient,
+            'HeightJump': height_jump,
+            'OutlierScore': outlier_score,
+            **checks
+        }, index=df_processed.index)[checked]
+        results['Flagged'] = results[list(checks)].any(axis=1)
+        issues = pd.Series('', index=results.index)
+        for name in checks:
+            issues = issues + np.where(results[name], labels[name] + ', ', '')
+        results['Issues'] = issues.str.rstrip(', ')
+        self.plausibility_results = results
+        
+        for name in checks:
+            stage.count(labels[name], results[name].sum())
+        stage.count('Auffällig', results['Flagged'].sum())
+        stage.count('Geprüft', len(results))
+        stage.finish()
+        if results['Flagged'].any():
+            plausibility_log.warning("    ⚠️ %d von %d Objekten unplausibel (%s)", int(results['Flagged'].sum()), len(results),
+                                     ', '.join(f"{labels[name]}: {int(results[name].sum())}" for name in checks))
+        return results
+    
+    def parse_associated_text_elements(self, df):
         """
-        Extrahiert mehrere Textelemente aus einem Associated_Text String.
-        Erkennt Muster wie: "OK Muffe=296.82 [-490.16, -103.18]; OK Muffe=298.26 [-485.44, -100.54]"
+        Erstellt aus der Textelement-Tabelle eine Tabelle mit allen Höhentexten.
+        Gibt einen DataFrame mit separaten Texteinträgen zurück.
         """
-        elements = []
-
-        # Split by semicolon für mehrere Textelemente
-        text_parts = text_str.split(';')
+        text_elements = getattr(self, 'text_elements', None)
+        if text_elements is None or text_elements.empty:
+            text_elements = self.build_text_elements(df)
+        if text_elements.empty:
+            return pd.DataFrame()
 
-        for part in text_parts:
-            part = part.strip()
-            if not part:
-                continue
-
-            # Extrahiere Höhe
-            height = self.extract_height_from_text(part)
-
-            # Extrahiere Koordinaten
-            x, y = self.extract_text_coordinates(part)
+        elements = text_elements[text_elements['Height'].notna()]
+        elements = elements[elements['GeometryID'].isin(df['ID'].astype(str))]
+        entity_types = df.assign(ID=df['ID'].astype(str)).drop_duplicates('ID').set_index('ID')['EntityType']
+        text_number = elements.groupby('GeometryID').cumcount() + 1
 
-            if height is not None:
-                elements.append({
-                    'text': part,
-                    'height': height,
-                    'x': x,
-                    'y': y
-                })
-
-        return elements
+        return pd.DataFrame({
+            'TextID': elements['GeometryID'] + '_T' + text_number.astype(str),
+            'Text': elements['Text'],
+            'Height': elements['Height'],
+            'TextX': elements['TextX'],
+            'TextY': elements['TextY'],
+            'SourceEntityID': elements['GeometryID'],
+            'SourceEntityType': elements['GeometryID'].map(entity_types),
+            'AssignedTo': None,  # Wird später gesetzt
+            'AssignedEntityID': None,  # Wird später gesetzt
+            'Distance': None  # Wird später berechnet
+        }).reset_index(drop=True)
 
     def create_text_assignment_table(self, df_processed, text_df):
         """
         Erstellt eine intelligente Zuordnung zwischen Textelementen und Geometrie-Endpunkten.
+        Je Linie/Bogen erhält der Startpunkt den nächstgelegenen Text und der Endpunkt den
+        nächstgelegenen anderen Text (ohne den Text des Startpunkts). Alle Endpunkte werden
+        gemeinsam über einen k-d-Baum der Textpositionen abgefragt.
         """
-        assignments = []
-
-        # Für jede Geometrie die besten Textzuordnungen finden
-        for idx, row in df_processed.iterrows():
-            entity_id = row['ID']
-            entity_type = row['EntityType']
-
-            if entity_type in ['LINE', 'ARC']:
-                start_x, start_y = row['StartX'], row['StartY']
-                end_x, end_y = row['EndX'], row['EndY']
-
-                if pd.notna(start_x) and pd.notna(start_y) and pd.notna(end_x) and pd.notna(end_y):
-                    # Finde nächsten Text für Startpunkt
-                    start_assignment = self.find_nearest_text_for_point(
-                        text_df, start_x, start_y, entity_id, 'StartZ'
-                    )
-                    if start_assignment:
-                        assignments.append(start_assignment)
-
-                    # Finde nächsten Text für Endpunkt (exclude bereits zugewiesene)
-                    end_assignment = self.find_nearest_text_for_point(
-                        text_df, end_x, end_y, entity_id, 'EndZ',
-                        exclude_text_id=start_assignment['TextID'] if start_assignment else None
-                    )
-                    if end_assignment:
-                        assignments.append(end_assignment)
-
-            elif entity_type == 'CIRCLE':
-                center_x, center_y = row['CenterX'], row['CenterY']
-
-                if pd.notna(center_x) and pd.notna(center_y):
-                    center_assignment = self.find_nearest_text_for_point(
-                        text_df, center_x, center_y, entity_id, 'CenterZ'
-                    )
-                    if center_assignment:
-                        assignments.append(center_assignment)
-
-        return pd.DataFrame(assignments)
-
-    def find_nearest_text_for_point(self, text_df, point_x, point_y, entity_id, assignment_type, exclude_text_id=None):
-        """
-        Findet den nächstgelegenen Text für einen bestimmten Punkt.
-        """
-        if text_df.empty:
-            return None
-
-        # Filter verfügbare Texte (exclude bereits zugewiesene)
-        available_texts = text_df.copy()
-        if exclude_text_id:
-            available_texts = available_texts[available_texts['TextID'] != exclude_text_id]
-
-        if available_texts.empty:
-            return None
-
-        # Berechne Distanzen zu allen verfügbaren Texten
-        distances = []
-        for _, text_row in available_texts.iterrows():
-            if pd.notna(text_row['TextX']) and pd.notna(text_row['TextY']):
-                dist = self.point_distance(
-                    (point_x, point_y), 
-                    (text_row['TextX'], text_row['TextY'])
-                )
-                distances.append(dist)
-            else:
-                distances.append(float('inf'))
-
-        if not distances or min(distances) == float('inf'):
-            return None
-
-        # Finde nächsten Text
-        min_idx = distances.index(min(distances))
-        nearest_text = available_texts.iloc[min_idx]
-
-        return {
-            'TextID': nearest_text['TextID'],
-            'Text': nearest_text['Text'],
-            'Height': nearest_text['Height'],
-            'TextX': nearest_text['TextX'],
-            'TextY': nearest_text['TextY'],
-            'AssignedEntityID': entity_id,
-            'AssignedTo': assignment_type,
-            'Distance': min(distances)
-        }
-    
-    def parse_associated_text_elements(self, df):
-        """
-        Parst Associated_Text und erstellt eine Tabelle mit allen Textelementen.
-        """
-        text_assignments = []
+        if text_df.empty or df_processed.empty:
+            return pd.DataFrame()
         
-        for idx, row in df.iterrows():
-            associated_text = row.get('Associated_Text', '')
-            if pd.isna(associated_text) or associated_text == '':
-                continue
-                
-            # Parse mehrere Textelemente aus einem Associated_Text
-            text_elements = self.extract_multiple_text_elements(str(associated_text))
-            
-            for i, text_element in enumerate(text_elements):
-                if text_element['height'] is not None:
-                    text_assignments.append({
-                        'TextID': f"{row['ID']}_T{i+1}",
-                        'Text': text_element['text'],
-                        'Height': text_element['height'],
-                        'TextX': text_element['x'],
-                        'TextY': text_element['y'],
-                        'SourceEntityID': row['ID'],
-                        'SourceEntityType': row['EntityType'],
-                        'AssignedTo': None,
-                        'AssignedEntityID': None,
-                        'Distance': None
-                    })
-        
-        return pd.DataFrame(text_assignments)
-    
-    def extract_multiple_text_elements(self, text_str):
-        """
-        Extrahiert mehrere Textelemente aus einem Associated_Text String.
-        """
-        elements = []
+        coords = df_processed.reindex(columns=['StartX', 'StartY', 'EndX', 'EndY']).to_numpy(dtype=float)
+        rows = np.flatnonzero(df_processed['EntityType'].isin(['LINE', 'ARC']).to_numpy() & ~np.isnan(coords).any(axis=1))
+        if len(rows) == 0:
+            return pd.DataFrame()
         
-        # Split by semicolon für mehrere Textelemente
-        text_parts = text_str.split(';')
+        tree = self._text_tree(text_df)
+        start_text, start_distance = self.nearest_texts(text_df, coords[rows, 0:2], tree=tree)
+        text_ids = text_df['TextID'].to_numpy(dtype=object)
+        exclude = np.where(start_text >= 0, text_ids[np.maximum(start_text, 0)], None)
+        exclude[~exclude.astype(bool)] = None
+        end_text, end_distance = self.nearest_texts(text_df, coords[rows, 2:4], exclude_text_ids=exclude, tree=tree)
         
-        for part in text_parts:
-            part = part.strip()
-            if not part:
-                continue
-                
-            # Extrahiere Höhe
-            height = self.extract_height_from_text(part)
-            
-            # Extrahiere Koordinaten
-            x, y = self.extract_text_coordinates(part)
-            
-            if height is not None:
-                elements.append({
-                    'text': part,
-                    'height': height,
-                    'x': x,
-                    'y': y
-                })
-        
-        return elements
+        # Start- vor Endzuordnung, Geometrien in Tabellenreihenfolge
+        text_position = np.column_stack([start_text, end_text]).ravel()
+        found = text_position >= 0
+        text_position = text_position[found]
+        entity_ids = df_processed['ID'].to_numpy()[np.repeat(rows, 2)[found]]
+        if len(text_position) == 0:
+            return pd.DataFrame()
+        
+        return pd.DataFrame({
+            'TextID': text_ids[text_position],
+            'Text': text_df['Text'].to_numpy()[text_position],
+            'Height': text_df['Height'].to_numpy()[text_position],
+            'TextX': text_df['TextX'].to_numpy()[text_position],
+            'TextY': text_df['TextY'].to_numpy()[text_position],
+            'AssignedEntityID': entity_ids,
+            'AssignedTo': np.tile(np.array(['StartZ', 'EndZ'], dtype=object), len(rows))[found],
+            'Distance': np.column_stack([start_distance, end_distance]).ravel()[found]
+        })
     
-    def create_text_assignment_table(self, df_processed, text_df):
+    def _text_tree(self, text_df):
+        """k-d-Baum über die Texte mit gültiger Position; Rückgabe: (Baum, Zeilenpositionen in text_df)."""
+        text_coords = text_df[['TextX', 'TextY']].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(text_coords).any(axis=1))
+        return (cKDTree(text_coords[valid]) if len(valid) else None), valid
+    
+    def nearest_texts(self, text_df, points, exclude_text_ids=None, tree=None):
         """
-        Erstellt eine intelligente Zuordnung zwischen Textelementen und Geometrie-Endpunkten.
+        Nächstgelegener Text je Punkt (points: Array (n, 2)).
+        exclude_text_ids: je Punkt eine TextID, die nicht gewählt werden darf (oder None).
+        Abfrage mit k=2, damit nach dem Ausschluss noch ein Kandidat bleibt; bei gleicher
+        Distanz gewinnt der Text, der in text_df zuerst steht.
+        Rückgabe: (Zeilenpositionen in text_df, -1 ohne Treffer; Distanzen, inf ohne Treffer).
         """
-        assignments = []
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        positions = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+        tree, valid = tree if tree is not None else self._text_tree(text_df)
+        if tree is None or len(points) == 0:
+            return positions, distances
         
-        # Für jede Geometrie die besten Textzuordnungen finden
-        for idx, row in df_processed.iterrows():
-            entity_id = row['ID']
-            entity_type = row['EntityType']
+        text_ids = text_df['TextID'].to_numpy(dtype=object)[valid] if exclude_text_ids is not None else None
+        pending = np.arange(len(points))
+        k = 2
+        while len(pending):
+            k = min(k, len(valid))
+            candidate_distance, candidate = tree.query(points[pending], k=k)
+            candidate_distance = candidate_distance.reshape(len(pending), k)
+            candidate = candidate.reshape(len(pending), k)
+            allowed = np.isfinite(candidate_distance)
+            if text_ids is not None:
+                excluded = np.asarray(exclude_text_ids, dtype=object)[pending]
+                allowed &= ~((text_ids[np.minimum(candidate, len(valid) - 1)] == excluded[:, None]) &
+                             pd.notna(excluded)[:, None])
             
-            if entity_type in ['LINE', 'ARC']:
-                start_x, start_y = row['StartX'], row['StartY']
-                end_x, end_y = row['EndX'], row['EndY']
-                
-                if pd.notna(start_x) and pd.notna(start_y) and pd.notna(end_x) and pd.notna(end_y):
-                    # Finde nächsten Text für Startpunkt
-                    start_assignment = self.find_nearest_text_for_point(
-                        text_df, start_x, start_y, entity_id, 'StartZ'
-                    )
-                    if start_assignment:
-                        assignments.append(start_assignment)
-                    
-                    # Finde nächsten Text für Endpunkt (exclude bereits zugewiesene)
-                    end_assignment = self.find_nearest_text_for_point(
-                        text_df, end_x, end_y, entity_id, 'EndZ',
-                        exclude_text_id=start_assignment['TextID'] if start_assignment else None
-                    )
-                    if end_assignment:
-                        assignments.append(end_assignment)
-        
-        return pd.DataFrame(assignments)
+            # Kleinste Distanz, bei Gleichstand kleinste Textposition
+            order = np.lexsort((candidate, np.where(allowed, candidate_distance, np.inf)), axis=-1)
+            best = order[:, 0]
+            chosen = np.arange(len(pending))
+            hit = allowed[chosen, best]
+            positions[pending[hit]] = valid[candidate[chosen, best][hit]]
+            distances[pending[hit]] = candidate_distance[chosen, best][hit]
+            
+            # Mehrfach vorkommende ausgeschlossene TextIDs: mit mehr Kandidaten erneut abfragen
+            pending = pending[~hit & ~(~np.isfinite(candidate_distance)).any(axis=1)]
+            if k == len(valid):
+                break
+            k *= 4
+        return positions, distances
     
     def find_nearest_text_for_point(self, text_df, point_x, point_y, entity_id, assignment_type, exclude_text_id=None):
         """
         Findet den nächstgelegenen Text für einen bestimmten Punkt.
+        Für viele Punkte nearest_texts bzw. create_text_assignment_table verwenden.
         """
         if text_df.empty:
             return None
         
-        # Filter verfügbare Texte (exclude bereits zugewiesene)
-        available_texts = text_df.copy()
-        if exclude_text_id:
-            available_texts = available_texts[available_texts['TextID'] != exclude_text_id]
-        
-        if available_texts.empty:
+        positions, distances = self.nearest_texts(text_df, [(point_x, point_y)],
+                                                  exclude_text_ids=[exclude_text_id or None])
+        if positions[0] < 0:
             return None
         
-        # Berechne Distanzen zu allen verfügbaren Texten
-        distances = []
-        for _, text_row in available_texts.iterrows():
-            if pd.notna(text_row['TextX']) and pd.notna(text_row['TextY']):
-                dist = self.point_distance(
-                    (point_x, point_y), 
-                    (text_row['TextX'], text_row['TextY'])
-                )
-                distances.append(dist)
-            else:
-                distances.append(float('inf'))
-        
-        if not distances or min(distances) == float('inf'):
-            return None
-        
-        # Finde nächsten Text
-        min_idx = distances.index(min(distances))
-        nearest_text = available_texts.iloc[min_idx]
-        
+        nearest_text = text_df.iloc[positions[0]]
         return {
             'TextID': nearest_text['TextID'],
             'Text': nearest_text['Text'],
@@ -1104,51 +1797,22 @@ class HeightAnalysisLogic:
             'TextY': nearest_text['TextY'],
             'AssignedEntityID': entity_id,
             'AssignedTo': assignment_type,
-            'Distance': min(distances)
+            'Distance': distances[0]
         }
-    
-    def point_distance(self, point1, point2):
-        """Berechnet euklidische Distanz zwischen zwei Punkten."""
-        import math
-        return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
-    
-    def parse_text_elements_for_line_arc(self, text_str, start_x, start_y, end_x, end_y):
-        """
-        Parst Textelemente und ordnet sie Start/End basierend auf Distanz zu.
-        Falls keine Koordinaten verfügbar, nutze erste/letzte Höhe.
-        """
-        if pd.isna(text_str) or not text_str:
-            return None, None
-        
-        text_elements = self.extract_multiple_text_elements(str(text_str))
-        if len(text_elements) == 0:
-            return None, None
-        elif len(text_elements) == 1:
-            # Nur ein Text - verwende für beide
-            return text_elements[0]['height'], text_elements[0]['height']
-        else:
-            # Mehrere Texte - wähle basierend auf Distanz oder Position
-            start_distances = []
-            end_distances = []
-            
-            has_coordinates = False
-            for elem in text_elements:
-                if elem['x'] is not None and elem['y'] is not None:
-                    has_coordinates = True
-                    start_dist = self.point_distance((start_x, start_y), (elem['x'], elem['y']))
-                    end_dist = self.point_distance((end_x, end_y), (elem['x'], elem['y']))
-                    start_distances.append(start_dist)
-                    end_distances.append(end_dist)
-                else:
-                    start_distances.append(float('inf'))
-                    end_distances.append(float('inf'))
-            
-            if has_coordinates:
-                # Finde besten Text für Start und End basierend auf Distanz
-                start_idx = start_distances.index(min(start_distances)) if start_distances else 0
-                end_idx = end_distances.index(min(end_distances)) if end_distances else 0
-                
-                return text_elements[start_idx]['height'], text_elements[end_idx]['height']
-            else:
-                # Keine Koordinaten verfügbar - verwende ersten für Start, letzten für End
-                return text_elements[0]['height'], text_elements[-1]['height']
\ No newline at end of file
+
+
+def propagate_layer_arrays(arrays):
+    """
+    Worker für HeightAnalysisLogic.propagate_layers (auf Modulebene, damit er in einen
+    Worker-Prozess übertragen werden kann). Die Log-Meldungen werden gesammelt und vom
+    Hauptprozess in Layer-Reihenfolge protokolliert.
+    Rückgabe: (Meldungen als Liste (Stufe, Meldung), start_z, end_z).
+    """
+    with collect_messages() as messages:
+        start_z, end_z = HeightAnalysisLogic().propagate_arrays(arrays)
+    return messages, start_z, end_z
+
+
+def model_path_for(result_path):
+    """Pfad der KNN-Modelldatei, die neben einer Ergebnisdatei (gleicher Name) liegt."""
+    return os.path.splitext(result_path)[0] + MODEL_FILE_SUFFIX
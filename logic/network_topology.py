@@ -0,0 +1,198 @@
+"""
+Gemeinsames Knoten-/Kantenmodell des Leitungsnetzes für die Z-Pipeline.
+
+Die Endpunkte aller Linien und Bögen werden einmalig über einen k-d-Baum zu
+Knoten zusammengefasst (Abstand <= tolerance, transitiv). Daraus entstehen
+
+    nodes: je Knoten Position (Mittel der Endpunkte) und Anzahl der Endpunkte
+    edges: je Linie/Bogen ID, Typ, Layer, Start- und Endknoten und Länge
+           (Index = Zeilenindex im Geometrie-DataFrame)
+
+Zeilen werden über ihre Position im Geometrie-DataFrame nachgeschlagen (row_nodes,
+row_lengths), damit auch doppelte Index-Labels (z.B. nach concat ohne ignore_index)
+funktionieren.
+
+Propagation, Koordinaten-Konsistenz und die Z-Synchronisierung im Hauptfenster
+arbeiten auf diesem Modell statt eigene Endpunkt-Vergleiche anzustellen.
+Neu berechnet wird nur, wenn sich die Geometrie ändert (Fingerprint über die
+Lage-Spalten; Z-Änderungen lassen das Modell gültig).
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from logic.pipeline_logging import get_logger
+
+DEFAULT_TOLERANCE = 0.01
+
+# Geometrietypen mit Start- und Endpunkt (Kanten des Netzes)
+EDGE_TYPES = ('LINE', 'ARC')
+
+# Spalten, deren Änderung das Modell ungültig macht
+GEOMETRY_COLUMNS = ['ID', 'EntityType', 'Layer', 'StartX', 'StartY', 'EndX', 'EndY',
+                    'CenterX', 'CenterY', 'Radius', 'StartAngle', 'EndAngle']
+
+topology_log = get_logger('topology')
+
+
+class NetworkTopology:
+    def __init__(self, tolerance=DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        self.fingerprint = None
+        self.nodes = pd.DataFrame(columns=['X', 'Y', 'Degree'])
+        self.edges = pd.DataFrame(columns=['ID', 'EntityType', 'Layer', 'StartNode', 'EndNode', 'Length'])
+        # Je Zeile des Geometrie-DataFrames: Index-Label, ID und Position in edges (-1 ohne Kante)
+        self.row_index = pd.Index([])
+        self.row_ids = None
+        self.row_edges = np.empty(0, dtype=np.int64)
+
+    def compute_fingerprint(self, geo_df):
+        """Fingerprint über Index, Lage-Spalten und Toleranz."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr(self.tolerance).encode())
+        columns = [column for column in GEOMETRY_COLUMNS if column in geo_df.columns]
+        digest.update(repr(columns).encode())
+        if len(geo_df):
+            digest.update(pd.util.hash_pandas_object(geo_df[columns], index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def update(self, geo_df):
+        """Baut das Modell nur neu auf, wenn sich die Geometrie seit dem letzten Aufruf geändert hat."""
+        fingerprint = self.compute_fingerprint(geo_df)
+        if fingerprint != self.fingerprint:
+            self._build(geo_df)
+            self.fingerprint = fingerprint
+        return self
+
+    def invalidate(self):
+        """Erzwingt den Neuaufbau beim nächsten update()."""
+        self.fingerprint = None
+
+    def _build(self, geo_df):
+        self.row_index = geo_df.index
+        self.row_ids = geo_df['ID'].to_numpy() if 'ID' in geo_df.columns else None
+        self.row_edges = np.full(len(geo_df), -1, dtype=np.int64)
+        if geo_df.empty or 'EntityType' not in geo_df.columns:
+            self.nodes = self.nodes.iloc[0:0]
+            self.edges = self.edges.iloc[0:0]
+            return
+
+        def column(name):
+            if name not in geo_df.columns:
+                return np.full(len(geo_df), np.nan)
+            return pd.to_numeric(geo_df[name], errors='coerce').to_numpy(dtype=float)
+
+        starts = np.column_stack([column('StartX'), column('StartY')])
+        ends = np.column_stack([column('EndX'), column('EndY')])
+        valid = (geo_df['EntityType'].isin(EDGE_TYPES).to_numpy() &
+                 ~np.isnan(starts).any(axis=1) & ~np.isnan(ends).any(axis=1))
+        starts, ends = starts[valid], ends[valid]
+        edge_count = len(starts)
+        self.row_edges[valid] = np.arange(edge_count)
+        if edge_count == 0:
+            self.nodes = self.nodes.iloc[0:0]
+            self.edges = self.edges.iloc[0:0]
+            return
+
+        # Endpunkte innerhalb der Toleranz verbinden; Zusammenhangskomponenten = Knoten
+        points = np.vstack([starts, ends])
+        pairs = cKDTree(points).query_pairs(self.tolerance, output_type='ndarray')
+        graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(points), len(points)))
+        node_count, labels = connected_components(graph, directed=False)
+
+        # Knotennummern in Reihenfolge des ersten Auftretens (Zeile für Zeile, Start vor Ende)
+        first_seen = np.unique(labels.reshape(2, edge_count).T.ravel(), return_index=True)[1]
+        renumber = np.empty(node_count, dtype=np.int64)
+        renumber[np.argsort(first_seen)] = np.arange(node_count)
+        labels = renumber[labels]
+
+        degree = np.bincount(labels, minlength=node_count)
+        self.nodes = pd.DataFrame({
+            'X': np.bincount(labels, weights=points[:, 0], minlength=node_count) / np.maximum(degree, 1),
+            'Y': np.bincount(labels, weights=points[:, 1], minlength=node_count) / np.maximum(degree, 1),
+            'Degree': degree
+        }, index=pd.RangeIndex(node_count, name='NodeID'))
+
+        # Länge: Sehne für Linien, Bogenlänge für Bögen (gegen den Uhrzeigersinn von Start- bis Endwinkel)
+        types = geo_df['EntityType'].to_numpy()[valid]
+        length = np.hypot(ends[:, 0] - starts[:, 0], ends[:, 1] - starts[:, 1])
+        span = np.mod(column('EndAngle')[valid] - column('StartAngle')[valid], 360.0)
+        span = np.where(span == 0.0, 360.0, span)
+        arc_length = column('Radius')[valid] * np.radians(span)
+        length = np.where((types == 'ARC') & ~np.isnan(arc_length), arc_length, length)
+
+        layers = geo_df['Layer'].to_numpy()[valid] if 'Layer' in geo_df.columns else np.full(edge_count, '0', dtype=object)
+        self.edges = pd.DataFrame({
+            'ID': geo_df['ID'].to_numpy()[valid],
+            'EntityType': types,
+            'Layer': layers,
+            'StartNode': labels[:edge_count],
+            'EndNode': labels[edge_count:],
+            'Length': length
+        }, index=geo_df.index[valid])
+        topology_log.info("🕸️ Netztopologie: %d Kanten, %d Knoten (Toleranz %s)", edge_count, node_count, self.tolerance)
+
+    def endpoint_nodes(self, entity_ids):
+        """
+        Start- und Endknoten zu Geometrie-IDs.
+        Rückgabe: zwei int-Arrays, -1 für IDs ohne Kante (z.B. Kreise oder unbekannte IDs).
+        """
+        edges = self.edges.drop_duplicates('ID').set_index('ID')
+        entity_ids = pd.Index(entity_ids)
+        start_nodes = entity_ids.map(edges['StartNode']).to_numpy(dtype=float)
+        end_nodes = entity_ids.map(edges['EndNode']).to_numpy(dtype=float)
+        return (np.nan_to_num(start_nodes, nan=-1).astype(np.int64),
+                np.nan_to_num(end_nodes, nan=-1).astype(np.int64))
+
+    def row_nodes(self, index, ids=None):
+        """
+        Start- und Endknoten zu Zeilenindizes des Geometrie-DataFrames (-1 ohne Kante).
+        ids: IDs der Zeilen; nur nötig, um bei doppelten Index-Labels Teilmengen eindeutig
+        zuzuordnen (siehe _row_positions).
+        """
+        edge = self._row_edge_positions(index, ids)
+        if self.edges.empty:
+            return (edge.copy(), edge.copy())
+        has_edge = edge >= 0
+        start_nodes = np.where(has_edge, self.edges['StartNode'].to_numpy(dtype=np.int64)[edge], -1)
+        end_nodes = np.where(has_edge, self.edges['EndNode'].to_numpy(dtype=np.int64)[edge], -1)
+        return start_nodes, end_nodes
+
+    def row_lengths(self, index, ids=None):
+        """Kantenlänge zu Zeilenindizes des Geometrie-DataFrames (NaN ohne Kante)."""
+        edge = self._row_edge_positions(index, ids)
+        if self.edges.empty:
+            return np.full(len(edge), np.nan)
+        return np.where(edge >= 0, self.edges['Length'].to_numpy(dtype=float)[edge], np.nan)
+
+    def _row_edge_positions(self, index, ids=None):
+        """Position in edges je Zeile (-1 ohne Kante oder für unbekannte Zeilen)."""
+        positions = self._row_positions(index, ids)
+        if len(self.row_edges) == 0:
+            return np.full(len(positions), -1, dtype=np.int64)
+        return np.where(positions >= 0, self.row_edges[positions], -1)
+
+    def _row_positions(self, index, ids=None):
+        """
+        Positionen der Zeilen im Geometrie-DataFrame (-1 für unbekannte Labels).
+        Bei doppelten Index-Labels wird über (Label, ID) zugeordnet, sonst das k-te Vorkommen
+        eines Labels in index dem k-ten Vorkommen im Geometrie-DataFrame.
+        """
+        index = pd.Index(index)
+        if index.equals(self.row_index):
+            return np.arange(len(index))
+        if self.row_index.is_unique:
+            return self.row_index.get_indexer(index)
+        if ids is not None and self.row_ids is not None:
+            row_keys = pd.MultiIndex.from_arrays([self.row_index, self.row_ids])
+            if row_keys.is_unique:
+                return row_keys.get_indexer(pd.MultiIndex.from_arrays([index, np.asarray(ids)]))
+        codes, labels = pd.factorize(self.row_index)
+        index_codes = labels.get_indexer(index)
+        row_keys = pd.MultiIndex.from_arrays([codes, pd.Series(codes).groupby(codes).cumcount().to_numpy()])
+        index_keys = pd.MultiIndex.from_arrays([index_codes, pd.Series(index_codes).groupby(index_codes).cumcount().to_numpy()])
+        return row_keys.get_indexer(index_keys)
@@ -0,0 +1,147 @@
+"""
+Protokollierung der Z-Pipeline.
+
+Je Teilsystem ein Logger unterhalb von 'zpipeline' (get_logger('propagation') ->
+'zpipeline.propagation'). Stufen:
+
+    WARNING  Auffälligkeiten (Standard, sonst keine Ausgabe)
+    INFO     eine Zusammenfassung je Pipeline-Stufe mit Zählern und Laufzeit (PipelineStage)
+    DEBUG    Meldungen je Layer und je Element (z.B. jede propagierte Höhe)
+
+Die Stufe kommt aus der Umgebungsvariable ZPIPELINE_LOG_LEVEL oder aus
+configure_logging(). Meldungen werden lazy formatiert (logger.debug("... %s", wert)),
+abgeschaltete Einzelmeldungen kosten in Schleifen daher nur den Stufen-Test.
+Die Ausgabe geht auf das jeweils aktuelle sys.stdout. Worker-Prozesse der
+Layer-Propagation sammeln ihre Meldungen mit collect_messages und geben sie als
+Daten an den Hauptprozess zurück, der sie geordnet protokolliert.
+"""
+import contextlib
+import logging
+import os
+import sys
+import time
+
+ROOT_LOGGER = 'zpipeline'
+LEVEL_ENVIRONMENT = 'ZPIPELINE_LOG_LEVEL'
+DEFAULT_LEVEL = logging.WARNING
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """StreamHandler auf das beim Schreiben aktuelle sys.stdout (auch umgeleitet)."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _CollectingHandler(logging.Handler):
+    """Sammelt (Stufe, Meldung) statt sie auszugeben."""
+
+    def __init__(self, messages):
+        super().__init__()
+        self.messages = messages
+
+    def emit(self, record):
+        self.messages.append((record.levelno, record.getMessage()))
+
+
+def get_logger(subsystem):
+    """Logger eines Teilsystems der Z-Pipeline."""
+    return logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+
+
+def configure_logging(level=None):
+    """
+    Setzt die Stufe aller Pipeline-Logger (Name oder logging-Konstante; ohne Angabe aus
+    ZPIPELINE_LOG_LEVEL, sonst WARNING). Die Stufe wird auch in die Umgebung geschrieben,
+    damit Worker-Prozesse sie übernehmen.
+    """
+    if level is None:
+        level = os.environ.get(LEVEL_ENVIRONMENT, DEFAULT_LEVEL)
+    if isinstance(level, str):
+        level = logging.getLevelName(level.strip().upper())
+        if not isinstance(level, int):
+            level = DEFAULT_LEVEL
+
+    root = logging.getLogger(ROOT_LOGGER)
+    if not any(isinstance(handler, _ConsoleHandler) for handler in root.handlers):
+        handler = _ConsoleHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+    os.environ[LEVEL_ENVIRONMENT] = logging.getLevelName(level)
+    return root
+
+
+@contextlib.contextmanager
+def collect_messages():
+    """
+    Leitet alle Pipeline-Meldungen für die Dauer des Blocks in eine Liste (Stufe, Meldung)
+    um, statt sie auszugeben. Für Worker-Prozesse, deren Meldungen der Hauptprozess
+    in fester Reihenfolge protokolliert:
+
+        with collect_messages() as messages:
+            ...
+        return messages
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    messages = []
+    handlers = root.handlers
+    root.handlers = [_CollectingHandler(messages)]
+    try:
+        yield messages
+    finally:
+        root.handlers = handlers
+
+
+class PipelineStage:
+    """
+    Laufzeit und Zähler einer Pipeline-Stufe; beim Verlassen eine INFO-Zusammenfassung.
+    Mit results (Dict) wird das Ergebnis dort unter dem Stufennamen abgelegt:
+
+        with PipelineStage(log, 'Propagation', self.stage_stats) as stage:
+            stage.count('Layer')
+
+    Für Stufen über eine ganze Methode auch start()/finish().
+    """
+
+    def __init__(self, logger, name, results=None):
+        self.logger = logger
+        self.name = name
+        self.results = results
+        self.counters = {}
+        self.seconds = 0.0
+        self._start = None
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + int(amount)
+
+    def start(self):
+        self._start = time.perf_counter()
+        return self
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self._start
+        if self.results is not None:
+            self.results[self.name] = dict(self.counters, seconds=self.seconds)
+        if self.logger.isEnabledFor(logging.INFO):
+            details = ', '.join(f'{counter}: {value}' for counter, value in self.counters.items())
+            self.logger.info('⏱️ %s: %.3f s%s', self.name, self.seconds, f' ({details})' if details else '')
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish()
+        return False
+
+
+configure_logging()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Projektverzeichnis importierbar machen (logic/, benchmarks/ sind Namespace-Pakete)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,120 @@
+"""
+Gebündelte Bogen-Parameter (logic/arc_geometry.py) gegen ezdxf: OCS-Achsen und
+arc_parameters für geneigte Bögen, Bögen mit NormalZ < 0 (im Uhrzeigersinn), Normalen an
+der Grenze des Arbitrary-Axis-Algorithmus, fehlende Höhen und kollineare Punkte.
+Referenz je Bogen ist das zeilenweise Verfahren mit ezdxf Vec3/OCS
+(benchmarks/arc_geometry_benchmark.py); Übereinstimmung auf 1e-9.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+ezdxf_math = pytest.importorskip('ezdxf.math')
+
+from benchmarks.arc_geometry_benchmark import reference_arc_points  # noqa: E402
+from logic.arc_geometry import ARBITRARY_AXIS_LIMIT, arc_parameters, center_heights, ocs_axes  # noqa: E402
+
+TOLERANCE = 1e-9
+
+
+def arc_rows(points):
+    """Bögen als DataFrame aus (Start, Ende, Mittelpunkt, StartZ, EndZ, CenterZ)."""
+    return pd.DataFrame([{'StartX': start[0], 'StartY': start[1], 'EndX': end[0], 'EndY': end[1],
+                          'CenterX': center[0], 'CenterY': center[1],
+                          'StartZ': start_z, 'EndZ': end_z, 'CenterZ': center_z}
+                         for start, end, center, start_z, end_z, center_z in points])
+
+
+def batched(rows):
+    """arc_parameters in der Spaltenreihenfolge von reference_arc_points."""
+    result = arc_parameters(rows[['StartX', 'StartY']].to_numpy(), rows[['EndX', 'EndY']].to_numpy(),
+                            rows[['CenterX', 'CenterY']].to_numpy(), rows['StartZ'].to_numpy(dtype=float),
+                            rows['EndZ'].to_numpy(dtype=float), rows['CenterZ'].to_numpy(dtype=float))
+    values = np.column_stack([result['center_z'], result['radius'], result['normal'],
+                              result['start_angle'], result['end_angle']])
+    return values, result
+
+
+def assert_matches_ezdxf(rows):
+    values, result = batched(rows)
+    reference = np.array([reference_arc_points(row) for _, row in rows.iterrows()])
+    # Radius ist auch bei kollinearen Punkten definiert, der zeilenweise Weg bricht vorher ab
+    values[result['collinear'], 1:] = np.nan
+    difference = np.abs(values - reference)
+    difference[:, 5:] = np.minimum(difference[:, 5:], np.abs(difference[:, 5:] - 360.0))
+    assert np.array_equal(np.isnan(values), np.isnan(reference))
+    assert np.nanmax(difference) <= TOLERANCE
+    return result
+
+
+def test_tilted_arcs():
+    # Große Höhenunterschiede zwischen Start und Ende: Normale weit weg von der z-Achse
+    result = assert_matches_ezdxf(arc_rows([
+        ((10, 0), (0, 10), (0, 0), 100.0, 40.0, np.nan),
+        ((5, 5), (-5, 5), (0, 0), 0.0, 50.0, np.nan),
+        ((3, 4), (4, -3), (0, 0), 120.0, 119.0, np.nan),
+        ((110, 20), (100, 30), (100, 20), 10.0, 30.0, np.nan),
+    ]))
+    normal = result['normal']
+    assert ((np.abs(normal[:, 0]) >= ARBITRARY_AXIS_LIMIT) | (np.abs(normal[:, 1]) >= ARBITRARY_AXIS_LIMIT)).all()
+
+
+def test_clockwise_arcs_with_negative_normal_z():
+    result = assert_matches_ezdxf(arc_rows([
+        ((10, 0), (0, -10), (0, 0), 100.0, 100.0, np.nan),   # flach, Normale -z
+        ((0, 10), (10, 0), (0, 0), 100.0, 99.9, np.nan),     # fast flach
+        ((0, 10), (10, 0), (0, 0), 100.0, 60.0, np.nan),     # geneigt
+        ((-7, 7), (7, 7), (0, 0), 5.0, 45.0, np.nan),
+    ]))
+    assert (result['normal'][:, 2] < 0).all()
+
+
+@pytest.mark.parametrize('offset', [-2e-3, -1e-6, 0.0, 1e-6, 2e-3])
+def test_normals_at_arbitrary_axis_limit(offset):
+    # Viertelbogen (10, 0) -> (0, ±10): Normale ∝ (-5 dz, ±5 dz, ±100); dz so gewählt,
+    # dass |NormalX| = |NormalY| um ARBITRARY_AXIS_LIMIT liegt
+    limit = ARBITRARY_AXIS_LIMIT + offset
+    drop = 100.0 * limit / np.sqrt(25.0 - 50.0 * limit**2)
+    for sign in (1.0, -1.0):
+        result = assert_matches_ezdxf(arc_rows([((10, 0), (0, sign * 10), (0, 0), 100.0 + drop, 100.0, np.nan)]))
+        assert np.abs(result['normal'][0, :2]) == pytest.approx([limit, limit], abs=1e-12)
+
+
+def test_missing_heights_and_collinear_points():
+    result = assert_matches_ezdxf(arc_rows([
+        ((10, 0), (0, 10), (0, 0), np.nan, 50.0, np.nan),
+        ((10, 0), (0, 10), (0, 0), 50.0, np.nan, np.nan),
+        ((10, 0), (0, 10), (0, 0), np.nan, np.nan, 12.5),
+        ((10, 0), (-10, 0), (0, 0), 50.0, 50.0, np.nan),     # Halbkreis: kollinear
+    ]))
+    assert result['collinear'].tolist() == [False, False, False, True]
+    assert result['center_z'].tolist() == [50.0, 50.0, 12.5, 50.0]
+
+
+def test_random_arcs_match_ezdxf():
+    rng = np.random.default_rng(7)
+    count = 200
+    center = rng.uniform(-100, 100, (count, 2))
+    radius = rng.uniform(0.5, 30, count)
+    angles = rng.uniform(0, 2 * np.pi, (count, 2))
+    start = center + radius[:, None] * np.column_stack([np.cos(angles[:, 0]), np.sin(angles[:, 0])])
+    end = center + radius[:, None] * np.column_stack([np.cos(angles[:, 1]), np.sin(angles[:, 1])])
+    heights = rng.uniform(90, 110, (count, 2)) * rng.choice([1.0, 10.0], (count, 1))
+    assert_matches_ezdxf(arc_rows(zip(map(tuple, start), map(tuple, end), map(tuple, center),
+                                      heights[:, 0], heights[:, 1], [np.nan] * count)))
+
+
+def test_ocs_axes_match_ezdxf():
+    rng = np.random.default_rng(11)
+    normals = np.vstack([rng.normal(size=(100, 3)), [[0, 0, 1], [0, 0, -1], [0.01, 0.005, -1], [1, 0, 0]]])
+    normals = normals / np.linalg.norm(normals, axis=1)[:, None]
+    ux, uy = ocs_axes(normals)
+    for normal, x_axis, y_axis in zip(normals, ux, uy):
+        ocs = ezdxf_math.OCS(ezdxf_math.Vec3(normal))
+        np.testing.assert_allclose(x_axis, tuple(ocs.ux), atol=TOLERANCE)
+        np.testing.assert_allclose(y_axis, tuple(ocs.uy), atol=TOLERANCE)
+
+
+def test_center_heights():
+    result = center_heights([100.0, np.nan, 100.0, np.nan], [98.0, 97.0, np.nan, np.nan], fallback=5.0)
+    assert result.tolist() == [99.0, 97.0, 100.0, 5.0]
@@ -0,0 +1,84 @@
+"""
+Direkt-Zuordnung der Höhentexte (HeightAnalysisLogic.assign_heights_direct): Knoten aus der
+Topologie (auch über Rastergrenzen hinweg), Kreismittelpunkte, Kapazität je Knoten und
+ausgeschlossene Status.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.height_analysis_logic import HeightAnalysisLogic
+
+
+def geometry(rows):
+    df = pd.DataFrame([{'ID': entity_id, 'EntityType': entity_type, 'Layer': 'KANAL',
+                        'StartX': start[0], 'StartY': start[1], 'EndX': end[0], 'EndY': end[1],
+                        'CenterX': center[0], 'CenterY': center[1],
+                        'StartZ': np.nan, 'EndZ': np.nan, 'CenterZ': np.nan}
+                       for entity_id, entity_type, start, end, center in rows])
+    for column in ('StartZ_Status', 'EndZ_Status', 'CenterZ_Status'):
+        df[column] = ''
+    return df
+
+
+def line(entity_id, start, end):
+    return entity_id, 'LINE', start, end, (np.nan, np.nan)
+
+
+def circle(entity_id, center):
+    return entity_id, 'CIRCLE', (np.nan, np.nan), (np.nan, np.nan), center
+
+
+def texts(rows):
+    return pd.DataFrame([{'Text': f'OK {height}', 'Height': height, 'TextX': x, 'TextY': y}
+                         for height, x, y in rows])
+
+
+def test_endpoints_across_grid_cell_share_node():
+    # 0,002 auseinander, aber beiderseits der Rastergrenze 0,005 bei Toleranz 0,01
+    df = geometry([line('A', (0, 0), (10.004, 0)), line('B', (10.006, 0), (20, 0))])
+    result = HeightAnalysisLogic().assign_heights_direct(df, texts([(101.0, 10.5, 1.0)]))
+    assert result.loc[0, 'EndZ'] == 101.0
+    assert result.loc[1, 'StartZ'] == 101.0
+    assert np.isnan(result.loc[0, 'StartZ']) and np.isnan(result.loc[1, 'EndZ'])
+
+
+def test_circle_center_joins_endpoint_node():
+    df = geometry([line('A', (0, 0), (10, 0)), circle('S', (10.003, 0)), circle('T', (30, 0))])
+    result = HeightAnalysisLogic().assign_heights_direct(df, texts([(99.5, 10.0, 0.5), (98.0, 30.0, 0.5)]))
+    assert result.loc[0, 'EndZ'] == 99.5
+    assert result.loc[1, 'CenterZ'] == 99.5
+    assert result.loc[2, 'CenterZ'] == 98.0
+
+
+@pytest.mark.parametrize('status', ['Original', 'Manuell'])
+def test_excluded_statuses_are_not_overwritten(status):
+    df = geometry([line('A', (0, 0), (10, 0)), line('B', (10, 0), (20, 0))])
+    df.loc[0, ['EndZ', 'EndZ_Status']] = [95.0, status]
+    result = HeightAnalysisLogic().assign_heights_direct(df, texts([(101.0, 10.0, 1.0)]))
+    assert result.loc[0, 'EndZ'] == 95.0
+    assert result.loc[1, 'StartZ'] == 101.0
+
+    # Ohne Ausschluss wird auch dieser Punkt beschrieben
+    df.loc[0, ['EndZ', 'EndZ_Status']] = [95.0, status]
+    result = HeightAnalysisLogic().assign_heights_direct(df, texts([(101.0, 10.0, 1.0)]), excluded_statuses=())
+    assert result.loc[0, 'EndZ'] == 101.0
+
+
+def test_node_capacity():
+    # Zwei Texte am selben Knoten, ein freier Knoten daneben
+    df = geometry([line('A', (0, 0), (10, 0))])
+    labels = texts([(100.0, 0.0, 0.5), (100.2, 0.0, 1.0)])
+
+    # Kapazität 1: der fernere Text weicht auf den freien Knoten aus
+    logic = HeightAnalysisLogic()
+    result = logic.assign_heights_direct(df.copy(), labels)
+    assert (result.loc[0, 'StartZ'], result.loc[0, 'EndZ']) == (100.0, 100.2)
+
+    # Kapazität 2: beide Texte am Startknoten, der nähere bestimmt die Höhe
+    result = logic.assign_heights_direct(df.copy(), labels, node_capacity=2)
+    assert result.loc[0, 'StartZ'] == 100.0
+    assert np.isnan(result.loc[0, 'EndZ'])
+
+    with pytest.raises(ValueError):
+        logic.assign_heights_direct(df.copy(), labels, node_capacity=0)
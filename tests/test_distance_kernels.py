@@ -0,0 +1,126 @@
+"""
+Gleichwertigkeit der NumPy- und Numba-Pfade der Abstands-Kernel (logic/distance_kernels.py)
+sowie erwartete Werte an den Randfällen: degenerierte Segmente, Vollkreis-Bögen,
+Punkte auf den Sektorgrenzen und Endpunkt-Abstände genau auf der Toleranz.
+Ohne Numba wird nur der NumPy-Pfad geprüft.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from benchmarks.distance_kernels_benchmark import make_inputs
+from logic import distance_kernels
+from logic.distance_kernels import (END_END, END_START, START_END, START_START, endpoint_pairing,
+                                    point_to_arc_dist_2d, point_to_segment_dist_2d)
+
+PATHS = [pytest.param(False, id='numpy'),
+         pytest.param(True, id='numba', marks=pytest.mark.skipif(not distance_kernels.NUMBA_AVAILABLE,
+                                                                 reason='Numba nicht installiert'))]
+
+
+@pytest.fixture(params=PATHS)
+def kernel_path(request, monkeypatch):
+    """Erzwingt den NumPy- bzw. Numba-Pfad für einen Test."""
+    monkeypatch.setattr(distance_kernels, 'use_numba', request.param)
+    return request.param
+
+
+def both_paths(monkeypatch, kernel, *args):
+    """Ergebnis des Kernels über den NumPy- und den Numba-Pfad."""
+    monkeypatch.setattr(distance_kernels, 'use_numba', False)
+    numpy_result = kernel(*args)
+    monkeypatch.setattr(distance_kernels, 'use_numba', True)
+    return numpy_result, kernel(*args)
+
+
+def arc_point(center, radius, angle):
+    return (center[0] + radius * math.cos(math.radians(angle)), center[1] + radius * math.sin(math.radians(angle)))
+
+
+# --- Liniensegmente -------------------------------------------------------------
+
+def test_segment_projection_and_endpoints(kernel_path):
+    points = [(5, 3), (-4, 3), (13, -4), (7, 0)]
+    starts = [(0, 0)] * 4
+    ends = [(10, 0)] * 4
+    np.testing.assert_allclose(point_to_segment_dist_2d(points, starts, ends), [3.0, 5.0, 5.0, 0.0])
+
+
+def test_degenerate_segment_measures_to_start(kernel_path):
+    points = [(3, 4), (1, 1), (-2, 5)]
+    starts = [(0, 0), (1, 1), (-2, 1)]
+    result = point_to_segment_dist_2d(points, starts, starts)
+    np.testing.assert_allclose(result, [5.0, 0.0, 4.0])
+    assert np.isfinite(result).all()
+
+
+def test_single_point_input(kernel_path):
+    result = point_to_segment_dist_2d((0, 2), (-1, 0), (1, 0))
+    assert result.shape == (1,)
+    assert result[0] == pytest.approx(2.0)
+
+
+# --- Kreisbögen -----------------------------------------------------------------
+
+@pytest.mark.parametrize('start_angle, end_angle', [(0, 0), (90, 90), (45, 405), (-30, 330)])
+def test_full_circle_arc_uses_radius_distance(kernel_path, start_angle, end_angle):
+    # Start == Ende (modulo 360): Vollkreis, jeder Punkt liegt im Sektor
+    center, radius = (2.0, -1.0), 5.0
+    points = [arc_point(center, 8.0, angle) for angle in (0, 100, 200, 300)] + [center]
+    count = len(points)
+    result = point_to_arc_dist_2d(points, [center] * count, [radius] * count,
+                                  [start_angle] * count, [end_angle] * count)
+    np.testing.assert_allclose(result, [3.0, 3.0, 3.0, 3.0, 5.0])
+
+
+@pytest.mark.parametrize('start_angle, end_angle', [(30, 120), (300, 60), (10, 190), (200, 170)])
+def test_points_on_sector_boundaries_are_inside(kernel_path, start_angle, end_angle):
+    # Punkte auf den Strahlen durch Start- und Endpunkt zählen zum Sektor (Abstand zum Kreisrand)
+    center, radius = (0.0, 0.0), 10.0
+    points = [arc_point(center, 14.0, start_angle), arc_point(center, 14.0, end_angle),
+              arc_point(center, 6.0, start_angle), arc_point(center, 6.0, end_angle)]
+    result = point_to_arc_dist_2d(points, [center] * 4, [radius] * 4, [start_angle] * 4, [end_angle] * 4)
+    np.testing.assert_allclose(result, [4.0, 4.0, 4.0, 4.0], atol=1e-9)
+
+
+def test_points_outside_sector_measure_to_nearer_endpoint(kernel_path):
+    # Viertelbogen 0°..90°: Punkte im Gegenquadranten messen zum näheren Bogenendpunkt
+    center, radius = (0.0, 0.0), 10.0
+    points = [(-10.0, -1.0), (-1.0, -10.0), (0.0, -10.0)]
+    result = point_to_arc_dist_2d(points, [center] * 3, [radius] * 3, [0.0] * 3, [90.0] * 3)
+    expected = [min(math.hypot(x - 10.0, y), math.hypot(x, y - 10.0)) for x, y in points]
+    np.testing.assert_allclose(result, expected)
+
+
+def test_arc_across_zero_degrees(kernel_path):
+    # Bogen 350°..10° (über 0°): 0° liegt innen, 180° außen
+    center, radius = (0.0, 0.0), 10.0
+    points = [(12.0, 0.0), (-12.0, 0.0)]
+    result = point_to_arc_dist_2d(points, [center] * 2, [radius] * 2, [350.0] * 2, [10.0] * 2)
+    end_point = arc_point(center, radius, 10.0)
+    np.testing.assert_allclose(result, [2.0, math.hypot(-12.0 - end_point[0], -end_point[1])])
+
+
+# --- Endpunkt-Paarung -----------------------------------------------------------
+
+def test_endpoint_pairing_bits_and_tolerance(kernel_path):
+    first_starts = [(0, 0), (0, 0), (0, 0), (0, 0)]
+    first_ends = [(10, 0), (10, 0), (10, 0), (10, 0)]
+    second_starts = [(0, 0), (10, 0), (0.25, 0), (10.5, 0)]
+    second_ends = [(10, 0), (0, 0), (20, 0), (20, 0)]
+    result = endpoint_pairing(first_starts, first_ends, second_starts, second_ends, 0.25)
+    assert result.dtype == np.uint8
+    assert result.tolist() == [START_START | END_END, START_END | END_START, START_START, 0]
+
+
+# --- NumPy- und Numba-Pfad ------------------------------------------------------
+
+@pytest.mark.skipif(not distance_kernels.NUMBA_AVAILABLE, reason='Numba nicht installiert')
+@pytest.mark.parametrize('kernel', ['segment', 'arc', 'pairing'])
+def test_numba_matches_numpy(monkeypatch, kernel):
+    # Zufallseingaben mit eingestreuten Randfällen (wie im Benchmark); Ergebnisse bitgleich
+    inputs = make_inputs(20_000, seed=3)[kernel]
+    function = {'segment': point_to_segment_dist_2d, 'arc': point_to_arc_dist_2d, 'pairing': endpoint_pairing}[kernel]
+    numpy_result, numba_result = both_paths(monkeypatch, function, *inputs)
+    np.testing.assert_array_equal(numpy_result, numba_result)
@@ -0,0 +1,48 @@
+"""
+Zuordnung der Zeilen zu Topologie-Kanten (logic/network_topology.py), auch bei doppelten
+Index-Labels im Geometrie-DataFrame (z.B. nach pd.concat ohne ignore_index).
+"""
+import numpy as np
+import pandas as pd
+
+from logic.network_topology import NetworkTopology
+
+
+def chain(ids, x0):
+    """Zwei verbundene Linien und ein Kreis ab x0."""
+    return pd.DataFrame({
+        'ID': ids,
+        'EntityType': ['LINE', 'LINE', 'CIRCLE'],
+        'Layer': 'KANAL',
+        'StartX': [x0, x0 + 10.0, np.nan], 'StartY': [0.0, 0.0, np.nan],
+        'EndX': [x0 + 10.0, x0 + 20.0, np.nan], 'EndY': [0.0, 0.0, np.nan],
+        'CenterX': [np.nan, np.nan, x0], 'CenterY': [np.nan, np.nan, 0.0]
+    })
+
+
+def test_row_nodes_unique_index():
+    geo_df = chain(['A1', 'A2', 'A3'], 0.0)
+    topology = NetworkTopology().update(geo_df)
+    start_nodes, end_nodes = topology.row_nodes(geo_df.index)
+    assert start_nodes.tolist() == [0, 1, -1]
+    assert end_nodes.tolist() == [1, 2, -1]
+    # Teilmenge in anderer Reihenfolge und unbekanntes Label
+    start_nodes, end_nodes = topology.row_nodes(pd.Index([1, 7]))
+    assert start_nodes.tolist() == [1, -1]
+    np.testing.assert_allclose(topology.row_lengths(geo_df.index), [10.0, 10.0, np.nan])
+
+
+def test_row_nodes_duplicate_labels():
+    geo_df = pd.concat([chain(['A1', 'A2', 'A3'], 0.0), chain(['B1', 'B2', 'B3'], 100.0)])
+    assert not geo_df.index.is_unique
+    topology = NetworkTopology().update(geo_df)
+    start_nodes, end_nodes = topology.row_nodes(geo_df.index)
+    assert start_nodes.tolist() == [0, 1, -1, 3, 4, -1]
+    assert end_nodes.tolist() == [1, 2, -1, 4, 5, -1]
+    assert len(topology.row_lengths(geo_df.index)) == len(geo_df)
+
+    # Teilmenge (z.B. ein Layer) nur mit Zeilen der zweiten Zeichnung: Zuordnung über die ID
+    second = geo_df.iloc[3:5]
+    start_nodes, end_nodes = topology.row_nodes(second.index, second['ID'].to_numpy())
+    assert start_nodes.tolist() == [3, 4]
+    assert end_nodes.tolist() == [4, 5]
@@ -0,0 +1,22 @@
+"""
+Gleichwertigkeit der Höhenpropagation über die Topologie-Knoten
+(HeightAnalysisLogic.propagate_heights_along_network) mit den ursprünglichen iterativen
+Durchläufen (wörtliche Kopie in benchmarks/baseline_propagation.py): Sonderfälle der
+Vorrangregeln und kleine synthetische Netze mit festen Seeds.
+"""
+import pytest
+
+from benchmarks.propagation_benchmark import compare, special_fixtures, synthetic_fixture
+from logic.height_analysis_logic import HeightAnalysisLogic
+
+
+@pytest.mark.parametrize('name', sorted(special_fixtures()))
+def test_special_cases_match_baseline(name):
+    differences, _, _ = compare(HeightAnalysisLogic(), special_fixtures()[name])
+    assert differences == 0
+
+
+@pytest.mark.parametrize('size, seed', [(300, 0), (300, 1), (1000, 2)])
+def test_synthetic_networks_match_baseline(size, seed):
+    differences, _, _ = compare(HeightAnalysisLogic(), synthetic_fixture(size, seed))
+    assert differences == 0
@@ -1,23 +1,58 @@
 from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton,
                              QTableView, QFileDialog, QMessageBox, QGroupBox, QLabel,
-                             QHBoxLayout, QCheckBox, QScrollArea, QSplitter, QDialog, QFormLayout, QDoubleSpinBox)
+                             QHBoxLayout, QCheckBox, QScrollArea, QSplitter, QDialog, QFormLayout, QDoubleSpinBox,
+                             QLineEdit, QComboBox, QSpinBox, QProgressBar)
 import pandas as pd
 import numpy as np 
-from logic.analysis_handler import AnalysisHandler
+from logic.analysis_handler import AnalysisHandler, AnalysisCancelled
 from ui.pandas_table_model import PandasTableModel
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QThread
 
 
 
+class AnalysisWorker(QThread):
+    """Runs AnalysisHandler.find_associations off the GUI thread."""
+    progress = Signal(int, int)           # processed, total
+    analysis_finished = Signal(object, object)  # result_df, match_df
+    analysis_cancelled = Signal()
+    analysis_failed = Signal(str)
+
+    def __init__(self, analysis_handler, parameters, parent=None):
+        super().__init__(parent)
+        self.analysis_handler = analysis_handler
+        self.parameters = parameters
+        self._cancel_requested = False
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def run(self):
+        try:
+            result_df = self.analysis_handler.find_associations(
+                progress_callback=self.progress.emit,
+                cancel_check=lambda: self._cancel_requested,
+                **self.parameters
+            )
+            self.analysis_finished.emit(result_df, self.analysis_handler.match_df)
+        except AnalysisCancelled:
+            self.analysis_cancelled.emit()
+        except Exception as e:
+            import traceback
+            print(f"DEBUG: Full traceback: {traceback.format_exc()}")
+            self.analysis_failed.emit(str(e))
+
+
 class AnalysisDialog(QDialog):
     """A dialog for entering analysis parameters and displaying the results."""
-    def __init__(self, geo_df, text_df, parent=None):
+    def __init__(self, geo_df, text_df, parent=None, analysis_handler=None):
         super().__init__(parent)
         self.geo_df = geo_df
         self.text_df = text_df
-        self.analysis_handler = AnalysisHandler()
+        # Shared handler (from MainWindow) keeps its result cache between dialog sessions
+        self.analysis_handler = analysis_handler if analysis_handler is not None else AnalysisHandler()
         self.result_df = pd.DataFrame()
         self.parent_window = parent  # Reference to MainWindow
+        self.worker = None
 
         # Debug: Check the columns of the DataFrames
         print(f"DEBUG: Geometry DataFrame columns: {list(self.geo_df.columns) if not self.geo_df.empty else 'Empty'}")
@@ -41,6 +76,25 @@ class AnalysisDialog(QDialog):
         self.line_offset_input.setValue(0.5)
         self.line_offset_input.setSuffix(" units")
         form_layout.addRow("Max. distance to lines:", self.line_offset_input)
+
+        self.layer_rules_input = QLineEdit()
+        self.layer_rules_input.setPlaceholderText("e.g. KANAL_BESCHRIFTUNG=KANAL; SCHACHT_TXT=SCHACHT")
+        self.layer_rules_input.setToolTip("Text layer = allowed geometry layers (comma-separated), rules separated by ';'.\n"
+                                          "Texts on layers without a rule are matched against all geometries.")
+        form_layout.addRow("Layer rules (text=geometry):", self.layer_rules_input)
+
+        self.assignment_mode_input = QComboBox()
+        self.assignment_mode_input.addItem("All geometries within reach", 'all')
+        self.assignment_mode_input.addItem("Nearest geometry per text", 'nearest')
+        self.assignment_mode_input.setToolTip("'Nearest' assigns every text to exactly one geometry.")
+        form_layout.addRow("Assignment mode:", self.assignment_mode_input)
+
+        self.max_texts_input = QSpinBox()
+        self.max_texts_input.setRange(0, 1000)
+        self.max_texts_input.setValue(0)
+        self.max_texts_input.setSpecialValueText("unlimited")
+        self.max_texts_input.setToolTip("Only used in 'nearest' mode: surplus texts move on to their next free geometry.")
+        form_layout.addRow("Max. texts per geometry:", self.max_texts_input)
         
         # Button layout for analysis and export
         button_layout = QHBoxLayout()
@@ -49,6 +103,12 @@ class AnalysisDialog(QDialog):
         self.analyze_button = QPushButton("Start analysis")
         self.analyze_button.clicked.connect(self.run_analysis)
         button_layout.addWidget(self.analyze_button)
+
+        # Cancel button for a running analysis
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_analysis)
+        self.cancel_button.setEnabled(False)
+        button_layout.addWidget(self.cancel_button)
         
         # NEW button: Apply results to main table
         self.apply_to_main_button = QPushButton("Apply results to main table")
@@ -63,6 +123,10 @@ class AnalysisDialog(QDialog):
         button_layout.addWidget(self.export_button)
         
         form_layout.addRow(button_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        form_layout.addRow(self.progress_bar)
         layout.addLayout(form_layout)
         
         # Result table
@@ -95,24 +159,34 @@ class AnalysisDialog(QDialog):
                                   f"Text-DataFrame fehlen Spalten: {missing_text_cols}")
                 return
             
-            # Führe die Analyse durch
-            self.result_df = self.analysis_handler.find_associations(
+            # Layer-Paar-Regeln übernehmen (leer = alle Texte für alle Geometrien)
+            self.analysis_handler.set_layer_rules(self.layer_rules_input.text())
+
+            # Analyse im Hintergrund starten; vorherige Ergebnisse verwerfen
+            self.result_df = pd.DataFrame()
+            self.result_model.setDataframe(self.result_df)
+            self.export_button.setEnabled(False)
+            self.apply_to_main_button.setEnabled(False)
+
+            parameters = dict(
                 geo_df=self.geo_df,
                 text_df=self.text_df,
                 search_radius=radius,
-                line_offset=line_offset
+                line_offset=line_offset,
+                assignment_mode=self.assignment_mode_input.currentData(),
+                max_texts_per_geometry=self.max_texts_input.value() or None
             )
-            
-            # Aktualisiere die Ergebnis-Tabelle
-            self.result_model.setDataframe(self.result_df)
-            self.result_table.resizeColumnsToContents()
-            
-            # Buttons aktivieren
-            self.export_button.setEnabled(not self.result_df.empty)
-            self.apply_to_main_button.setEnabled(True)  # Immer aktivieren, auch bei leeren Ergebnissen
-            
-            QMessageBox.information(self, "Analyse abgeschlossen", 
-                                  f"Analyse abgeschlossen. {len(self.result_df)} Zuordnungen gefunden.")
+            self.worker = AnalysisWorker(self.analysis_handler, parameters, self)
+            self.worker.progress.connect(self.on_analysis_progress)
+            self.worker.analysis_finished.connect(self.on_analysis_finished)
+            self.worker.analysis_cancelled.connect(self.on_analysis_cancelled)
+            self.worker.analysis_failed.connect(self.on_analysis_failed)
+            self.worker.finished.connect(self.worker.deleteLater)
+
+            self.progress_bar.setRange(0, 0)  # Busy, bis der erste Block gemeldet wird
+            self.progress_bar.setVisible(True)
+            self._set_running(True)
+            self.worker.start()
             
         except Exception as e:
             QMessageBox.critical(self, "Analyse-Fehler", f"Fehler bei der Analyse:\n{str(e)}")
@@ -120,12 +194,68 @@ class AnalysisDialog(QDialog):
             import traceback
             print(f"DEBUG: Full traceback: {traceback.format_exc()}")
 
+    def cancel_analysis(self):
+        """Bricht eine laufende Analyse nach dem aktuellen Block ab."""
+        if self.worker is not None and self.worker.isRunning():
+            self.cancel_button.setEnabled(False)
+            self.progress_bar.setFormat("Abbruch...")
+            self.worker.cancel()
+
+    def on_analysis_progress(self, processed, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(processed)
+        self.progress_bar.setFormat(f"{processed} / {total}")
+
+    def on_analysis_finished(self, result_df, match_df):
+        """Übernimmt das Ergebnis des Workers in die Ergebnis-Tabelle."""
+        self._finish_worker()
+        self.result_df = result_df
+
+        # Aktualisiere die Ergebnis-Tabelle
+        self.result_model.setDataframe(self.result_df)
+        self.result_table.resizeColumnsToContents()
+
+        # Buttons aktivieren
+        self.export_button.setEnabled(not self.result_df.empty)
+        self.apply_to_main_button.setEnabled(True)  # Immer aktivieren, auch bei leeren Ergebnissen
+
+        QMessageBox.information(self, "Analyse abgeschlossen", 
+                              f"Analyse abgeschlossen. {len(self.result_df)} Zuordnungen gefunden.")
+
+    def on_analysis_cancelled(self):
+        self._finish_worker()
+        print("DEBUG: Analyse abgebrochen, Teilergebnisse verworfen")
+
+    def on_analysis_failed(self, message):
+        self._finish_worker()
+        QMessageBox.critical(self, "Analyse-Fehler", f"Fehler bei der Analyse:\n{message}")
+        print(f"DEBUG: Analyse-Fehler: {message}")
+
+    def _finish_worker(self):
+        self.worker = None
+        self.progress_bar.setVisible(False)
+        self.progress_bar.resetFormat()
+        self._set_running(False)
+
+    def _set_running(self, running):
+        self.analyze_button.setEnabled(not running)
+        self.cancel_button.setEnabled(running)
+
+    def reject(self):
+        """Beendet eine laufende Analyse, bevor der Dialog geschlossen wird."""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
+
     def apply_results_to_main_table(self):
         """Wendet die Analyseergebnisse auf die Haupttabelle an."""
         try:
             if self.parent_window and hasattr(self.parent_window, 'geometry_manager'):
                 # Analyseergebnisse in GeometryManager anwenden
-                success = self.parent_window.geometry_manager.apply_analysis_results(self.result_df)
+                success = self.parent_window.geometry_manager.apply_analysis_results(
+                    self.result_df, self.analysis_handler.match_df
+                )
                 
                 if success:
                     # 1. Haupttabelle im MainWindow aktualisieren
@@ -215,7 +345,9 @@ class AnalysisDialog(QDialog):
                             'Anzahl erfolgreiche Zuordnungen',
                             'Anzahl Geometrien ohne Text',
                             'Suchradius Kreise/Arcs verwendet',
-                            'Max. Abstand zu Linien verwendet'
+                            'Max. Abstand zu Linien verwendet',
+                            'Layer-Regeln',
+                            'Zuordnungsmodus'
                         ],
                         'Wert': [
                             str(len(self.geo_df)),
@@ -223,7 +355,9 @@ class AnalysisDialog(QDialog):
                             str(len(self.result_df)),
                             str(max(0, len(self.geo_df) - len(self.result_df))),
                             f"{self.radius_input.value():.2f} Einheiten",
-                            f"{self.line_offset_input.value():.2f} Einheiten"
+                            f"{self.line_offset_input.value():.2f} Einheiten",
+                            self.layer_rules_input.text().strip() or 'keine',
+                            self.assignment_mode_input.currentText()
                         ]
                     }
                     
@@ -4,12 +4,12 @@ import re
 import numpy as np
 from PySide6.QtWidgets import (QApplication, QDialog, QVBoxLayout, QHBoxLayout,
                                QWidget, QPushButton, QLabel, QLineEdit, QFileDialog,
-                               QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView)
+                               QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView, QCheckBox, QComboBox)
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QColor
 
 # Import the logic class
-from logic.height_analysis_logic import HeightAnalysisLogic
+from logic.height_analysis_logic import HeightAnalysisLogic, model_path_for
 
 class HeightAssignmentApp(QDialog):
     def __init__(self, parent=None):
@@ -20,9 +20,12 @@ class HeightAssignmentApp(QDialog):
         self.logic = HeightAnalysisLogic() # Instance of the logic class
         self.df_original = None            # Stores the initially loaded DataFrame
         self.df_processed = None           # Stores the DataFrame prepared by the logic
-        self.points_to_review = pd.DataFrame() # Points to be reviewed manually
+        self.text_matches = None           # Long-format text matches from the geometry-text analysis
+        self.points_to_review = pd.Index([]) # Index labels (df_processed) of the points to be reviewed manually
+        self.review_issues = pd.Series(dtype=object) # Plausibility findings per point to review
         self.current_review_idx = 0        # Index of the current point in review
         self.ml_assignment_completed = False # Flag for completed line interpolation
+        self.table_row_items = {}          # DataFrame index -> first table item of the row (follows sorting)
 
         self.init_ui()
 
@@ -50,6 +53,24 @@ class HeightAssignmentApp(QDialog):
         self.start_ml_button.setEnabled(True)  # Directly enabled, as data is loaded via load_dataframe_directly
         top_layout.addWidget(self.start_ml_button)
 
+        self.direct_assignment_checkbox = QCheckBox("Direct text-to-endpoint assignment")
+        self.direct_assignment_checkbox.setToolTip("Writes every height text to its nearest free endpoint / circle centre\n"
+                                                   "before the network interpolation fills the remaining gaps.")
+        top_layout.addWidget(self.direct_assignment_checkbox)
+
+        self.interpolation_combo = QComboBox()
+        self.interpolation_combo.addItem("Copy node heights", 'copy')
+        self.interpolation_combo.addItem("Gradient between known nodes", 'gradient')
+        self.interpolation_combo.setToolTip("Gradient: remaining open endpoints get a height interpolated linearly\n"
+                                            "along the pipe length between known manholes (per layer).")
+        top_layout.addWidget(self.interpolation_combo)
+
+        self.parallel_layers_checkbox = QCheckBox("Parallel layers (processes)")
+        self.parallel_layers_checkbox.setToolTip("Propagates each layer in its own worker process.\n"
+                                                 "Only used for several layers with at least 50,000 lines/arcs in total;\n"
+                                                 "on machines with few cores it can be slower than serial.")
+        top_layout.addWidget(self.parallel_layers_checkbox)
+
         self.finish_button = QPushButton("Save")
         self.finish_button.clicked.connect(self.finish_assignment_and_save)
         self.finish_button.setEnabled(False)
@@ -90,6 +111,9 @@ class HeightAssignmentApp(QDialog):
             try:
                 if file_name.endswith(('.xlsx', '.xls')):
                     self.df_original = pd.read_excel(file_name)
+                    self.text_matches = None
+                    # Reuse a KNN model saved next to this file (no-op if there is none)
+                    self.logic.load_model(model_path_for(file_name))
                 else:
                     raise ValueError("Unsupported file format. Only XLSX/XLS are supported.")
 
@@ -120,14 +144,20 @@ class HeightAssignmentApp(QDialog):
             except Exception as e:
                 QMessageBox.critical(self, "Error loading file", f"File could not be loaded:\n{e}")
 
-    def load_dataframe_directly(self, dataframe):
-        """Loads data directly from a DataFrame (for integration into main software)."""
+    def load_dataframe_directly(self, dataframe, text_matches=None):
+        """Loads data directly from a DataFrame (for integration into main software).
+
+        text_matches is the optional long-format match table of the geometry-text
+        analysis (AnalysisHandler.match_df). Without it, the heights are parsed
+        from the Associated_Text column.
+        """
         try:
             if dataframe is None or dataframe.empty:
                 raise ValueError("The provided DataFrame is empty or None.")
             
             # Copy DataFrame
             self.df_original = dataframe.copy()
+            self.text_matches = text_matches.copy() if text_matches is not None and not text_matches.empty else None
             
             # Ensure that StartZ, EndZ, CenterZ columns exist and are numeric
             for col in ['StartZ', 'EndZ', 'CenterZ']:
@@ -231,7 +261,12 @@ class HeightAssignmentApp(QDialog):
 
         try:
             # New layer-based line interpolation
-            self.df_processed = self.logic.prepare_data_for_line_interpolation(self.df_original)
+            engine = 'direct' if self.direct_assignment_checkbox.isChecked() else 'network'
+            self.df_processed = self.logic.prepare_data_for_line_interpolation(
+                self.df_original, self.text_matches, assignment_engine=engine,
+                interpolation_mode=self.interpolation_combo.currentData(),
+                execution_mode='process' if self.parallel_layers_checkbox.isChecked() else 'serial'
+            )
             
             # Count results based on status columns
             text_heights = self.df_processed['Direct_Height'].notna().sum()
@@ -240,6 +275,10 @@ class HeightAssignmentApp(QDialog):
                 (self.df_processed['EndZ_Status'] == 'Interpolated').sum() +
                 (self.df_processed['CenterZ_Status'] == 'Interpolated').sum()
             )
+            gradient_heights = (
+                (self.df_processed['StartZ_Status'] == 'Gradient').sum() +
+                (self.df_processed['EndZ_Status'] == 'Gradient').sum()
+            )
             total_objects = len(self.df_processed)
             
             # Analyze layer distribution
@@ -255,6 +294,7 @@ class HeightAssignmentApp(QDialog):
 • Processed layers: {layer_count}
 • Heights from text: {text_heights}
 • Interpolated heights: {interpolated_heights}
+• Gradient heights: {gradient_heights}
 • Circles (text only): {len(self.df_processed[self.df_processed['EntityType'] == 'CIRCLE'])}
 
 🚀 Performance optimization:
@@ -289,16 +329,14 @@ You can now review the results or save them directly."""
             QMessageBox.warning(self, "Not ready", "Please perform line interpolation first.")
             return
             
-        # Create list of points to review based on status columns
-        self.points_to_review = self.df_processed[
-            (self.df_processed['Direct_Height'].notna()) | 
-            (self.df_processed['StartZ_Status'].isin(['Text', 'Interpolated'])) |
-            (self.df_processed['EndZ_Status'].isin(['Text', 'Interpolated'])) |
-            (self.df_processed['CenterZ_Status'].isin(['Text', 'Interpolated']))
-        ].copy()
+        # Only queue objects flagged by the plausibility check (steep/reversed slopes, height jumps, outliers)
+        plausibility = self.logic.check_plausibility(self.df_processed)
+        flagged = plausibility.index[plausibility['Flagged'].to_numpy()]
+        self.points_to_review = flagged
+        self.review_issues = plausibility.loc[flagged, 'Issues']
         
         if self.points_to_review.empty:
-            QMessageBox.information(self, "No points", "No points available for review.")
+            QMessageBox.information(self, "No points", f"No implausible heights found ({len(plausibility)} objects checked).")
             return
 
         self.current_review_idx = 0
@@ -317,7 +355,9 @@ You can now review the results or save them directly."""
             self.finish_assignment_and_save()
             return
 
-        row = self.points_to_review.iloc[self.current_review_idx]
+        # Read the row when it is shown, so corrections of earlier points (re-propagated
+        # through the component) are reflected
+        row = self.current_review_row()
         
         # Basic information
         self.id_line_edit.setText(str(row['ID']))
@@ -385,8 +425,13 @@ You can now review the results or save them directly."""
         # Clear correction field
         self.correction_line_edit.clear()
         
-        # Update status
-        self.status_label.setText(f"Review: Point {self.current_review_idx + 1} of {len(self.points_to_review)}")
+        # Update status with the plausibility findings
+        self.status_label.setText(f"Review: Point {self.current_review_idx + 1} of {len(self.points_to_review)}"
+                                  f" - {self.review_issues.get(row.name, '')}")
+
+    def current_review_row(self):
+        """Current state of the point under review in df_processed."""
+        return self.df_processed.loc[self.points_to_review[self.current_review_idx]]
 
     def accept_prediction(self):
         """Accepts the prediction or correction for the current point."""
@@ -394,7 +439,7 @@ You can now review the results or save them directly."""
             self.display_current_review_point()
             return
 
-        row = self.points_to_review.iloc[self.current_review_idx]
+        row = self.current_review_row()
         
         # Check if a correction was entered
         correction_text = self.correction_line_edit.text().strip()
@@ -415,12 +460,16 @@ You can now review the results or save them directly."""
             except ValueError:
                 QMessageBox.warning(self, "Invalid input", "Please enter a valid number or leave the field blank.")
                 return
-        # If no correction was entered, keep the current values
+            # Re-propagate only within the connected component of the corrected entity
+            changed_rows = self.logic.repropagate_component(self.df_processed, row.name)
+        else:
+            # If no correction was entered, keep the current values
+            changed_rows = []
 
-        # Move to next point
+        # Refresh the table before moving on (the last point saves the results)
+        self.update_table_rows(changed_rows)
         self.current_review_idx += 1
         self.display_current_review_point()
-        self.update_table_display(self.df_processed)
 
     def skip_prediction(self):
         """Skips the current point without changes."""
@@ -433,7 +482,7 @@ You can now review the results or save them directly."""
             self.display_current_review_point()
             return
 
-        row = self.points_to_review.iloc[self.current_review_idx]
+        row = self.current_review_row()
         
         # Set Z-values to 0.0 based on EntityType
         if row['EntityType'] == 'LINE':
@@ -445,11 +494,12 @@ You can now review the results or save them directly."""
         elif row['EntityType'] == 'CIRCLE':
             self.logic.update_processed_data(self.df_processed, row['ID'], row['EntityType'], 
                                            center_z=0.0)
+        changed_rows = self.logic.repropagate_component(self.df_processed, row.name)
         
-        # Move to next point
+        # Refresh the table before moving on (the last point saves the results)
+        self.update_table_rows(changed_rows)
         self.current_review_idx += 1
         self.display_current_review_point()
-        self.update_table_display(self.df_processed)
 
     def finish_assignment_and_save(self):
         """Closes the assignment and saves the results."""
@@ -469,6 +519,9 @@ You can now review the results or save them directly."""
                 try:
                     # Minimal export - direct DataFrame export
                     final_df.to_excel(file_name, index=False)
+                    # Keep a trained KNN model next to the results so the next load can reuse it
+                    if self.logic.model is not None:
+                        self.logic.save_model(model_path_for(file_name))
                     QMessageBox.information(self, "Saved successfully", f"The results have been saved successfully:\n{file_name}")
                     self.accept()  # Close dialog with OK after successful save
                 except Exception as e:
@@ -498,30 +551,13 @@ You can now review the results or save them directly."""
         # Determine which columns are status columns
         status_columns = [col for col in all_columns if col.endswith('_Status')]
         
-        # Fill the table row by row
+        # Fill the table row by row (sorting off, so rows stay where they are inserted)
+        self.data_table.setSortingEnabled(False)
+        self.table_row_items = {}
         for row_idx in range(len(df_to_display)):
             row_data = df_to_display.iloc[row_idx]
-            for col_idx, col_name in enumerate(all_columns):
-                value = row_data.get(col_name, '')
-                
-                # Format values - keep NaN as empty
-                if pd.isna(value):
-                    display_value = ""
-                elif isinstance(value, (int, float)):
-                    # Format numeric values
-                    if col_name in ['StartX', 'StartY', 'StartZ', 'EndX', 'EndY', 'EndZ', 
-                                   'CenterX', 'CenterY', 'CenterZ', 'Radius', 'Direct_Height']:
-                        display_value = f"{float(value):.4f}"
-                    else:
-                        display_value = str(value)
-                else:
-                    display_value = str(value)
-                
-                item = QTableWidgetItem(display_value)
-                
-                # No more color coding - status columns provide the information
-                
-                self.data_table.setItem(row_idx, col_idx, item)
+            self.set_table_row(row_idx, row_data, all_columns)
+            self.table_row_items[df_to_display.index[row_idx]] = self.data_table.item(row_idx, 0)
 
         # Column widths adjustable
         self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
@@ -544,6 +580,44 @@ You can now review the results or save them directly."""
             else:
                 header.resizeSection(i, 120)
 
+    def format_table_value(self, col_name, value):
+        """Formats a cell value - NaN as empty, coordinates and heights with 4 decimals."""
+        if pd.isna(value):
+            return ""
+        if isinstance(value, (int, float)) and col_name in ['StartX', 'StartY', 'StartZ', 'EndX', 'EndY', 'EndZ',
+                                                            'CenterX', 'CenterY', 'CenterZ', 'Radius', 'Direct_Height']:
+            return f"{float(value):.4f}"
+        return str(value)
+
+    def set_table_row(self, table_row, row_data, all_columns):
+        """Writes one DataFrame row into the given table row."""
+        for col_idx, col_name in enumerate(all_columns):
+            # No more color coding - status columns provide the information
+            item = QTableWidgetItem(self.format_table_value(col_name, row_data.get(col_name, '')))
+            self.data_table.setItem(table_row, col_idx, item)
+
+    def update_table_rows(self, index_labels):
+        """
+        Updates only the given rows (index labels of df_processed) after a manual edit,
+        instead of rebuilding the whole table. Falls back to a full refresh if the
+        table does not show df_processed's columns.
+        """
+        all_columns = list(self.df_processed.columns)
+        if self.data_table.columnCount() != len(all_columns) or not self.table_row_items:
+            self.update_table_display(self.df_processed)
+            return
+
+        sorting = self.data_table.isSortingEnabled()
+        self.data_table.setSortingEnabled(False)
+        for label in index_labels:
+            anchor = self.table_row_items.get(label)
+            if anchor is None:
+                continue
+            table_row = anchor.row()
+            self.set_table_row(table_row, self.df_processed.loc[label], all_columns)
+            self.table_row_items[label] = self.data_table.item(table_row, 0)
+        self.data_table.setSortingEnabled(sorting)
+
     def transfer_to_main_table(self):
         """Transfers the processed data for integration into the main table."""
         if self.df_processed is not None:
@@ -16,9 +16,13 @@ import os
 import numpy as np 
 import traceback
 from ui.analysis_dialog import AnalysisDialog
+from logic.analysis_handler import AnalysisHandler, association_cache_dir
+from logic.pipeline_logging import get_logger
 from vis.Testsoftware_Visualisierung import CADViewer
 # heightassignement is imported dynamically at runtime
 
+integration_log = get_logger('integration')
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -34,6 +38,10 @@ class MainWindow(QMainWindow):
         self.text_data_frame = pd.DataFrame() # text_data_frame instead of full_data_frame
         self.visualization_window = None 
         self.dxf_parser = DXFParser()
+        # Shared association handler: its result cache survives reopening the analysis dialog.
+        # Storing it on disk is opt-in (DXF_VIEWER_ASSOCIATION_CACHE, see association_cache_dir)
+        self.analysis_handler = AnalysisHandler()
+        self.analysis_handler.set_cache_dir(association_cache_dir())
 
 
         self.setWindowTitle("DXF Data Viewer")
@@ -307,7 +315,7 @@ Requires the ODAFileConverter for DWG files.""")
             return
 
         # Open the analysis dialog with the filtered data
-        dialog = AnalysisDialog(geo_df, text_df, self)
+        dialog = AnalysisDialog(geo_df, text_df, self, analysis_handler=self.analysis_handler)
         dialog.exec()
 
     def _populate_layer_filters(self):
@@ -633,8 +641,9 @@ Requires the ODAFileConverter for DWG files.""")
             # Setze die Schlüsselwörter vor dem Laden der Daten
             z_tool.set_height_keywords(keywords_text)
             
-            # Transfer the data directly (without XLSX import)
-            z_tool.load_dataframe_directly(current_df)
+            # Transfer the data directly (without XLSX import), together with the
+            # long-format text matches of the geometry-text analysis
+            z_tool.load_dataframe_directly(current_df, self.geometry_manager.get_association_matches(current_df))
             
             # Show the tool as a dialog (just like AnalysisDialog)
             result = z_tool.exec()
@@ -675,13 +684,15 @@ Requires the ODAFileConverter for DWG files.""")
                 raise ValueError("No Z columns found in the data")
 
             updates_applied = 0
+            missing_ids = 0
             arc_indices_to_update = []
             for _, z_row in z_data.iterrows():
                 z_id = z_row['ID']
                 mask = current_df['ID'] == z_id
                 matching_indices = current_df.index[mask]
                 if len(matching_indices) == 0:
-                    print(f"WARNING: ID '{z_id}' not found in main table. Skipping row.")
+                    integration_log.debug("ID '%s' not found in main table. Skipping row.", z_id)
+                    missing_ids += 1
                     continue
                 row_idx = matching_indices[0]
                 for col in available_columns:
@@ -691,20 +702,21 @@ Requires the ODAFileConverter for DWG files.""")
                 if entity_type == 'ARC' and any(col in z_row and pd.notna(z_row[col]) for col in ['StartZ', 'EndZ']):
                     arc_indices_to_update.append(row_idx)
                 updates_applied += 1
+            if missing_ids:
+                integration_log.warning("%d IDs not found in main table, rows skipped", missing_ids)
             # --- NEU: ARC-Parameter nach Z-Änderung neu berechnen ---
-            for idx in arc_indices_to_update:
-                updated_data = {
-                    'StartZ': current_df.loc[idx, 'StartZ'],
-                    'EndZ': current_df.loc[idx, 'EndZ']
-                }
-                entity_id = current_df.loc[idx, 'ID']
-                success, updated_row_series = self.geometry_manager.update_geometry_by_id(entity_id, updated_data)
-                
-                if success and updated_row_series is not None:
-                    # Schreibe die neu berechneten Werte zurück in den DataFrame, der aktualisiert wird
-                    for col_name, value in updated_row_series.items():
-                        if col_name in current_df.columns:
-                            current_df.at[idx, col_name] = value
+            if arc_indices_to_update:
+                arcs = current_df.loc[arc_indices_to_update]
+                updated_rows = self.geometry_manager.update_arc_heights_by_id(
+                    arcs['ID'].tolist(), arcs['StartZ'].to_numpy(), arcs['EndZ'].to_numpy()
+                )
+
+                # Schreibe die neu berechneten Werte zurück in den DataFrame, der aktualisiert wird
+                if not updated_rows.empty:
+                    updated_rows = updated_rows.drop_duplicates('ID').set_index('ID')
+                    common_cols = [col for col in updated_rows.columns if col in current_df.columns and col != 'ID']
+                    found = arcs['ID'].isin(updated_rows.index).to_numpy()
+                    current_df.loc[arcs.index[found], common_cols] = updated_rows.loc[arcs['ID'][found], common_cols].to_numpy()
             
             # Aktualisiere das UI-Modell und den Master-DataFrame im GeometryManager
             self.model.updateDataFrameInPlace(current_df) # UI aktualisieren
@@ -849,7 +861,8 @@ Requires the ODAFileConverter for DWG files.""")
 
     def synchronize_z_values_for_filtered_table(self):
         """
-        Synchronizes Z-values for lines/arcs with identical X/Y coordinates in the currently filtered table.
+        Synchronizes Z-values for lines/arcs with coinciding endpoints (same node of the shared
+        network topology) in the currently filtered table.
         If a conflict is detected (different Z at same X/Y), a warning is shown and user can choose to overwrite.
         """
         df = self.model.get_data_frame()
@@ -864,14 +877,16 @@ Requires the ODAFileConverter for DWG files.""")
             QMessageBox.information(self, "No lines/arcs", "No lines or arcs in the filtered table.")
             return
 
-        # Build mapping: (X,Y) -> [(row_idx, 'StartZ'/EndZ, value)]
+        # Build mapping: topology node -> [(row_idx, 'StartZ'/EndZ, value)]
+        topology = self.geometry_manager.get_topology()
+        start_nodes, end_nodes = topology.endpoint_nodes(df_lines['ID'])
+        z_columns = df_lines.reindex(columns=['StartZ', 'EndZ'])
         coord_map = {}
-        for idx, row in df_lines.iterrows():
-            for z_col, x_col, y_col in [('StartZ', 'StartX', 'StartY'), ('EndZ', 'EndX', 'EndY')]:
-                x, y, z = row.get(x_col), row.get(y_col), row.get(z_col)
-                if pd.notna(x) and pd.notna(y):
-                    key = (round(float(x), 6), round(float(y), 6))
-                    coord_map.setdefault(key, []).append((idx, z_col, z))
+        for idx, start_node, end_node, start_z, end_z in zip(df_lines.index, start_nodes.tolist(), end_nodes.tolist(),
+                                                              z_columns['StartZ'], z_columns['EndZ']):
+            for z_col, node, z in (('StartZ', start_node, start_z), ('EndZ', end_node, end_z)):
+                if node >= 0:
+                    coord_map.setdefault(node, []).append((idx, z_col, z))
 
         # Find conflicts and candidates for synchronization
         changes = []
@@ -894,7 +909,8 @@ Requires the ODAFileConverter for DWG files.""")
         if conflicts:
             msg = "Conflicting Z-values found at the following coordinates:\n"
             for key, entries in conflicts:
-                msg += f"  X={key[0]}, Y={key[1]}: " + ", ".join([f"Row {idx+1} {z_col}={z}" for idx, z_col, z in entries]) + "\n"
+                node_x, node_y = topology.nodes.at[key, 'X'], topology.nodes.at[key, 'Y']
+                msg += f"  X={node_x:.6f}, Y={node_y:.6f}: " + ", ".join([f"Row {idx+1} {z_col}={z}" for idx, z_col, z in entries]) + "\n"
             msg += "\nDo you want to overwrite all Z-values at these coordinates with the first value found?"
             reply = QMessageBox.question(self, "Z-value conflicts", msg, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
             if reply == QMessageBox.Yes: